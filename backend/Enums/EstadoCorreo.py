@@ -0,0 +1,6 @@
+from enum import Enum
+
+class EstadoCorreo(Enum):
+    PENDIENTE = "PENDIENTE"
+    ENVIADO = "ENVIADO"
+    FALLIDO = "FALLIDO"
\ No newline at end of file
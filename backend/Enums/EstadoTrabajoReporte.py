@@ -0,0 +1,7 @@
+from enum import Enum
+
+class EstadoTrabajoReporte(Enum):
+    PENDIENTE = "PENDIENTE"
+    EN_PROCESO = "EN_PROCESO"
+    TERMINADO = "TERMINADO"
+    ERROR = "ERROR"
\ No newline at end of file
@@ -0,0 +1,5 @@
+from enum import Enum
+
+class ResultadoJob(Enum):
+    EXITO = "EXITO"
+    ERROR = "ERROR"
\ No newline at end of file
@@ -0,0 +1,7 @@
+from enum import Enum
+
+class TipoReporte(Enum):
+    MENSUAL_PDF = "MENSUAL_PDF"
+    FACTURACION_EXCEL = "FACTURACION_EXCEL"
+    PAGOS_PENDIENTES_PDF = "PAGOS_PENDIENTES_PDF"
+    HISTORIAL_ARRENDADOR_PDF = "HISTORIAL_ARRENDADOR_PDF"
\ No newline at end of file
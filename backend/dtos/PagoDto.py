@@ -126,4 +126,36 @@ class QuintalesResumenDto(BaseModel):
     """
     arrendatario: str
     cantidad: int
-    quintales: float
\ No newline at end of file
+    quintales: float
+class GeneracionCuotasLoteDto(BaseModel):
+    """
+    DTO para la generación de cuotas de varios arrendamientos.
+    Atributos:
+        arrendamiento_ids (Optional[list[int]]): Arrendamientos a procesar. Si se omite se procesan
+            todos los arrendamientos activos que todavía no tienen cuotas.
+    """
+    arrendamiento_ids: Optional[list[int]] = None
+
+class ResultadoGeneracionCuotasDto(BaseModel):
+    """
+    DTO con el resultado de la generación de cuotas de un arrendamiento.
+    Atributos:
+        arrendamiento_id (int): Identificador del arrendamiento.
+        cuotas_generadas (int): Cantidad de cuotas creadas.
+        error (Optional[str]): Motivo por el que no se generaron las cuotas, si corresponde.
+    """
+    arrendamiento_id: int
+    cuotas_generadas: int
+    error: Optional[str] = None
+
+class PagoPaginaDto(BaseModel):
+    """
+    DTO de salida para una página de pagos.
+    Atributos:
+        items (list[PagoDtoOut]): Pagos de la página.
+        siguiente_cursor (Optional[str]): Cursor para pedir la página siguiente, None si es la última.
+        total (Optional[int]): Total de pagos que cumplen los filtros, None si no se pidió contarlos.
+    """
+    items: list[PagoDtoOut]
+    siguiente_cursor: Optional[str] = None
+    total: Optional[int] = None
@@ -0,0 +1,53 @@
+from datetime import date, datetime
+from typing import Optional
+from pydantic import BaseModel
+from enums.EstadoTrabajoReporte import EstadoTrabajoReporte
+from enums.TipoReporte import TipoReporte
+
+class TrabajoReporteDto(BaseModel):
+    """
+    DTO para solicitar la generación de un reporte en segundo plano.
+    Los reportes mensual, de facturación y de pagos pendientes usan anio y mes;
+    el historial de un arrendador usa arrendador_id, inicio y fin.
+    Atributos:
+        tipo (TipoReporte): Reporte a generar.
+        anio (Optional[int]): Año del reporte.
+        mes (Optional[int]): Mes del reporte.
+        arrendador_id (Optional[int]): Identificador del arrendador del historial.
+        inicio (Optional[date]): Fecha de inicio del historial.
+        fin (Optional[date]): Fecha de fin del historial.
+    """
+    tipo: TipoReporte
+    anio: Optional[int] = None
+    mes: Optional[int] = None
+    arrendador_id: Optional[int] = None
+    inicio: Optional[date] = None
+    fin: Optional[date] = None
+
+class TrabajoReporteDtoOut(BaseModel):
+    """
+    DTO de salida con el estado de un trabajo de generación de reporte.
+    Atributos:
+        id (str): Identificador del trabajo.
+        tipo (TipoReporte): Reporte que se genera.
+        estado (EstadoTrabajoReporte): Estado del trabajo.
+        progreso (int): Porcentaje de secciones del reporte generadas (arrendatarios u hojas), de 0 a 100.
+        posicion_cola (Optional[int]): Trabajos por delante en la cola, si todavía no empezó.
+        creado (datetime): Momento de la solicitud.
+        iniciado (Optional[datetime]): Momento en que empezó la generación.
+        terminado (Optional[datetime]): Momento en que terminó.
+        error (Optional[str]): Detalle del error, si falló.
+    """
+    id: str
+    tipo: TipoReporte
+    estado: EstadoTrabajoReporte
+    progreso: int
+    posicion_cola: Optional[int] = None
+    creado: datetime
+    iniciado: Optional[datetime] = None
+    terminado: Optional[datetime] = None
+    error: Optional[str] = None
+
+    model_config = {
+        "from_attributes": True
+    }
@@ -1,16 +1,22 @@
+import asyncio
+import threading
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Depends, HTTPException, Response
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from dtos.UsuarioDto import UsuarioLogin
 from routers import ArrendadorController, ArrendamientoController, ArrendatarioController, FacturacionController, LocalidadController, PagoController, ParticipacionArrendadorController, PrecioController, ProvinciaController, ReporteController, RetencionController, UsuarioController
-from util.jwtYPasswordHandler import ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token, hash_password, verify_password
-from util.permisosUser import get_current_user
+from util.jwtYPasswordHandler import ACCESS_TOKEN_EXPIRE_MINUTES, PoolHash, create_access_token, verify_and_update_password
+from util.intentosLogin import IntentosLogin
+from util.permisosUser import admin_required, get_current_user
 from dtos.JobUpdateRequest import JobUpdateRequest 
 
 # Importar la configuración de base de datos
-from util.database import create_tables, get_db
+from util.database import create_tables, estado_pools, get_db
+from util.migraciones import aplicar_migraciones
+from util import pdfSecciones
 
 # Importar todos los modelos para que SQLAlchemy los reconozca
 from model.Usuario import Usuario
@@ -21,23 +27,36 @@ from model.Arrendatario import Arrendatario
 from model.Arrendamiento import Arrendamiento
 from model.Pago import Pago
 from model.Precio import Precio
+from model.PrecioPromedioMensual import PrecioPromedioMensual
+from model.VersionDatos import VersionDatos
+from model.CorreoSaliente import CorreoSaliente
+from model.LiderScheduler import LiderScheduler
+from model.EjecucionJob import EjecucionJob
+from model.TrabajoReporte import TrabajoReporte
 from model.Facturacion import Facturacion
 from model.Retencion import Retencion
 from model.ParticipacionArrendador import ParticipacionArrendador
 from model.pago_precio_association import pago_precio_association
 from util.Configuracion import Configuracion
 from util.jobConfiguration import jobConfiguration
+# Registra los eventos que versionan los datos usados por la caché de reportes y los GET condicionales
+from util import versionDatos
 
 # Importación de elementos necesarios para consultar los precios automaticamente a las 11 todos los días
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.schedulers.base import STATE_PAUSED, STATE_RUNNING
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime, timedelta
 import pytz
 from services.PrecioService import PrecioService
 from services.ReporteService import ReporteService
 from services.PagoService import PagoService
 from services.ArrendamientoService import ArrendamientoService
-from util.database import SessionLocal  
+from services.CorreoService import CorreoService
+from services.EjecucionJobService import EjecucionJobService
+from util.database import SessionLocal
+from util.eleccionLider import EleccionLider
 
 #Para sacar un poco de logs que son ruidosos y mas que nada son sentencias de la base de datos
 import logging
@@ -46,8 +65,70 @@ logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
 # Zona horaria de Argentina
 argentina_tz = pytz.timezone("America/Argentina/Buenos_Aires")
 
-# Scheduler
-scheduler = AsyncIOScheduler(timezone=argentina_tz)
+# Scheduler. Arranca pausado en todos los procesos y solo lo reanuda el que tiene la concesión de líder.
+# El margen de misfire solo cubre demoras del líder: al tomar la concesión los jobs se reprograman desde la hora actual.
+scheduler = AsyncIOScheduler(
+    timezone=argentina_tz,
+    job_defaults={"coalesce": True, "misfire_grace_time": EleccionLider.RENOVACION}
+)
+
+def reprogramar_jobs_al_tomar_liderazgo():
+    """
+    Recalcula la próxima ejecución de cada job desde la hora actual antes de reanudar el scheduler.
+    Mientras estuvo pausado conservó las próximas ejecuciones de cuando las calculó, y al reanudarlo APScheduler
+    ejecutaría las que ya pasaron aunque el líder anterior las haya ejecutado. Los jobs programados que vencieron
+    durante el traspaso (a lo sumo la duración de la concesión más una renovación) y no tienen una ejecución
+    registrada desde ese momento se ejecutan de inmediato.
+    """
+    ahora = datetime.now(argentina_tz)
+    traspaso = ahora - timedelta(seconds=EleccionLider.DURACION + EleccionLider.RENOVACION)
+    for job in scheduler.get_jobs():
+        proxima = job.trigger.get_next_fire_time(None, ahora)
+        if isinstance(job.trigger, CronTrigger):
+            vencida = job.trigger.get_next_fire_time(None, traspaso)
+            if vencida is not None and vencida < ahora and not EjecucionJobService.ejecutado_desde(job.id, vencida.astimezone().replace(tzinfo=None)):
+                print(f"Job {job.id} pendiente del traspaso de la concesión ({vencida}): se ejecuta ahora.")
+                proxima = ahora
+        job.modify(next_run_time=proxima)
+
+def pausar_al_vencer():
+    """
+    Pausa el scheduler si la concesión venció sin renovarse. Se programa en el event loop para el momento
+    del vencimiento, así el scheduler se pausa a tiempo aunque la renovación siga bloqueada en la base de datos.
+    """
+    if not EleccionLider.vigente() and scheduler.state == STATE_RUNNING:
+        scheduler.pause()
+        print("⏸️ Scheduler pausado: la concesión venció sin renovarse")
+
+async def mantener_liderazgo():
+    """
+    Renueva periódicamente la concesión del scheduler. El proceso que la obtiene sincroniza los jobs con
+    la configuración de la BD (puede haberse cambiado desde otro proceso) y reanuda el scheduler; el que
+    la pierde, o no puede renovarla, lo pausa. Además, cada concesión obtenida programa la pausa para
+    el momento en que vence.
+    """
+    loop = asyncio.get_running_loop()
+    vencimiento = None
+    while True:
+        try:
+            es_lider = await run_in_threadpool(EleccionLider.renovar)
+            if es_lider:
+                await run_in_threadpool(inicializar_jobs_desde_db)
+        except Exception as e:
+            print(f"Error al renovar la concesión del scheduler: {e}")
+            #Sin renovación confirmada solo se sigue ejecutando mientras la última concesión esté vigente
+            es_lider = EleccionLider.vigente()
+        if es_lider and scheduler.state == STATE_PAUSED:
+            await run_in_threadpool(reprogramar_jobs_al_tomar_liderazgo)
+            scheduler.resume()
+            print("▶️ Scheduler reanudado: este proceso ejecuta los jobs")
+        elif not es_lider and scheduler.state == STATE_RUNNING:
+            scheduler.pause()
+            print("⏸️ Scheduler pausado: los jobs los ejecuta otro proceso")
+        if vencimiento is not None:
+            vencimiento.cancel()
+        vencimiento = loop.call_later(EleccionLider.segundos_restantes(), pausar_al_vencer) if es_lider else None
+        await asyncio.sleep(EleccionLider.RENOVACION)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -57,12 +138,24 @@ async def lifespan(app: FastAPI):
         #Crear las tablas
         create_tables()
         print("✅ Tablas creadas/verificadas exitosamente")
+        #Aplicar las migraciones de esquema pendientes
+        aplicar_migraciones()
+        print("✅ Migraciones aplicadas")
         #Inicializar los jobs desde la BD
         inicializar_jobs_desde_db()
+        #Envío de la bandeja de salida de correos: no es configurable desde la BD
+        scheduler.add_job(
+            func=job_enviar_correos,
+            trigger=IntervalTrigger(seconds=CorreoService.INTERVALO),
+            id="enviar_correos",
+            max_instances=1,
+            coalesce=True
+        )
         print("✅ Jobs inicializados")
-        #Iniciar el scheduler
-        scheduler.start()
-        print("✅ Scheduler iniciado y corriendo")
+        #Iniciar el scheduler pausado: lo reanuda la elección de líder si este proceso obtiene la concesión
+        scheduler.start(paused=True)
+        app.state.liderazgo = asyncio.create_task(mantener_liderazgo())
+        print("✅ Scheduler iniciado, esperando la concesión de líder")
 
     except Exception as e:
         print(f"❌ Error fatal durante el inicio: {e}")  
@@ -70,7 +163,14 @@ async def lifespan(app: FastAPI):
     
     #CÓDIGO DE CIERRE (Shutdown)
     print("🔄 Cerrando aplicación...")
+    liderazgo = getattr(app.state, "liderazgo", None)
+    if liderazgo is not None:
+        liderazgo.cancel()
     scheduler.shutdown()
+    await run_in_threadpool(EleccionLider.liberar)
+    CorreoService.cerrar_conexion()
+    PoolHash.cerrar()
+    pdfSecciones.cerrar()
     print("🛑 Scheduler detenido")
 
 # Crear la aplicación FastAPI con lifespan
@@ -103,110 +203,106 @@ def obtener_funcion_por_id(job_id):
     }
     return funciones.get(job_id)
 
-#Inicializar los jobs cuando se arranca la aplicación
-def inicializar_jobs_desde_db():
-    db = SessionLocal()
-    configs = db.query(jobConfiguration).filter_by(active=True).all()
-    for config in configs:
-        trigger = CronTrigger(
-            day=config.day,
-            hour=config.hour,
-            minute=config.minute
-        )
-        scheduler.add_job(
-            func=obtener_funcion_por_id(config.job_id),
-            trigger=trigger,
-            id=config.job_id
-        )
-        print(f"job arrancado: {config.job_id}")
+#Programación aplicada a cada job configurable: (día, hora, minuto), o None si está inactivo
+jobs_programados: dict[str, tuple | None] = {}
+lock_jobs = threading.Lock()
 
-#Definición de jobs particulares y delegación a servicios correspondientes
-def job_actualizar_precio():
+#Programa un job según su configuración, si cambió desde la última vez
+def programar_job(config: jobConfiguration):
+    programacion = (config.day, config.hour, config.minute) if config.active else None
+    with lock_jobs:
+        if config.job_id in jobs_programados and jobs_programados[config.job_id] == programacion:
+            return
+        if scheduler.get_job(config.job_id):
+            scheduler.remove_job(config.job_id)
+        if programacion:
+            scheduler.add_job(
+                func=obtener_funcion_por_id(config.job_id),
+                trigger=CronTrigger(day=config.day, hour=config.hour, minute=config.minute),
+                id=config.job_id
+            )
+            print(f"job arrancado: {config.job_id}")
+        jobs_programados[config.job_id] = programacion
+
+#Inicializar los jobs cuando se arranca la aplicación. El líder lo repite en cada renovación de la
+#concesión para tomar los cambios de configuración hechos desde otros procesos
+def inicializar_jobs_desde_db():
     db = SessionLocal()
     try:
-        print(f"[{datetime.now()}] Ejecutando job de actualización de precio BCR.")
-        PrecioService.actualizar_precio_bcr(db)
-    except Exception as e:
-        print(f"Error en job BCR: {e}")
+        for config in db.query(jobConfiguration).all():
+            programar_job(config)
     finally:
         db.close()
-        
+
+#Definición de jobs particulares y delegación a servicios correspondientes.
+#Cada ejecución se registra en el historial de jobs con su duración, filas afectadas y resultado
+def pagos_con_precio(resumen: list[dict]) -> int:
+    return sum(g["cantidad_pagos"] for g in resumen if g["error"] is None)
+
+def arrendamientos_actualizados(conteo: dict) -> int:
+    return conteo["finalizados"] + conteo["vencidos"]
+
+def error_envio_correos(conteo: dict) -> str | None:
+    return f"{conteo['fallidos']} envíos fallidos. Último error: {conteo['ultimo_error']}" if conteo["fallidos"] else None
+
+def job_actualizar_precio():
+    EjecucionJobService.ejecutar("precio_diario_bcr", PrecioService.actualizar_precio_bcr, "actualización de precio BCR")
+
 def job_enviar_reporte_pagos():
-    db = SessionLocal()
-    try: 
-        print(f"[{datetime.now()}] Ejecutando job de envío de reporte mensual de pagos pendientes.")
-        ReporteService.enviar_reportes_pagos(db)
-    except Exception as e:
-        print(f"Error en el envío: {e}")
-    finally:
-        db.close()
+    EjecucionJobService.ejecutar("enviar_reportes_pagos_pendientes_mes", ReporteService.enviar_reportes_pagos, "envío de reporte mensual de pagos pendientes")
 
 def job_enviar_reporte_pagos_mes_anterior():
-    db = SessionLocal()
-    try:
-        print(f"[{datetime.now()}] Ejecutando job de envío de reporte mensual de pagos realizados de precio BCR.")
-        ReporteService.enviar_reporte_pagos_mes_anterior(db)
-    except Exception as e:
-        print(f"Error en job BCR: {e}")
-    finally:
-        db.close()
+    EjecucionJobService.ejecutar("enviar_reporte_pagos_mes_anterior", ReporteService.enviar_reporte_pagos_mes_anterior, "envío de reporte mensual de pagos realizados de precio BCR")
 
 def job_actualizar_precios_pagos():
-    db = SessionLocal()
-    try: 
-        print(f"[{datetime.now()}] Ejecutando job de actualización de precios mensual de pagos pendientes.")
-        PagoService.generarPreciosCuotasMensual(db)
-    except Exception as e:
-        print(f"Error en el envío: {e}")
-    finally:
-        db.close()
-        
+    EjecucionJobService.ejecutar("actualizar_precios_pagos_mensuales", PagoService.generarPreciosCuotasMensual, "actualización de precios mensual de pagos pendientes", contar=pagos_con_precio)
+
 def job_actualizar_precios_pagos_10a15():
-    db = SessionLocal()
-    try: 
-        print(f"[{datetime.now()}] Ejecutando job de actualización de pagos pendientes cuyo precio se calcula los dias 16 y se toman los 5 dias anteriores.")
-        PagoService.generarPrecioCuotas10a15(db)
-    except Exception as e:
-        print(f"Error en el envío: {e}")
-    finally:
-        db.close()
+    EjecucionJobService.ejecutar("actualizar_precios_pagos10a15", PagoService.generarPrecioCuotas10a15, "actualización de pagos pendientes cuyo precio se calcula los dias 16 y se toman los 5 dias anteriores", contar=pagos_con_precio)
 
 def job_actualizar_pagos_vencidos():
-    db = SessionLocal()
-    try: 
-        print(f"[{datetime.now()}] Ejecutando job de actualización de pagos que su vencimiento ya pasó.")
-        PagoService.actualizarPagosVencidos(db)
-    except Exception as e:
-        print(f"Error en el envío: {e}")
-    finally:
-        db.close()
+    EjecucionJobService.ejecutar("actualizar_pagos_vencidos", PagoService.actualizarPagosVencidos, "actualización de pagos que su vencimiento ya pasó")
 
 def job_actualizar_arrendamientos_vencidos():
-    db = SessionLocal()
-    try: 
-        print(f"[{datetime.now()}] Ejecutando job de actualización de arrendamientos que su vencimiento ya pasó.")
-        ArrendamientoService.actualizarArrendamientosVencidos(db)
-    except Exception as e:
-        print(f"Error en el envío: {e}")
-    finally:
-        db.close()
-        
-#Ruta de login para usuarios
+    EjecucionJobService.ejecutar("actualizar_arrendamientos_vencidos", ArrendamientoService.actualizarArrendamientosVencidos, "actualización de arrendamientos que su vencimiento ya pasó", contar=arrendamientos_actualizados)
+
+def job_enviar_correos():
+    #Corre cada pocos segundos: solo se registran las ejecuciones que enviaron algún correo o tuvieron envíos fallidos
+    EjecucionJobService.ejecutar(
+        "enviar_correos", CorreoService.enviar_pendientes,
+        contar=lambda conteo: conteo["enviados"], fallo=error_envio_correos, registrar_sin_filas=False
+    )
+
+#Ruta de login para usuarios. Es asíncrona: bcrypt corre en el pool de hash y la consulta en el threadpool,
+#así muchos inicios de sesión simultáneos no ocupan los hilos que atienden el resto de la API
 @app.post("/login", response_model = dict)
-def login(dto: UsuarioLogin, db: Session = Depends(get_db)):
-    usuario = db.query(Usuario).filter(Usuario.cuil == dto.cuil).first()
-    if not usuario or not verify_password(dto.contrasena, usuario.contrasena):
+async def login(dto: UsuarioLogin, request: Request, db: Session = Depends(get_db)):
+    ip = request.client.host if request.client else None
+    IntentosLogin.verificar(dto.cuil, ip)
+    usuario = await run_in_threadpool(lambda: db.query(Usuario).filter(Usuario.cuil == dto.cuil).first())
+    valida, nuevo_hash = (False, None)
+    if usuario:
+        valida, nuevo_hash = await verify_and_update_password(dto.contrasena, usuario.contrasena)
+    if not valida:
+        IntentosLogin.registrar_fallo(dto.cuil, ip)
         raise HTTPException(status_code=401, detail="Cuil o clave inválidas.")
+    IntentosLogin.registrar_exito(dto.cuil)
+    #Se copian antes del commit: después el usuario queda expirado y leerlo haría una consulta en el event loop
+    datos_usuario = {
+        "nombre": usuario.nombre,
+        "apellido": usuario.apellido,
+        "id": usuario.id,
+        "rol": usuario.rol.value,
+    }
+    if nuevo_hash:
+        #El hash usa un costo de bcrypt distinto al configurado: se reemplaza por uno nuevo
+        usuario.contrasena = nuevo_hash
+        await run_in_threadpool(db.commit)
     # Duración del token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     # Creación del token
     access_token = create_access_token(
-        data={
-            "nombre": usuario.nombre,
-            "apellido": usuario.apellido,
-            "id": usuario.id,
-            "rol": usuario.rol.value,
-        },
+        data=datos_usuario,
         expires_delta=access_token_expires,
     )
     #Respuesta con cookie HttpOnly para front y JSON
@@ -214,10 +310,7 @@ def login(dto: UsuarioLogin, db: Session = Depends(get_db)):
             content={
                 "access_token": access_token,
                 "token_type": "bearer",
-                "nombre": usuario.nombre,
-                "apellido": usuario.apellido,
-                "id": usuario.id,
-                "rol": usuario.rol.value,
+                **datos_usuario,
             }
     )
     return response
@@ -241,16 +334,25 @@ def actualizar_job(data: JobUpdateRequest, db: Session = Depends(get_db)):
     job_config.minute = data.minute
     job_config.active = data.active
     db.commit()
-    scheduler.remove_job(data.job_id)
-    if data.active:
-        trigger = CronTrigger(day=data.day, hour=data.hour, minute=data.minute)
-        scheduler.add_job(
-            func=obtener_funcion_por_id(data.job_id),
-            trigger=trigger,
-            id=data.job_id
-        )
+    #Si este proceso no es el líder, el líder toma el cambio en su próxima renovación de la concesión
+    programar_job(job_config)
     return {"mensaje": f"Job '{data.job_id}' actualizado y en funcionamiento."}
 
+#Ruta para ver el estado de los pools de conexiones a la base de datos
+@app.get("/metricas/pool", dependencies=[Depends(admin_required)])
+def metricas_pool():
+    return estado_pools()
+
+#Ruta para ver el estado del pool de procesos que verifica las contraseñas
+@app.get("/metricas/hash", dependencies=[Depends(admin_required)])
+def metricas_hash():
+    return PoolHash.estado()
+
+#Ruta para ver qué proceso ejecuta los jobs programados
+@app.get("/metricas/scheduler", dependencies=[Depends(admin_required)])
+def metricas_scheduler():
+    return {**EleccionLider.estado(), "scheduler_activo": scheduler.state == STATE_RUNNING}
+
 @app.get("/job-config/{job_id}", dependencies=[Depends(get_current_user)])
 def get_job_config(job_id: str, db: Session = Depends(get_db)):
     job_config = db.query(jobConfiguration).filter_by(job_id=job_id).first()
@@ -264,6 +366,12 @@ def get_job_config(job_id: str, db: Session = Depends(get_db)):
         "active": job_config.active,
     }
 
+#Ruta para ver el historial de ejecuciones de un job, con percentiles de duración de las últimas
+#ejecuciones y de las anteriores para detectar si se está volviendo más lento
+@app.get("/job-ejecuciones/{job_id}", dependencies=[Depends(admin_required)])
+def get_job_ejecuciones(job_id: str, ultimas: int = Query(100, ge=1, le=1000), detalle: int = Query(20, ge=0, le=200), db: Session = Depends(get_db)):
+    return EjecucionJobService.estadisticas(db, job_id, ultimas, detalle)
+
 # Registro de las diferentes rutas
 app.include_router(ReporteController.router, prefix="/reportes", tags=["Reportes"], dependencies=[Depends(get_current_user)])
 app.include_router(ArrendadorController.router, prefix="/arrendadores", tags=["Arrendadores"], dependencies=[Depends(get_current_user)])
@@ -0,0 +1,43 @@
+from datetime import datetime
+from sqlalchemy import DateTime, Enum, Index, Integer, LargeBinary, String, Text
+from sqlalchemy.dialects.mysql import LONGBLOB
+from sqlalchemy.orm import Mapped, mapped_column
+from enums.EstadoCorreo import EstadoCorreo
+from util.database import Base
+
+class CorreoSaliente(Base):
+    """
+    Modelo de base de datos que representa un correo en la bandeja de salida.
+    Los jobs encolan los correos y el job de envío los manda, reintentando los que fallan.
+    Atributos:
+        id (int): Clave primaria.
+        destinatarios (str): Direcciones de los destinatarios, separadas por coma.
+        asunto (str): Asunto del correo.
+        cuerpo (str): Cuerpo en texto plano.
+        adjunto (bytes): Contenido del archivo adjunto, si tiene.
+        adjunto_nombre (str): Nombre del archivo adjunto.
+        estado (EstadoCorreo): Estado del envío.
+        intentos (int): Intentos de envío fallidos.
+        proximo_intento (datetime): Momento a partir del cual se puede intentar el envío.
+        ultimo_error (str): Detalle del último error de envío.
+        creado (datetime): Momento en que se encoló.
+        enviado (datetime): Momento en que se envió.
+    """
+    __tablename__ = "correo_saliente"
+    __table_args__ = (
+        Index("ix_correo_saliente_estado_proximo", "estado", "proximo_intento"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    destinatarios: Mapped[str] = mapped_column(Text, nullable=False)
+    asunto: Mapped[str] = mapped_column(String(255), nullable=False)
+    cuerpo: Mapped[str] = mapped_column(Text, nullable=False)
+    # En MySQL, LargeBinary es BLOB (64 KB) y los reportes PDF pesan varios MB
+    adjunto: Mapped[bytes] = mapped_column(LargeBinary().with_variant(LONGBLOB, "mysql"), nullable=True)
+    adjunto_nombre: Mapped[str] = mapped_column(String(255), nullable=True)
+    estado: Mapped[EstadoCorreo] = mapped_column(Enum(EstadoCorreo), nullable=False, default=EstadoCorreo.PENDIENTE)
+    intentos: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    proximo_intento: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+    ultimo_error: Mapped[str] = mapped_column(String(500), nullable=True)
+    creado: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+    enviado: Mapped[datetime] = mapped_column(DateTime, nullable=True)
@@ -0,0 +1,34 @@
+from datetime import datetime
+from sqlalchemy import DateTime, Enum, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from enums.ResultadoJob import ResultadoJob
+from util.database import Base
+
+class EjecucionJob(Base):
+    """
+    Modelo de base de datos que registra cada ejecución de un job programado.
+    Atributos:
+        id (int): Clave primaria.
+        job_id (str): Identificador del job.
+        instancia (str): Proceso que ejecutó el job.
+        inicio (datetime): Momento en que empezó.
+        fin (datetime): Momento en que terminó.
+        duracion_ms (int): Duración, en milisegundos.
+        filas (int): Filas afectadas, si el job las informa.
+        resultado (ResultadoJob): Si terminó bien o con error.
+        error (str): Detalle del error.
+    """
+    __tablename__ = "ejecucion_job"
+    __table_args__ = (
+        Index("ix_ejecucion_job_job_inicio", "job_id", "inicio"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    job_id: Mapped[str] = mapped_column(String(50), nullable=False)
+    instancia: Mapped[str] = mapped_column(String(255), nullable=True)
+    inicio: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    fin: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    duracion_ms: Mapped[int] = mapped_column(Integer, nullable=False)
+    filas: Mapped[int] = mapped_column(Integer, nullable=True)
+    resultado: Mapped[ResultadoJob] = mapped_column(Enum(ResultadoJob), nullable=False)
+    error: Mapped[str] = mapped_column(String(1000), nullable=True)
@@ -0,0 +1,22 @@
+from datetime import datetime
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+from util.database import Base
+
+class LiderScheduler(Base):
+    """
+    Modelo de base de datos con la concesión (lease) del rol de líder de un scheduler.
+    Cuando la API corre con varios procesos, solo el que tiene la concesión vigente ejecuta los jobs;
+    la renueva periódicamente y, si deja de hacerlo, otro proceso la toma al vencer.
+    Atributos:
+        nombre (str): Nombre del scheduler.
+        instancia (str): Identificador del proceso que tiene la concesión.
+        vence (datetime): Momento en que vence la concesión si no se renueva.
+        renovado (datetime): Última renovación.
+    """
+    __tablename__ = "lider_scheduler"
+
+    nombre: Mapped[str] = mapped_column(String(50), primary_key=True)
+    instancia: Mapped[str] = mapped_column(String(255), nullable=False)
+    vence: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    renovado: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
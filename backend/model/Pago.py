@@ -1,6 +1,6 @@
 from datetime import date
 from decimal import Decimal
-from sqlalchemy import Date, Enum, ForeignKey, Numeric
+from sqlalchemy import Date, Enum, ForeignKey, Index, Numeric
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from model.pago_precio_association import pago_precio_association
 from model.ParticipacionArrendador import ParticipacionArrendador
@@ -31,6 +31,11 @@ class Pago(Base):
         precios (list[Precio]): Lista de precios asociados al pago para calcuular el promedio.
     """
     __tablename__ = "pago"
+    __table_args__ = (
+        Index("ix_pago_vencimiento_estado", "vencimiento", "estado"),
+        Index("ix_pago_estado_vencimiento", "estado", "vencimiento"),
+        Index("ix_pago_participacion_vencimiento", "participacion_arrendador_id", "vencimiento"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     estado: Mapped[EstadoPago] = mapped_column(Enum(EstadoPago), nullable=False, default=EstadoPago.PENDIENTE)
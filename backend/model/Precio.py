@@ -1,6 +1,6 @@
 from datetime import date
 from decimal import Decimal
-from sqlalchemy import Date, Enum, ForeignKey, Numeric, UniqueConstraint
+from sqlalchemy import Date, Enum, ForeignKey, Index, Numeric, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from model.pago_precio_association import pago_precio_association
 from util.database import Base
@@ -19,6 +19,7 @@ class Precio(Base):
     __tablename__ = "precio"
     __table_args__ = (
         UniqueConstraint("fecha_precio", "origen", name="uq_fecha_origen"),
+        Index("ix_precio_origen_fecha", "origen", "fecha_precio"),
     )
 
     id:  Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
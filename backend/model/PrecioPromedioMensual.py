@@ -0,0 +1,35 @@
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import JSON, DateTime, Enum, Integer, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+from enums.TipoDiasPromedio import TipoDiasPromedio
+from enums.TipoOrigenPrecio import TipoOrigenPrecio
+from util.database import Base
+
+class PrecioPromedioMensual(Base):
+    """
+    Modelo de base de datos con el promedio precalculado de cada ventana de precios.
+    Hay una fila por origen, mes de referencia y forma de cálculo (`TipoDiasPromedio`),
+    y se mantiene actualizada desde PrecioService cada vez que se crea, modifica o elimina un precio.
+    Atributos:
+        origen (TipoOrigenPrecio): Fuente de los precios.
+        anio (int): Año del mes de referencia.
+        mes (int): Mes de referencia.
+        tipo (TipoDiasPromedio): Forma de cálculo del promedio.
+        suma (Decimal): Suma de los precios de la ventana.
+        cantidad (int): Cantidad de precios de la ventana.
+        promedio (Decimal): Promedio redondeado a dos decimales.
+        precio_ids (list[int]): Identificadores de los precios que forman la ventana.
+        actualizado (datetime): Momento del último recálculo.
+    """
+    __tablename__ = "precio_promedio_mensual"
+
+    origen: Mapped[TipoOrigenPrecio] = mapped_column(Enum(TipoOrigenPrecio), primary_key=True)
+    anio: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    mes: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    tipo: Mapped[TipoDiasPromedio] = mapped_column(Enum(TipoDiasPromedio), primary_key=True)
+    suma: Mapped[Decimal] = mapped_column(Numeric(16, 2), nullable=False)
+    cantidad: Mapped[int] = mapped_column(Integer, nullable=False)
+    promedio: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
+    precio_ids: Mapped[list] = mapped_column(JSON, nullable=False)
+    actualizado: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
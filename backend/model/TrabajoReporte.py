@@ -0,0 +1,47 @@
+from datetime import datetime
+from sqlalchemy import DateTime, Enum, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from enums.EstadoTrabajoReporte import EstadoTrabajoReporte
+from enums.TipoReporte import TipoReporte
+from util.database import Base
+
+class TrabajoReporte(Base):
+    """
+    Modelo de base de datos de un trabajo de generación de reporte en segundo plano.
+    Al estar en la base de datos, cualquier proceso de la API puede consultar el estado de un trabajo
+    encolado por otro; el archivo generado se guarda en el directorio compartido de trabajos.
+    Atributos:
+        id (str): Identificador del trabajo.
+        tipo (TipoReporte): Reporte que se genera.
+        parametros (str): Parámetros del reporte, en JSON.
+        clave_en_curso (str): Hash del tipo y los parámetros mientras el trabajo está pendiente o en proceso,
+            único para unificar solicitudes idénticas; vuelve a NULL al terminar.
+        estado (EstadoTrabajoReporte): Estado del trabajo.
+        progreso (int): Porcentaje de secciones del reporte generadas, de 0 a 100.
+        instancia (str): Proceso que genera el reporte.
+        creado (datetime): Momento de la solicitud.
+        iniciado (datetime): Momento en que empezó la generación.
+        terminado (datetime): Momento en que terminó.
+        actualizado (datetime): Última señal de vida del proceso que genera el reporte.
+        error (str): Detalle del error, si falló.
+        codigo_error (int): Código HTTP del error, si falló.
+    """
+    __tablename__ = "trabajo_reporte"
+    __table_args__ = (
+        Index("ix_trabajo_reporte_estado_creado", "estado", "creado"),
+        Index("ix_trabajo_reporte_terminado", "terminado"),
+    )
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    tipo: Mapped[TipoReporte] = mapped_column(Enum(TipoReporte), nullable=False)
+    parametros: Mapped[str] = mapped_column(String(500), nullable=False)
+    clave_en_curso: Mapped[str] = mapped_column(String(64), nullable=True, unique=True)
+    estado: Mapped[EstadoTrabajoReporte] = mapped_column(Enum(EstadoTrabajoReporte), nullable=False)
+    progreso: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    instancia: Mapped[str] = mapped_column(String(255), nullable=False)
+    creado: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    iniciado: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    terminado: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    actualizado: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    error: Mapped[str] = mapped_column(String(500), nullable=True)
+    codigo_error: Mapped[int] = mapped_column(Integer, nullable=True)
@@ -0,0 +1,26 @@
+from datetime import datetime
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from util.database import Base
+
+class VersionDatos(Base):
+    """
+    Modelo de base de datos con la versión de los datos de una tabla en un mes.
+    Se incrementa en la misma transacción que cada escritura sobre las tablas que usan los reportes,
+    y la caché de reportes la usa para saber si un archivo generado sigue vigente.
+    La fila con anio y mes en 0 es la versión de toda la tabla (tablas maestras y escrituras masivas);
+    la de las tablas maestras es también la que usan los ETag de la API.
+    Atributos:
+        tabla (str): Nombre de la tabla versionada.
+        anio (int): Año de los datos, o 0 para toda la tabla.
+        mes (int): Mes de los datos, o 0 para toda la tabla.
+        version (int): Cantidad de escrituras registradas.
+        modificada (datetime): Momento UTC de la última escritura, sin zona horaria.
+    """
+    __tablename__ = "version_datos"
+
+    tabla: Mapped[str] = mapped_column(String(50), primary_key=True)
+    anio: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    mes: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    modificada: Mapped[datetime] = mapped_column(DateTime, nullable=True)
@@ -1,35 +1,38 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 from model.Usuario import Usuario
 from util.permisosUser import canEditDelete
 from util.database import get_db
+from util import respuestaCondicional
 from dtos.ArrendadorDto import ArrendadorDto, ArrendadorDtoOut, ArrendadorDtoModificacion
 from services.ArrendadorService import ArrendadorService
 
 router = APIRouter()
 
 @router.get("", response_model=list[ArrendadorDtoOut], description="Obtención de todos los arrrendadores.")
-def listar_arrendadores(db: Session = Depends(get_db)):
+def listar_arrendadores(request: Request, db: Session = Depends(get_db)):
     """
     Endpoint para listar todos los arrendadores existentes en la base de datos.
     Args:
+        request (Request): La petición HTTP, con los encabezados condicionales.
         db (Session): La sesión de la base de datos.
     Returns:
         list[ArrendadorDtoOut]: Una lista de todos los arrendadores.
     """
-    return ArrendadorService.listar_todos(db)
+    return respuestaCondicional.respuesta_condicional(request, db, respuestaCondicional.ARRENDADORES, lambda: ArrendadorService.listar_todos(db), ArrendadorDtoOut)
 
 @router.get("/{arrendador_id}", response_model=ArrendadorDtoOut, description="Obtención de un arrendador por id.")
-def obtener_arrendador(arrendador_id: int, db: Session = Depends(get_db)):
+def obtener_arrendador(request: Request, arrendador_id: int, db: Session = Depends(get_db)):
     """
     Endpoint para obtener un arrendador específico por su ID.
     Args:
+        request (Request): La petición HTTP, con los encabezados condicionales.
         arrendador_id (int): El ID del arrendador a buscar.
         db (Session): La sesión de la base de datos.
     Returns:
         ArrendadorDtoOut: El arrendador encontrado.
     """
-    return ArrendadorService.obtener_por_id(db, arrendador_id)
+    return respuestaCondicional.respuesta_condicional(request, db, respuestaCondicional.ARRENDADORES, lambda: ArrendadorService.obtener_por_id(db, arrendador_id), ArrendadorDtoOut)
 
 @router.post("", response_model=ArrendadorDtoOut, description="Creación de un arrendador.")
 def crear_arrendador(dto: ArrendadorDto, db: Session = Depends(get_db), current_user: Usuario = Depends(canEditDelete)):
@@ -1,23 +1,31 @@
-from fastapi import APIRouter, Depends
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 from model.Usuario import Usuario
 from dtos.ParticipacionArrendadorDto import ParticipacionArrendadorDtoOut
 from util.permisosUser import canEditDelete
 from util.database import get_db
+from util.streaming import pide_ndjson, respuesta_ndjson
 from dtos.ArrendamientoDto import ArrendamientoDto, ArrendamientoDtoOut, ArrendamientoDtoModificacion
 from services.ArrendamientoService import ArrendamientoService
 
 router = APIRouter()
 
 @router.get("", response_model=list[ArrendamientoDtoOut], description="Obtención de todos los arrendamientos.")
-def listar_arrendamientos(db: Session = Depends(get_db)):
+def listar_arrendamientos(request: Request, formato: Optional[Literal["json", "ndjson"]] = None, db: Session = Depends(get_db)):
     """
     Endpoint para listar todos los arrendamientos.
+    Con `formato=ndjson` o `Accept: application/x-ndjson` la respuesta se transmite en NDJSON,
+    una fila por línea a medida que se lee de la base de datos.
     Args:
+        request (Request): La petición HTTP.
+        formato (Optional[str]): "json" (por defecto) o "ndjson".
         db (Session): La sesión de la base de datos.
     Returns:
-        list[ArrendamientoDtoOut]: Una lista de todos los arrendamientos.
+        list[ArrendamientoDtoOut] | StreamingResponse: Una lista de todos los arrendamientos.
     """
+    if pide_ndjson(request, formato):
+        return respuesta_ndjson(ArrendamientoService.listar_todos_streaming())
     return ArrendamientoService.listar_todos(db)
 
 @router.get("/activos", response_model=list[ArrendamientoDtoOut], description="Obtención de todos los arrendamientos activos.")
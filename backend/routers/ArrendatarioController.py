@@ -1,35 +1,38 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 from model.Usuario import Usuario
 from util.permisosUser import canEditDelete
 from util.database import get_db
+from util import respuestaCondicional
 from dtos.ArrendatarioDto import ArrendatarioDto, ArrendatarioDtoOut, ArrendatarioDtoModificacion
 from services.ArrendatarioService import ArrendatarioService
 
 router = APIRouter()
 
 @router.get("", response_model=list[ArrendatarioDtoOut], description="Obtención de todos los arrendatarios.")
-def listar_arrendatarios(db: Session = Depends(get_db)):
+def listar_arrendatarios(request: Request, db: Session = Depends(get_db)):
     """
     Endpoint para listar todos los arrendatarios.
     Args:
+        request (Request): La petición HTTP, con los encabezados condicionales.
         db (Session): La sesión de la base de datos.
     Returns:
         list[ArrendatarioDtoOut]: Una lista de todos los arrendatarios.
     """
-    return ArrendatarioService.listar_todos(db)
+    return respuestaCondicional.respuesta_condicional(request, db, respuestaCondicional.ARRENDATARIOS, lambda: ArrendatarioService.listar_todos(db), ArrendatarioDtoOut)
 
 @router.get("/{arrendatario_id}", response_model=ArrendatarioDtoOut, description="Obtención de un arrendatario por id.")
-def obtener_arrendatario(arrendatario_id: int, db: Session = Depends(get_db)):
+def obtener_arrendatario(request: Request, arrendatario_id: int, db: Session = Depends(get_db)):
     """
     Endpoint para obtener un arrendatario específico por su ID.
     Args:
+        request (Request): La petición HTTP, con los encabezados condicionales.
         arrendatario_id (int): El ID del arrendatario a buscar.
         db (Session): La sesión de la base de datos.
     Returns:
         ArrendatarioDtoOut: El arrendatario encontrado.
     """
-    return ArrendatarioService.obtener_por_id(db, arrendatario_id)
+    return respuestaCondicional.respuesta_condicional(request, db, respuestaCondicional.ARRENDATARIOS, lambda: ArrendatarioService.obtener_por_id(db, arrendatario_id), ArrendatarioDtoOut)
 
 @router.post("", response_model=ArrendatarioDtoOut, description="Creación de un arrendatario.")
 def crear_arrendatario(dto: ArrendatarioDto, db: Session = Depends(get_db) , current_user: Usuario = Depends(canEditDelete)):
@@ -1,22 +1,30 @@
-from fastapi import APIRouter, Depends
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 from model.Usuario import Usuario
 from util.permisosUser import canEditDelete
 from util.database import get_db
+from util.streaming import pide_ndjson, respuesta_ndjson
 from dtos.FacturacionDto import  FacturacionDtoOut, FacturacionDtoModificacion
 from services.FacturacionService import FacturacionService
 
 router = APIRouter()
 
 @router.get("", response_model=list[FacturacionDtoOut], description="Obtención de todas las facturación.")
-def listar_facturaciones(db: Session = Depends(get_db)):
+def listar_facturaciones(request: Request, formato: Optional[Literal["json", "ndjson"]] = None, db: Session = Depends(get_db)):
     """
     Endpoint para listar todas las facturaciones.
+    Con `formato=ndjson` o `Accept: application/x-ndjson` la respuesta se transmite en NDJSON,
+    una fila por línea a medida que se lee de la base de datos.
     Args:
+        request (Request): La petición HTTP.
+        formato (Optional[str]): "json" (por defecto) o "ndjson".
         db (Session): La sesión de la base de datos.
     Returns:
-        list[FacturacionDtoOut]: Una lista de todas las facturaciones.
+        list[FacturacionDtoOut] | StreamingResponse: Una lista de todas las facturaciones.
     """
+    if pide_ndjson(request, formato):
+        return respuesta_ndjson(FacturacionService.listar_todos_streaming())
     return FacturacionService.listar_todos(db)
 
 @router.get("/{facturacion_id}", response_model=FacturacionDtoOut, description="Obtención de una facturación por id.")
@@ -1,35 +1,38 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 from model.Usuario import Usuario
 from util.permisosUser import canEditDelete
 from util.database import get_db
+from util import respuestaCondicional
 from dtos.LocalidadDto import LocalidadDto, LocalidadDtoOut, LocalidadDtoModificacion
 from services.UbicacionService import UbicacionService
 
 router = APIRouter()
 
 @router.get("", response_model=list[LocalidadDtoOut], description="Obtención de todas las localidades.")
-def listar_localidades(db: Session = Depends(get_db)):
+def listar_localidades(request: Request, db: Session = Depends(get_db)):
     """
     Endpoint para listar todas las localidades.
     Args:
+        request (Request): La petición HTTP, con los encabezados condicionales.
         db (Session): La sesión de la base de datos.
     Returns:
         list[LocalidadDtoOut]: Una lista de todas las localidades.
     """
-    return UbicacionService.listar_localidades(db)
+    return respuestaCondicional.respuesta_condicional(request, db, respuestaCondicional.LOCALIDADES, lambda: UbicacionService.listar_localidades(db), LocalidadDtoOut)
 
 @router.get("/{localidad_id}", response_model=LocalidadDtoOut, description="Obtención de una localidad por id.")
-def obtener_localidad(localidad_id: int, db: Session = Depends(get_db)):
+def obtener_localidad(request: Request, localidad_id: int, db: Session = Depends(get_db)):
     """
     Endpoint para obtener una localidad específica por su ID.
     Args:
+        request (Request): La petición HTTP, con los encabezados condicionales.
         localidad_id (int): El ID de la localidad a buscar.
         db (Session): La sesión de la base de datos.
     Returns:
         LocalidadDtoOut: La localidad encontrada.
     """
-    return UbicacionService.obtener_localidad_por_id(db, localidad_id)
+    return respuestaCondicional.respuesta_condicional(request, db, respuestaCondicional.LOCALIDADES, lambda: UbicacionService.obtener_localidad_por_id(db, localidad_id), LocalidadDtoOut)
 
 @router.post("", response_model=LocalidadDtoOut, description="Creación de una localidad.")
 def crear_localidad(dto: LocalidadDto, db: Session = Depends(get_db), current_user: Usuario = Depends(canEditDelete)):
@@ -1,10 +1,14 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from model.Usuario import Usuario
 from util.permisosUser import canEditDelete
 from util.database import get_db
-from dtos.PagoDto import PagoDto, PagoDtoOut, PagoDtoModificacion, PagoFechaEstado, PagoResumenDto, QuintalesResumenDto
+from util.streaming import respuesta_ndjson
+from dtos.PagoDto import GeneracionCuotasLoteDto, PagoDto, PagoDtoOut, PagoDtoModificacion, PagoFechaEstado, PagoPaginaDto, PagoResumenDto, QuintalesResumenDto, ResultadoGeneracionCuotasDto
+from enums.EstadoPago import EstadoPago
+from enums.TipoOrigenPrecio import TipoOrigenPrecio
 from services.PagoService import PagoService
 
 router = APIRouter()
@@ -64,6 +68,59 @@ def obtener_vencimientos_mes(mes: int, anio: int, db: Session = Depends(get_db))
         # Solo si es otro tipo de error (por ejemplo, ValueError o bug interno)
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("/previsualizar-precios", description="Previsualización en NDJSON del precio y monto que se asignaría a las cuotas pendientes de un mes, sin modificar datos.")
+def previsualizar_precios_mes(mes: int = Query(..., ge=1, le=12), anio: int = Query(..., ge=2000), db: Session = Depends(get_db)):
+    """
+    Endpoint de solo lectura que calcula el precio promedio y el monto a pagar proyectados
+    para todas las cuotas pendientes sin precio de un mes. La respuesta se transmite en formato
+    NDJSON (una cuota por línea) y el encabezado X-Total-Pagos indica la cantidad de cuotas.
+    Args:
+        mes (int): Mes de vencimiento de las cuotas.
+        anio (int): Año de vencimiento de las cuotas.
+        db (Session): La sesión de la base de datos.
+    Returns:
+        StreamingResponse: La previsualización de cada cuota.
+    """
+    total, filas = PagoService.previsualizarPreciosMes(db, anio, mes)
+    return respuesta_ndjson(filas, headers={"X-Total-Pagos": str(total)})
+
+@router.get("/paginado", response_model=PagoPaginaDto, description="Obtención paginada y filtrada de pagos, ordenados por vencimiento.")
+def listar_pagos_paginado(
+    limite: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    orden: Literal["asc", "desc"] = "asc",
+    estado: Optional[EstadoPago] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    arrendatario_id: Optional[int] = None,
+    arrendador_id: Optional[int] = None,
+    fuente_precio: Optional[TipoOrigenPrecio] = None,
+    contar: bool = True,
+    db: Session = Depends(get_db)
+):
+    """
+    Endpoint para recorrer los pagos por páginas. Para obtener la página siguiente se envía
+    el `siguiente_cursor` de la respuesta anterior junto con los mismos filtros y orden.
+    Args:
+        limite (int): Cantidad máxima de pagos por página (1 a 500).
+        cursor (Optional[str]): Cursor de la página anterior.
+        orden (str): "asc" o "desc" por vencimiento.
+        estado (Optional[EstadoPago]): Filtra por estado.
+        desde (Optional[date]): Vencimiento mínimo (inclusive).
+        hasta (Optional[date]): Vencimiento máximo (inclusive).
+        arrendatario_id (Optional[int]): Filtra por arrendatario.
+        arrendador_id (Optional[int]): Filtra por arrendador.
+        fuente_precio (Optional[TipoOrigenPrecio]): Filtra por fuente de precio.
+        contar (bool): Si es False no se calcula el total, lo que abarata cada página.
+        db (Session): La sesión de la base de datos.
+    Returns:
+        PagoPaginaDto: Los pagos de la página, el cursor siguiente y el total.
+    """
+    return PagoService.listar_paginado(
+        db, limite=limite, cursor=cursor, descendente=orden == "desc", estado=estado, desde=desde, hasta=hasta,
+        arrendatario_id=arrendatario_id, arrendador_id=arrendador_id, fuente_precio=fuente_precio, contar=contar
+    )
+
 @router.get("", response_model=list[PagoDtoOut], description="Obtención de todos los pagos.")
 def listar_pagos(db: Session = Depends(get_db)):
     """
@@ -142,6 +199,34 @@ def crear_pago(arrendamiento_id: int, db: Session = Depends(get_db), current_use
     """
     return  PagoService.generarCuotas(db, arrendamiento_id)
 
+@router.post("/generar-lote", response_model=List[ResultadoGeneracionCuotasDto], description="Creación de los pagos de varios arrendamientos, o de todos los activos sin cuotas.")
+def generar_cuotas_lote(dto: GeneracionCuotasLoteDto, db: Session = Depends(get_db), current_user: Usuario = Depends(canEditDelete)):
+    """
+    Endpoint para generar las cuotas de pago de varios arrendamientos en una sola operación.
+    Un contrato con errores no impide generar las cuotas del resto. Requiere permisos de edición.
+    Args:
+        dto (GeneracionCuotasLoteDto): Los arrendamientos a procesar.
+        db (Session): La sesión de la base de datos.
+        current_user (Usuario): El usuario autenticado con permisos.
+    Returns:
+        List[ResultadoGeneracionCuotasDto]: El resultado de cada arrendamiento.
+    """
+    return PagoService.generarCuotasLote(db, dto.arrendamiento_ids)
+
+@router.post("/actualizar-vencidos", description="Marca como vencidos los pagos pendientes cuyo vencimiento ya pasó.")
+def actualizar_pagos_vencidos(dias_atras: Optional[int] = Query(None, ge=1), db: Session = Depends(get_db), current_user: Usuario = Depends(canEditDelete)):
+    """
+    Endpoint para poner al día el estado de los pagos vencidos sin esperar al job diario.
+    Requiere permisos de edición.
+    Args:
+        dias_atras (Optional[int]): Si se indica, solo se consideran los vencimientos de los últimos días indicados.
+        db (Session): La sesión de la base de datos.
+        current_user (Usuario): El usuario autenticado con permisos.
+    Returns:
+        dict: La cantidad de pagos marcados como vencidos.
+    """
+    return {"pagos_vencidos": PagoService.actualizarPagosVencidos(db, dias_atras)}
+
 @router.put("/precio/{pago_id}", response_model=PagoDtoOut, description="Modificación del precio de un pago por id.")
 def actualizar_precio_pago(pago_id: int, db: Session = Depends(get_db), current_user: Usuario = Depends(canEditDelete)):
     """
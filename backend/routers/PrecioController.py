@@ -1,22 +1,30 @@
+from typing import Literal, Optional
 from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 from model.Usuario import Usuario
 from util.permisosUser import canEditDelete, get_current_user
 from util.database import get_db
+from util.streaming import pide_ndjson, respuesta_ndjson
 from dtos.PrecioDto import PrecioDto, PrecioDtoOut, PrecioDtoModificacion
 from services.PrecioService import PrecioService
 
 router = APIRouter()
 
 @router.get("", response_model=list[PrecioDtoOut], description="Obtención de todos los precios.", dependencies=[Depends(get_current_user)])
-def listar_precios(db: Session = Depends(get_db)):
+def listar_precios(request: Request, formato: Optional[Literal["json", "ndjson"]] = None, db: Session = Depends(get_db)):
     """
     Endpoint para listar todos los precios almacenados en la base de datos.
+    Con `formato=ndjson` o `Accept: application/x-ndjson` la respuesta se transmite en NDJSON,
+    una fila por línea a medida que se lee de la base de datos.
     Args:
+        request (Request): La petición HTTP.
+        formato (Optional[str]): "json" (por defecto) o "ndjson".
         db (Session): La sesión de la base de datos.
     Returns:
-        list[PrecioDtoOut]: Una lista de todos los precios.
+        list[PrecioDtoOut] | StreamingResponse: Una lista de todos los precios.
     """
+    if pide_ndjson(request, formato):
+        return respuesta_ndjson(PrecioService.listar_precios_streaming())
     return PrecioService.listar_precios(db)
 
 @router.get("/AGD", response_model=list[PrecioDtoOut], description="Obtención de todos los precios de AGD.", dependencies=[Depends(get_current_user)])
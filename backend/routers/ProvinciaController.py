@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 from model.Usuario import Usuario
 from util.permisosUser import canEditDelete
 from util.database import get_db
+from util import respuestaCondicional
 from dtos.LocalidadDto import LocalidadDtoOut
 from dtos.ProvinciaDto import ProvinciaDto, ProvinciaDtoOut, ProvinciaDtoModificacion
 from services.UbicacionService import UbicacionService
@@ -10,39 +11,42 @@ from services.UbicacionService import UbicacionService
 router = APIRouter()
 
 @router.get("", response_model=list[ProvinciaDtoOut], description="Obtención de todas las provincias.")
-def listar_provincias(db: Session = Depends(get_db)):
+def listar_provincias(request: Request, db: Session = Depends(get_db)):
     """
     Endpoint para listar todas las provincias.
     Args:
+        request (Request): La petición HTTP, con los encabezados condicionales.
         db (Session): La sesión de la base de datos.
     Returns:
         list[ProvinciaDtoOut]: Una lista de todas las provincias.
     """
-    return UbicacionService.listar_provincias(db)
+    return respuestaCondicional.respuesta_condicional(request, db, respuestaCondicional.PROVINCIAS, lambda: UbicacionService.listar_provincias(db), ProvinciaDtoOut)
 
 @router.get("/{provincia_id}/localidades", response_model=list[LocalidadDtoOut], description="Obtención de las localidades por el id de una provincia.")
-def obtener_provincia(provincia_id: int, db: Session = Depends(get_db)):
+def obtener_provincia(request: Request, provincia_id: int, db: Session = Depends(get_db)):
     """
     Endpoint para obtener todas las localidades de una provincia específica.
     Args:
+        request (Request): La petición HTTP, con los encabezados condicionales.
         provincia_id (int): El ID de la provincia.
         db (Session): La sesión de la base de datos.
     Returns:
         list[LocalidadDtoOut]: Lista de localidades de la provincia.
     """
-    return UbicacionService.obtener_localidades_provincia(db, provincia_id)
+    return respuestaCondicional.respuesta_condicional(request, db, respuestaCondicional.LOCALIDADES, lambda: UbicacionService.obtener_localidades_provincia(db, provincia_id), LocalidadDtoOut)
 
 @router.get("/{provincia_id}", response_model=ProvinciaDtoOut, description="Obtención de una provincia por id.")
-def obtener_provincia(provincia_id: int, db: Session = Depends(get_db)):
+def obtener_provincia(request: Request, provincia_id: int, db: Session = Depends(get_db)):
     """
     Endpoint para obtener una provincia específica por su ID.
     Args:
+        request (Request): La petición HTTP, con los encabezados condicionales.
         provincia_id (int): El ID de la provincia a buscar.
         db (Session): La sesión de la base de datos.
     Returns:
         ProvinciaDtoOut: La provincia encontrada.
     """
-    return UbicacionService.obtener_provincia_por_id(db, provincia_id)
+    return respuestaCondicional.respuesta_condicional(request, db, respuestaCondicional.PROVINCIAS, lambda: UbicacionService.obtener_provincia_por_id(db, provincia_id), ProvinciaDtoOut)
 
 @router.post("", response_model=ProvinciaDtoOut, description="Creación de una provincia.")
 def crear_provincia(dto: ProvinciaDto, db: Session = Depends(get_db), current_user: Usuario = Depends(canEditDelete)):
@@ -1,14 +1,30 @@
 from datetime import date
-from fastapi import Depends, APIRouter
-from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
+from fastapi import Depends, APIRouter, Query
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from enums.EstadoPago import EstadoPago
 from model.Usuario import Usuario
 from util.permisosUser import canEditDelete
 from util.database import get_db
+from util.streaming import MEDIA_TYPE_NDJSON, bloques_archivo
+from dtos.ReporteDto import TrabajoReporteDto, TrabajoReporteDtoOut
+from services.ExportacionService import ExportacionService
 from services.ReporteService import ReporteService
+from services.TrabajoReporteService import TrabajoReporteService
 
 router = APIRouter()
 
+def estado_cache(desde_cache: bool) -> str:
+    """
+    Valor del encabezado X-Cache de una descarga de reporte.
+    Args:
+        desde_cache (bool): Si el reporte se obtuvo de la caché.
+    Returns:
+        str: HIT si se sirvió desde la caché, MISS si se generó.
+    """
+    return "HIT" if desde_cache else "MISS"
+
 @router.get("/mensual/pdf")
 def descargar_reporte(anio: int, mes: int, db: Session = Depends(get_db), current_user: Usuario = Depends(canEditDelete)):
     """
@@ -22,37 +38,39 @@ def descargar_reporte(anio: int, mes: int, db: Session = Depends(get_db), curren
     Returns:
         StreamingResponse: El archivo PDF del reporte.
     """
-    buffer = ReporteService.generar_reporte_mensual_pdf(db, anio, mes)
+    buffer, desde_cache = ReporteService.obtener_reporte_mensual_pdf(db, anio, mes)
     filename = f"reporte_pagos_{mes}-{anio}.pdf"
 
     return StreamingResponse(
-        buffer,
+        bloques_archivo(buffer),
         media_type="application/pdf",
         headers={
-            "Content-Disposition": f"attachment; filename={filename}"
+            "Content-Disposition": f"attachment; filename={filename}",
+            "X-Cache": estado_cache(desde_cache)
         }
     )
 
 @router.get("/facturacion/excel")
-def descargar_reporte_fiscal(anio: int, mes: int, db: Session = Depends(get_db), current_user: Usuario = Depends(canEditDelete)):
+def descargar_reporte_fiscal(anio: int, mes: int, meses: int = Query(12, ge=1, le=120), db: Session = Depends(get_db), current_user: Usuario = Depends(canEditDelete)):
     """
     Endpoint para generar y descargar el reporte de facturación en formato Excel.
     Requiere permisos de edición.
     Args:
         anio (int): El año para el cual se generará el reporte.
         mes (int): El mes para el cual se generará el reporte.
+        meses (int): Cantidad de meses del período, 12 por defecto.
         db (Session): La sesión de la base de datos.
         current_user (Usuario): El usuario autenticado con permisos.
     Returns:
         StreamingResponse: El archivo Excel del reporte.
     """
-    buffer = ReporteService.generar_reporte_facturacion_anual(db, anio, mes)
+    buffer, desde_cache = ReporteService.obtener_reporte_facturacion_anual(db, anio, mes, meses)
 
     filename = f"reporte_facturacion_{mes:02d}-{anio}.xlsx"
     return StreamingResponse(
-        buffer,
+        bloques_archivo(buffer),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        headers={"Content-Disposition": f"attachment; filename={filename}", "X-Cache": estado_cache(desde_cache)}
     )
 
 @router.get("/pagos-pendientes/pdf")
@@ -68,14 +86,15 @@ def descargar_reporte_pagos_pendientes(anio: int, mes: int, db: Session = Depend
     Returns:
         StreamingResponse: El archivo PDF del reporte de pagos pendientes.
     """
-    buffer = ReporteService.generar_reporte_pagos_pendientes_pdf(db, anio, mes)
+    buffer, desde_cache = ReporteService.obtener_reporte_pagos_pendientes_pdf(db, anio, mes)
     filename = f"reporte_pagos_pendientes_{mes}-{anio}.pdf"
 
     return StreamingResponse(
-        buffer,
+        bloques_archivo(buffer),
         media_type="application/pdf",
         headers={
-            "Content-Disposition": f"attachment; filename={filename}"
+            "Content-Disposition": f"attachment; filename={filename}",
+            "X-Cache": estado_cache(desde_cache)
         }
     )
 
@@ -97,9 +116,115 @@ def descargar_reporte_pagos_arrendador(inicio: date, fin: date, arrendador_id:in
     filename = f"reporte_pagos_arrendador_{inicio.month}-{inicio.year}_{fin.month}-{fin.year}.pdf"
 
     return StreamingResponse(
-        buffer,
+        bloques_archivo(buffer),
         media_type="application/pdf",
         headers={
             "Content-Disposition": f"attachment; filename={filename}"
         }
-    )
\ No newline at end of file
+    )
+
+@router.get("/historial-pagos-arrendadores/zip")
+def descargar_historiales_arrendadores(inicio: date, fin: date, db: Session = Depends(get_db), current_user: Usuario = Depends(canEditDelete)):
+    """
+    Endpoint para descargar en un ZIP el historial de pagos en PDF de todos los arrendadores
+    en un rango de fechas. Requiere permisos de edición.
+    Args:
+        inicio (date): La fecha de inicio del reporte.
+        fin (date): La fecha de fin del reporte.
+        db (Session): La sesión de la base de datos.
+        current_user (Usuario): El usuario autenticado con permisos.
+    Returns:
+        StreamingResponse: El archivo ZIP con un PDF por arrendador.
+    """
+    bloques = ReporteService.generar_historiales_arrendadores_zip(db, inicio, fin)
+    filename = f"reportes_pagos_arrendadores_{inicio.month}-{inicio.year}_{fin.month}-{fin.year}.zip"
+
+    return StreamingResponse(
+        bloques,
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
+    )
+
+@router.get("/exportacion/pagos", description="Exportación en CSV o JSON por líneas de los pagos con sus facturaciones y retenciones.")
+def exportar_pagos(
+    formato: Literal["csv", "jsonl"] = "csv",
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    estado: Optional[list[EstadoPago]] = Query(None),
+    gzip: bool = False,
+    current_user: Usuario = Depends(canEditDelete)
+):
+    """
+    Endpoint para exportar los pagos junto con su participación, arrendador, arrendamiento,
+    arrendatario, facturaciones y retenciones, una fila por combinación. El archivo se transmite
+    a medida que se lee de la base de datos. Requiere permisos de edición.
+    Args:
+        formato (str): "csv" (por defecto) o "jsonl".
+        desde (Optional[date]): Primer vencimiento incluido.
+        hasta (Optional[date]): Último vencimiento incluido.
+        estado (Optional[list[EstadoPago]]): Estados de pago incluidos; se puede repetir. Todos si se omite.
+        gzip (bool): Si se comprime el archivo en gzip.
+        current_user (Usuario): El usuario autenticado con permisos.
+    Returns:
+        StreamingResponse: El archivo de la exportación.
+    """
+    bloques = ExportacionService.exportar_pagos(formato, desde, hasta, estado, gzip)
+    filename = f"pagos_{desde or 'inicio'}_{hasta or 'fin'}.{formato}"
+    media_type = "text/csv; charset=utf-8" if formato == "csv" else MEDIA_TYPE_NDJSON
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        bloques,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
+    )
+
+@router.post("/trabajos", response_model=TrabajoReporteDtoOut, status_code=202, description="Solicitud de generación de un reporte en segundo plano.")
+def solicitar_reporte(dto: TrabajoReporteDto, db: Session = Depends(get_db), current_user: Usuario = Depends(canEditDelete)):
+    """
+    Endpoint para solicitar la generación de un reporte en segundo plano.
+    Si ya hay un trabajo pendiente o en proceso para el mismo reporte, se devuelve ese trabajo.
+    Requiere permisos de edición.
+    Args:
+        dto (TrabajoReporteDto): El tipo de reporte y sus parámetros.
+        db (Session): La sesión de la base de datos.
+        current_user (Usuario): El usuario autenticado con permisos.
+    Returns:
+        TrabajoReporteDtoOut: El trabajo, con su identificador y estado.
+    """
+    return TrabajoReporteService.solicitar(db, dto)
+
+@router.get("/trabajos/{trabajo_id}", response_model=TrabajoReporteDtoOut, description="Estado de un trabajo de generación de reporte.")
+def obtener_trabajo_reporte(trabajo_id: str, db: Session = Depends(get_db), current_user: Usuario = Depends(canEditDelete)):
+    """
+    Endpoint para consultar el estado y el progreso de un trabajo de generación de reporte.
+    Requiere permisos de edición.
+    Args:
+        trabajo_id (str): El identificador del trabajo.
+        db (Session): La sesión de la base de datos.
+        current_user (Usuario): El usuario autenticado con permisos.
+    Returns:
+        TrabajoReporteDtoOut: El estado del trabajo.
+    """
+    return TrabajoReporteService.obtener(db, trabajo_id)
+
+@router.get("/trabajos/{trabajo_id}/descarga", description="Descarga del archivo de un trabajo de reporte terminado.")
+def descargar_trabajo_reporte(trabajo_id: str, db: Session = Depends(get_db), current_user: Usuario = Depends(canEditDelete)):
+    """
+    Endpoint para descargar el archivo generado por un trabajo de reporte terminado.
+    Requiere permisos de edición.
+    Args:
+        trabajo_id (str): El identificador del trabajo.
+        db (Session): La sesión de la base de datos.
+        current_user (Usuario): El usuario autenticado con permisos.
+    Returns:
+        FileResponse: El archivo del reporte.
+    """
+    ruta, media_type, filename = TrabajoReporteService.archivo(db, trabajo_id)
+    return FileResponse(ruta, media_type=media_type, filename=filename)
@@ -1,9 +1,10 @@
-from typing import Optional
-from fastapi import APIRouter, Depends
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 
 from model.Usuario import Usuario
 from util.database import get_db
+from util.streaming import pide_ndjson, respuesta_ndjson
 from util.permisosUser import canEditDelete
 from dtos.ConfiguracionDto import ConfiguracionDtoModificacion
 from dtos.RetencionDto import RetencionDto, RetencionDtoOut, RetencionDtoModificacion
@@ -13,14 +14,20 @@ from services.RetencionService import RetencionService
 router = APIRouter()
 
 @router.get("", response_model=list[RetencionDtoOut], description="Obtención de todas las retenciones.")
-def listar_retenciones(db: Session = Depends(get_db)):
+def listar_retenciones(request: Request, formato: Optional[Literal["json", "ndjson"]] = None, db: Session = Depends(get_db)):
     """
     Endpoint para listar todas las retenciones.
+    Con `formato=ndjson` o `Accept: application/x-ndjson` la respuesta se transmite en NDJSON,
+    una fila por línea a medida que se lee de la base de datos.
     Args:
+        request (Request): La petición HTTP.
+        formato (Optional[str]): "json" (por defecto) o "ndjson".
         db (Session): La sesión de la base de datos.
     Returns:
-        list[RetencionDtoOut]: Una lista de todas las retenciones.
+        list[RetencionDtoOut] | StreamingResponse: Una lista de todas las retenciones.
     """
+    if pide_ndjson(request, formato):
+        return respuesta_ndjson(RetencionService.listar_todos_streaming())
     return RetencionService.listar_todos(db)
 
 @router.get("/{retencion_id}", response_model=RetencionDtoOut, description="Obtención de una retención por id.")
@@ -1,6 +1,7 @@
 from datetime import date, timedelta
+from itertools import groupby
 
-from sqlalchemy import asc
+from sqlalchemy import asc, select, update
 from util.dbValidator import verificar_relaciones_existentes
 from fastapi import HTTPException
 from sqlalchemy.orm import Session, joinedload
@@ -11,7 +12,12 @@ from enums.EstadoPago import EstadoPago
 from model.Pago import Pago
 from model.ParticipacionArrendador import ParticipacionArrendador
 from model.Arrendamiento import Arrendamiento
+from model.Arrendador import Arrendador
+from model.Arrendatario import Arrendatario
+from model.Localidad import Localidad
 from dtos.ArrendamientoDto import ArrendamientoDto, ArrendamientoDtoOut, ArrendamientoDtoModificacion
+from dtos.ArrendadorDto import ArrendadorDtoOut
+from util.streaming import filas_en_streaming
 
 class ArrendamientoService:
     """
@@ -71,6 +77,38 @@ class ArrendamientoService:
 
         return result
 
+    @staticmethod
+    def listar_todos_streaming():
+        """
+        Obtiene todos los arrendamientos, ordenados por fecha de fin, serializados de a uno a medida
+        que se leen con un cursor del lado del servidor. Los arrendadores se obtienen en la misma
+        consulta (una fila por participación) y se agrupan por arrendamiento al recorrerla.
+        Returns:
+            Iterator[dict]: Cada arrendamiento serializado como ArrendamientoDtoOut.
+        """
+        def armar_consulta(db: Session):
+            return (
+                db.query(Arrendamiento, Arrendador)
+                .outerjoin(ParticipacionArrendador, ParticipacionArrendador.arrendamiento_id == Arrendamiento.id)
+                .outerjoin(Arrendador, ParticipacionArrendador.arrendador_id == Arrendador.id)
+                .options(
+                    joinedload(Arrendamiento.localidad).joinedload(Localidad.provincia),
+                    joinedload(Arrendamiento.usuario),
+                    joinedload(Arrendamiento.arrendatario).joinedload(Arrendatario.localidad).joinedload(Localidad.provincia),
+                    joinedload(Arrendador.localidad).joinedload(Localidad.provincia)
+                )
+                .order_by(asc(Arrendamiento.fecha_fin), asc(Arrendamiento.id), asc(ParticipacionArrendador.id))
+            )
+
+        def serializar(filas):
+            for _, grupo in groupby(filas, key=lambda fila: fila[0].id):
+                grupo = list(grupo)
+                arr_dto = ArrendamientoDtoOut.model_validate(grupo[0][0])
+                arr_dto.arrendadores = [ArrendadorDtoOut.model_validate(arrendador) for _, arrendador in grupo if arrendador is not None]
+                yield arr_dto.model_dump(mode="json")
+
+        return filas_en_streaming(armar_consulta, serializar)
+
     @staticmethod
     def obtener_por_id(db: Session, arrendamiento_id: int):
         """
@@ -224,36 +262,43 @@ class ArrendamientoService:
     @staticmethod
     def actualizarArrendamientosVencidos(db: Session):
         """
-        Job periódico que actualiza el estado de los arrendamientos cuya fecha de fin
-        ha pasado. Los marca como 'FINALIZADO' si todos los pagos están realizados,
+        Job periódico que actualiza el estado de los arrendamientos ACTIVOS cuya fecha de fin
+        ya pasó. Los marca como 'FINALIZADO' si todos los pagos están realizados,
         o como 'VENCIDO' en caso contrario.
+        Considera todos los arrendamientos con fecha de fin anterior a hoy, no solo los de ayer, así
+        que si el job no corrió algún día la siguiente ejecución los pone al día. Se resuelve con dos
+        UPDATE en una misma transacción, sin importar cuántos arrendamientos haya.
+        Returns:
+            dict: Cantidad de arrendamientos marcados como 'finalizados' y como 'vencidos'.
         """
         hoy = date.today()
-        ayer = hoy - timedelta(days=1)
-
-        arrendamientos = (
-            db.query(Arrendamiento)
-            .filter(
-                Arrendamiento.fecha_fin == ayer,
-                Arrendamiento.estado == EstadoArrendamiento.ACTIVO
-            ).all()
+        terminados = [Arrendamiento.fecha_fin < hoy, Arrendamiento.estado == EstadoArrendamiento.ACTIVO]
+        cuota_sin_pagar = (
+            select(Pago.id)
+            .where(Pago.arrendamiento_id == Arrendamiento.id, Pago.estado != EstadoPago.REALIZADO)
+            .exists()
         )
 
-        if not arrendamientos:
-            print(f"✅ No se encontraron arrendamientos VENCIDOS para {ayer}.")
-            return
-
-        vencidos = 0
-        
-        for arrendamiento in arrendamientos:
-            if(ArrendamientoService.tieneCuotasPagadas(db, arrendamiento.id)):
-                arrendamiento.estado = EstadoArrendamiento.FINALIZADO
-            else:
-                arrendamiento.estado = EstadoArrendamiento.VENCIDO
-                vencidos+=1
-
+        # Primero los que tienen todas las cuotas pagadas; los que siguen ACTIVOS quedan VENCIDOS
+        finalizados = db.execute(
+            update(Arrendamiento)
+            .where(*terminados, ~cuota_sin_pagar)
+            .values(estado=EstadoArrendamiento.FINALIZADO)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        vencidos = db.execute(
+            update(Arrendamiento)
+            .where(*terminados)
+            .values(estado=EstadoArrendamiento.VENCIDO)
+            .execution_options(synchronize_session=False)
+        ).rowcount
         db.commit()
-        print(f"✅[{hoy}] Job de actualización: Se actualizaron {len(arrendamientos)-vencidos} arrendamientos como FINALIZADOS  y {vencidos} arrendamientos como VENCIDOS para la fecha {ayer}.")
+
+        if not finalizados and not vencidos:
+            print(f"✅ No se encontraron arrendamientos VENCIDOS anteriores a {hoy}.")
+        else:
+            print(f"✅[{hoy}] Job de actualización: Se actualizaron {finalizados} arrendamientos como FINALIZADOS y {vencidos} arrendamientos como VENCIDOS con fecha de fin anterior a {hoy}.")
+        return {"finalizados": finalizados, "vencidos": vencidos}
         
     ############################################
     #OPERACIONES DE PARTICIPACIÓN DE ARRENDADOR#
@@ -0,0 +1,207 @@
+import os
+import smtplib
+import threading
+from datetime import datetime, timedelta
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session, defer
+from enums.EstadoCorreo import EstadoCorreo
+from model.CorreoSaliente import CorreoSaliente
+
+load_dotenv()
+
+class CorreoService:
+    """
+    Clase de servicio de la bandeja de salida de correos.
+    Los correos se guardan en la base de datos y el job de envío los manda por una única conexión SMTP
+    autenticada, que se reutiliza entre correos y se cierra cuando la bandeja queda vacía.
+    Un envío fallido se reintenta con espera exponencial hasta CORREO_MAX_INTENTOS veces.
+    """
+
+    SMTP_USER = os.getenv("SMTP_USER")
+    SMTP_SERVER = os.getenv("SMTP_SERVER")
+    SMTP_PORT = int(os.getenv("SMTP_PORT") or 587)
+    SMTP_PASS = os.getenv("SMTP_PASS")
+    SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+    SMTP_TIMEOUT = int(os.getenv("SMTP_TIMEOUT", "30"))
+    MAX_INTENTOS = int(os.getenv("CORREO_MAX_INTENTOS", "6"))
+    # Espera antes del primer reintento; se duplica en cada intento fallido hasta ESPERA_MAXIMA
+    ESPERA_BASE = int(os.getenv("CORREO_ESPERA_BASE", "60"))
+    ESPERA_MAXIMA = int(os.getenv("CORREO_ESPERA_MAXIMA", "3600"))
+    LOTE = int(os.getenv("CORREO_LOTE", "20"))
+    INTERVALO = int(os.getenv("CORREO_INTERVALO", "30"))
+
+    _smtp: smtplib.SMTP | None = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def encolar(db: Session, destinatarios: list[str], asunto: str, cuerpo: str, adjunto: bytes | None = None, adjunto_nombre: str | None = None) -> CorreoSaliente:
+        """
+        Guarda un correo en la bandeja de salida para que lo envíe el job de envío.
+        Args:
+            db (Session): La sesión de la base de datos.
+            destinatarios (list[str]): Direcciones de los destinatarios.
+            asunto (str): Asunto del correo.
+            cuerpo (str): Cuerpo en texto plano.
+            adjunto (bytes | None, optional): Contenido del adjunto (PDF). Defaults to None.
+            adjunto_nombre (str | None, optional): Nombre del adjunto. Defaults to None.
+        Returns:
+            CorreoSaliente: El correo encolado.
+        """
+        correo = CorreoSaliente(
+            destinatarios=", ".join(destinatarios),
+            asunto=asunto,
+            cuerpo=cuerpo,
+            adjunto=adjunto,
+            adjunto_nombre=adjunto_nombre,
+            estado=EstadoCorreo.PENDIENTE,
+            intentos=0,
+            proximo_intento=datetime.now()
+        )
+        db.add(correo)
+        db.commit()
+        db.refresh(correo)
+        return correo
+
+    @staticmethod
+    def _mensaje(correo: CorreoSaliente) -> MIMEMultipart:
+        """
+        Arma el mensaje MIME de un correo de la bandeja de salida.
+        Args:
+            correo (CorreoSaliente): El correo.
+        Returns:
+            MIMEMultipart: El mensaje.
+        """
+        msg = MIMEMultipart()
+        msg["From"] = CorreoService.SMTP_USER
+        msg["To"] = correo.destinatarios
+        msg["Subject"] = correo.asunto
+        msg.attach(MIMEText(correo.cuerpo, "plain"))
+        if correo.adjunto is not None:
+            adjunto = MIMEApplication(correo.adjunto, _subtype="pdf")
+            adjunto.add_header("Content-Disposition", "attachment", filename=correo.adjunto_nombre)
+            msg.attach(adjunto)
+        return msg
+
+    @staticmethod
+    def _conexion() -> smtplib.SMTP:
+        """
+        Devuelve la conexión SMTP abierta, o abre y autentica una nueva si no hay o el servidor la cerró.
+        Returns:
+            smtplib.SMTP: La conexión autenticada.
+        Raises:
+            smtplib.SMTPException | OSError: Si no se puede conectar o autenticar.
+        """
+        if CorreoService._smtp is not None:
+            try:
+                if CorreoService._smtp.noop()[0] == 250:
+                    return CorreoService._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            CorreoService._cerrar()
+        smtp = smtplib.SMTP(CorreoService.SMTP_SERVER, CorreoService.SMTP_PORT, timeout=CorreoService.SMTP_TIMEOUT)
+        try:
+            if CorreoService.SMTP_STARTTLS:
+                smtp.starttls()
+            if CorreoService.SMTP_USER and CorreoService.SMTP_PASS:
+                smtp.login(CorreoService.SMTP_USER, CorreoService.SMTP_PASS)
+        except Exception:
+            smtp.close()
+            raise
+        CorreoService._smtp = smtp
+        return smtp
+
+    @staticmethod
+    def _cerrar():
+        """
+        Cierra la conexión SMTP, si hay una abierta.
+        """
+        smtp, CorreoService._smtp = CorreoService._smtp, None
+        if smtp is None:
+            return
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+    @staticmethod
+    def _registrar_fallo(correo: CorreoSaliente, error: Exception):
+        """
+        Registra un intento fallido y programa el próximo con espera exponencial,
+        o marca el correo como fallido si se agotaron los intentos.
+        Args:
+            correo (CorreoSaliente): El correo.
+            error (Exception): El error del envío.
+        """
+        correo.intentos += 1
+        correo.ultimo_error = f"{type(error).__name__}: {error}"[:500]
+        if correo.intentos >= CorreoService.MAX_INTENTOS:
+            correo.estado = EstadoCorreo.FALLIDO
+            print(f"❌ Correo {correo.id} descartado tras {correo.intentos} intentos: {correo.ultimo_error}")
+            return
+        espera = min(CorreoService.ESPERA_BASE * 2 ** (correo.intentos - 1), CorreoService.ESPERA_MAXIMA)
+        correo.proximo_intento = datetime.now() + timedelta(seconds=espera)
+        print(f"⚠️ Correo {correo.id} no enviado (intento {correo.intentos}), se reintenta en {espera} s: {correo.ultimo_error}")
+
+    @staticmethod
+    def enviar_pendientes(db: Session) -> dict:
+        """
+        Job que envía los correos pendientes cuyo próximo intento ya llegó, en orden de llegada.
+        Si no se puede conectar con el servidor SMTP se registra el fallo en el primer correo y se
+        deja el resto para la próxima ejecución.
+        Args:
+            db (Session): La sesión de la base de datos.
+        Returns:
+            dict: Cantidad de correos 'enviados' y de envíos 'fallidos', y el 'ultimo_error' si hubo fallos.
+        """
+        with CorreoService._lock:
+            pendientes = (
+                db.query(CorreoSaliente)
+                # El adjunto se carga al enviar cada correo, no todos a la vez
+                .options(defer(CorreoSaliente.adjunto))
+                .filter(CorreoSaliente.estado == EstadoCorreo.PENDIENTE, CorreoSaliente.proximo_intento <= datetime.now())
+                .order_by(CorreoSaliente.proximo_intento, CorreoSaliente.id)
+                .limit(CorreoService.LOTE)
+                .all()
+            )
+            enviados, fallidos = 0, 0
+            ultimo_error = None
+            for correo in pendientes:
+                try:
+                    smtp = CorreoService._conexion()
+                except (smtplib.SMTPException, OSError) as e:
+                    CorreoService._registrar_fallo(correo, e)
+                    db.commit()
+                    fallidos += 1
+                    ultimo_error = correo.ultimo_error
+                    break
+                try:
+                    destinatarios = [d.strip() for d in correo.destinatarios.split(",") if d.strip()]
+                    smtp.sendmail(CorreoService.SMTP_USER, destinatarios, CorreoService._mensaje(correo).as_string())
+                except (smtplib.SMTPException, OSError) as e:
+                    CorreoService._registrar_fallo(correo, e)
+                    fallidos += 1
+                    ultimo_error = correo.ultimo_error
+                    # Tras un error de conexión o de protocolo la sesión SMTP queda en un estado incierto
+                    CorreoService._cerrar()
+                else:
+                    correo.estado = EstadoCorreo.ENVIADO
+                    correo.enviado = datetime.now()
+                    correo.ultimo_error = None
+                    enviados += 1
+                    print(f"✅ Correo {correo.id} enviado a {correo.destinatarios}.")
+                db.commit()
+            if len(pendientes) < CorreoService.LOTE:
+                # La bandeja quedó vacía: no se mantiene la conexión ociosa hasta el próximo correo
+                CorreoService._cerrar()
+            return {"enviados": enviados, "fallidos": fallidos, "ultimo_error": ultimo_error}
+
+    @staticmethod
+    def cerrar_conexion():
+        """
+        Cierra la conexión SMTP al detener la aplicación.
+        """
+        with CorreoService._lock:
+            CorreoService._cerrar()
@@ -0,0 +1,186 @@
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable
+from sqlalchemy.orm import Session
+from enums.ResultadoJob import ResultadoJob
+from model.EjecucionJob import EjecucionJob
+from util.database import SessionScheduler
+from util.eleccionLider import EleccionLider
+
+class EjecucionJobService:
+    """
+    Clase de servicio del historial de ejecuciones de los jobs programados.
+    Cada ejecución se registra con su duración, las filas afectadas y el resultado, y el historial
+    se resume con percentiles para detectar los jobs que se vuelven más lentos a medida que crecen los datos.
+    Las ejecuciones de más de JOBS_HISTORIAL_DIAS días se borran al registrar una nueva del mismo job.
+    """
+
+    HISTORIAL_DIAS = int(os.getenv("JOBS_HISTORIAL_DIAS", "180"))
+    PERCENTILES = (50, 90, 95, 99)
+
+    @staticmethod
+    def ejecutar(job_id: str, funcion: Callable[[Session], Any], descripcion: str | None = None, contar: Callable[[Any], int | None] | None = None, fallo: Callable[[Any], str | None] | None = None, registrar_sin_filas: bool = True):
+        """
+        Ejecuta un job con su propia sesión del pool del scheduler y registra la ejecución.
+        Si la concesión del scheduler de este proceso venció, el job no se ejecuta: otro proceso puede haberla tomado
+        aunque la renovación todavía no haya pausado el scheduler.
+        Los errores se registran y no se propagan, para no detener el scheduler.
+        Args:
+            job_id (str): Identificador del job.
+            funcion (Callable[[Session], Any]): Función del servicio que hace el trabajo.
+            descripcion (str | None, optional): Descripción para el log. Defaults to None.
+            contar (Callable[[Any], int | None] | None, optional): Obtiene las filas afectadas a partir del
+                valor devuelto por la función. Por defecto, el valor devuelto si es un entero.
+            fallo (Callable[[Any], str | None] | None, optional): Obtiene, a partir del valor devuelto, el detalle
+                de los errores que la función manejó sin lanzar una excepción; si no es None, la ejecución se
+                registra como error. Defaults to None.
+            registrar_sin_filas (bool, optional): Si es False, las ejecuciones exitosas sin filas afectadas
+                no se registran (jobs muy frecuentes, como el envío de correos). Defaults to True.
+        """
+        if not EleccionLider.vigente():
+            print(f"Job {job_id} omitido: la concesión del scheduler de este proceso no está vigente.")
+            return
+        db = SessionScheduler()
+        inicio = datetime.now()
+        reloj = time.perf_counter()
+        filas, resultado, error = None, ResultadoJob.EXITO, None
+        try:
+            if descripcion:
+                print(f"[{inicio}] Ejecutando job de {descripcion}.")
+            valor = funcion(db)
+            filas = contar(valor) if contar else (valor if isinstance(valor, int) else None)
+            error = fallo(valor) if fallo else None
+            if error is not None:
+                resultado, error = ResultadoJob.ERROR, error[:1000]
+        except Exception as e:
+            db.rollback()
+            resultado, error = ResultadoJob.ERROR, f"{type(e).__name__}: {e}"[:1000]
+            print(f"Error en job {job_id}: {e}")
+        duracion_ms = round((time.perf_counter() - reloj) * 1000)
+        try:
+            if resultado == ResultadoJob.EXITO and not filas and not registrar_sin_filas:
+                return
+            db.add(EjecucionJob(
+                job_id=job_id,
+                instancia=EleccionLider.INSTANCIA,
+                inicio=inicio,
+                fin=datetime.now(),
+                duracion_ms=duracion_ms,
+                filas=filas,
+                resultado=resultado,
+                error=error
+            ))
+            db.query(EjecucionJob).filter(
+                EjecucionJob.job_id == job_id,
+                EjecucionJob.inicio < inicio - timedelta(days=EjecucionJobService.HISTORIAL_DIAS)
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error al registrar la ejecución del job {job_id}: {e}")
+        finally:
+            db.close()
+
+    @staticmethod
+    def ejecutado_desde(job_id: str, momento: datetime) -> bool:
+        """
+        Indica si un job tiene alguna ejecución registrada que empezó en un momento dado o después.
+        Args:
+            job_id (str): Identificador del job.
+            momento (datetime): Momento desde el que se buscan ejecuciones, en hora local sin zona horaria.
+        Returns:
+            bool: True si hay alguna ejecución registrada.
+        """
+        db = SessionScheduler()
+        try:
+            return db.query(EjecucionJob.id).filter(
+                EjecucionJob.job_id == job_id,
+                EjecucionJob.inicio >= momento
+            ).first() is not None
+        finally:
+            db.close()
+
+    @staticmethod
+    def _percentil(valores: list[int], percentil: int) -> float:
+        """
+        Calcula un percentil con interpolación lineal entre los dos valores más cercanos.
+        Args:
+            valores (list[int]): Los valores, ordenados de menor a mayor.
+            percentil (int): El percentil, de 0 a 100.
+        Returns:
+            float: El valor del percentil.
+        """
+        posicion = (len(valores) - 1) * percentil / 100
+        inferior = int(posicion)
+        superior = min(inferior + 1, len(valores) - 1)
+        return round(valores[inferior] + (valores[superior] - valores[inferior]) * (posicion - inferior), 1)
+
+    @staticmethod
+    def _resumen(ejecuciones: list[EjecucionJob]) -> dict:
+        """
+        Resume un grupo de ejecuciones: cantidad, errores y distribución de duraciones y filas.
+        Args:
+            ejecuciones (list[EjecucionJob]): Las ejecuciones.
+        Returns:
+            dict: El resumen, con las duraciones en milisegundos.
+        """
+        if not ejecuciones:
+            return {"ejecuciones": 0, "errores": 0, "duracion_ms": None, "filas": None}
+        duraciones = sorted(e.duracion_ms for e in ejecuciones)
+        filas = [e.filas for e in ejecuciones if e.filas is not None]
+        return {
+            "ejecuciones": len(ejecuciones),
+            "errores": sum(1 for e in ejecuciones if e.resultado == ResultadoJob.ERROR),
+            "desde": min(e.inicio for e in ejecuciones),
+            "hasta": max(e.inicio for e in ejecuciones),
+            "duracion_ms": {
+                "promedio": round(sum(duraciones) / len(duraciones), 1),
+                **{f"p{p}": EjecucionJobService._percentil(duraciones, p) for p in EjecucionJobService.PERCENTILES},
+                "maximo": duraciones[-1],
+            },
+            "filas": {
+                "promedio": round(sum(filas) / len(filas), 1),
+                "maximo": max(filas),
+            } if filas else None,
+        }
+
+    @staticmethod
+    def estadisticas(db: Session, job_id: str, ultimas: int, detalle: int) -> dict:
+        """
+        Obtiene las ejecuciones recientes de un job con los percentiles de duración de las últimas
+        ejecuciones y, para comparar, los de las ejecuciones inmediatamente anteriores.
+        Args:
+            db (Session): La sesión de la base de datos.
+            job_id (str): Identificador del job.
+            ultimas (int): Cantidad de ejecuciones de cada ventana.
+            detalle (int): Cantidad de ejecuciones recientes que se devuelven completas.
+        Returns:
+            dict: El resumen de las últimas ejecuciones, el de las anteriores y el detalle de las más recientes.
+        """
+        ejecuciones = (
+            db.query(EjecucionJob)
+            .filter(EjecucionJob.job_id == job_id)
+            .order_by(EjecucionJob.inicio.desc(), EjecucionJob.id.desc())
+            .limit(2 * ultimas)
+            .all()
+        )
+        ultima_exitosa = next((e.inicio for e in ejecuciones if e.resultado == ResultadoJob.EXITO), None)
+        return {
+            "job_id": job_id,
+            "ultima_exitosa": ultima_exitosa,
+            "ultimas": EjecucionJobService._resumen(ejecuciones[:ultimas]),
+            "anteriores": EjecucionJobService._resumen(ejecuciones[ultimas:]),
+            "recientes": [
+                {
+                    "inicio": e.inicio,
+                    "fin": e.fin,
+                    "duracion_ms": e.duracion_ms,
+                    "filas": e.filas,
+                    "resultado": e.resultado.value,
+                    "error": e.error,
+                    "instancia": e.instancia,
+                }
+                for e in ejecuciones[:detalle]
+            ],
+        }
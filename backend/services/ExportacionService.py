@@ -0,0 +1,133 @@
+from datetime import date
+from enum import Enum
+from typing import Iterable
+from fastapi import HTTPException
+from sqlalchemy import asc
+from sqlalchemy.orm import Session
+from enums.EstadoPago import EstadoPago
+from model.Arrendador import Arrendador
+from model.Arrendamiento import Arrendamiento
+from model.Arrendatario import Arrendatario
+from model.Facturacion import Facturacion
+from model.Pago import Pago
+from model.ParticipacionArrendador import ParticipacionArrendador
+from model.Retencion import Retencion
+from util.streaming import comprimir_gzip, filas_en_streaming, lineas_csv, lineas_ndjson
+
+class ExportacionService:
+    """
+    Clase de servicio que exporta los pagos con sus facturaciones y retenciones en formato plano
+    (CSV o JSON por líneas) para procesarlos en planillas de cálculo.
+    Cada fila es un pago junto con su participación, arrendador, arrendamiento y arrendatario; un pago
+    con varias facturaciones o retenciones aparece una vez por cada una, y uno sin facturar aparece
+    una vez con esas columnas vacías.
+    """
+
+    # Columnas exportadas, en orden: nombre de la columna y atributo del modelo
+    COLUMNAS = [
+        ("pago_id", Pago.id),
+        ("vencimiento", Pago.vencimiento),
+        ("estado", Pago.estado),
+        ("quintales", Pago.quintales),
+        ("porcentaje", Pago.porcentaje),
+        ("precio_promedio", Pago.precio_promedio),
+        ("fuente_precio", Pago.fuente_precio),
+        ("monto_a_pagar", Pago.monto_a_pagar),
+        ("participacion_id", ParticipacionArrendador.id),
+        ("hectareas_asignadas", ParticipacionArrendador.hectareas_asignadas),
+        ("quintales_asignados", ParticipacionArrendador.quintales_asignados),
+        ("porcentaje_participacion", ParticipacionArrendador.porcentaje),
+        ("arrendador_id", Arrendador.id),
+        ("arrendador", Arrendador.nombre_o_razon_social),
+        ("arrendador_cuil", Arrendador.cuil),
+        ("arrendador_condicion_fiscal", Arrendador.condicion_fiscal),
+        ("arrendamiento_id", Arrendamiento.id),
+        ("arrendamiento_tipo", Arrendamiento.tipo),
+        ("arrendamiento_estado", Arrendamiento.estado),
+        ("arrendamiento_fecha_inicio", Arrendamiento.fecha_inicio),
+        ("arrendamiento_fecha_fin", Arrendamiento.fecha_fin),
+        ("arrendatario_id", Arrendatario.id),
+        ("arrendatario", Arrendatario.razon_social),
+        ("arrendatario_cuit", Arrendatario.cuit),
+        ("facturacion_id", Facturacion.id),
+        ("fecha_facturacion", Facturacion.fecha_facturacion),
+        ("tipo_factura", Facturacion.tipo_factura),
+        ("monto_facturacion", Facturacion.monto_facturacion),
+        ("retencion_id", Retencion.id),
+        ("fecha_retencion", Retencion.fecha_retencion),
+        ("monto_imponible", Retencion.monto_imponible),
+        ("total_retencion", Retencion.total_retencion),
+    ]
+
+    @staticmethod
+    def _consulta(db: Session, desde: date | None, hasta: date | None, estados: list[EstadoPago] | None):
+        """
+        Construye la consulta de la exportación, ordenada por vencimiento.
+        Devuelve solo columnas (sin instancias del ORM), así cada lote del cursor se descarta al serializarlo.
+        Args:
+            db (Session): La sesión de la base de datos.
+            desde (date | None): Primer vencimiento incluido.
+            hasta (date | None): Último vencimiento incluido.
+            estados (list[EstadoPago] | None): Estados de pago incluidos; todos si es None.
+        Returns:
+            Query: La consulta.
+        """
+        consulta = (
+            db.query(*(columna.label(nombre) for nombre, columna in ExportacionService.COLUMNAS))
+            .select_from(Pago)
+            .join(ParticipacionArrendador, Pago.participacion_arrendador_id == ParticipacionArrendador.id)
+            .join(Arrendador, ParticipacionArrendador.arrendador_id == Arrendador.id)
+            .join(Arrendamiento, Pago.arrendamiento_id == Arrendamiento.id)
+            .join(Arrendatario, Arrendamiento.arrendatario_id == Arrendatario.id)
+            .outerjoin(Facturacion, Facturacion.pago_id == Pago.id)
+            .outerjoin(Retencion, Retencion.facturacion_id == Facturacion.id)
+        )
+        if desde is not None:
+            consulta = consulta.filter(Pago.vencimiento >= desde)
+        if hasta is not None:
+            consulta = consulta.filter(Pago.vencimiento <= hasta)
+        if estados:
+            consulta = consulta.filter(Pago.estado.in_(estados))
+        return consulta.order_by(asc(Pago.vencimiento), asc(Pago.id), asc(Facturacion.id), asc(Retencion.id))
+
+    @staticmethod
+    def _serializar(filas: Iterable) -> Iterable[dict]:
+        """
+        Convierte las filas de la consulta en dicts con valores planos: los enums se reemplazan por su valor.
+        Las fechas y los montos se serializan como texto al escribir, sin perder decimales.
+        Args:
+            filas (Iterable): Filas de la consulta.
+        Yields:
+            dict: Cada fila.
+        """
+        for fila in filas:
+            yield {clave: valor.value if isinstance(valor, Enum) else valor for clave, valor in fila._mapping.items()}
+
+    @staticmethod
+    def exportar_pagos(formato: str, desde: date | None = None, hasta: date | None = None, estados: list[EstadoPago] | None = None, comprimir: bool = False) -> Iterable[str | bytes]:
+        """
+        Exporta los pagos con sus datos relacionados leyéndolos con un cursor del lado del servidor,
+        de a lotes, sin materializar el resultado en memoria.
+        Args:
+            formato (str): "csv" o "jsonl".
+            desde (date | None, optional): Primer vencimiento incluido. Defaults to None.
+            hasta (date | None, optional): Último vencimiento incluido. Defaults to None.
+            estados (list[EstadoPago] | None, optional): Estados de pago incluidos. Defaults to None (todos).
+            comprimir (bool, optional): Si se comprime la salida en gzip a medida que se genera. Defaults to False.
+        Returns:
+            Iterable[str | bytes]: Los bloques del archivo.
+        Raises:
+            HTTPException: Si el rango de fechas es inválido (400).
+        """
+        if desde is not None and hasta is not None and desde > hasta:
+            raise HTTPException(status_code=400, detail="La fecha desde no puede ser posterior a la fecha hasta.")
+        filas = filas_en_streaming(
+            lambda db: ExportacionService._consulta(db, desde, hasta, estados),
+            ExportacionService._serializar,
+            tamano_lote=1000
+        )
+        if formato == "csv":
+            bloques = lineas_csv([nombre for nombre, _ in ExportacionService.COLUMNAS], filas)
+        else:
+            bloques = lineas_ndjson(filas)
+        return comprimir_gzip(bloques) if comprimir else bloques
@@ -3,7 +3,7 @@ from datetime import date
 from sqlalchemy import asc
 from util.dbValidator import verificar_relaciones_existentes
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from enums.EstadoPago import EstadoPago
 from enums.TipoCondicion import TipoCondicion
@@ -14,11 +14,14 @@ from services.ArrendadorService import ArrendadorService
 from services.PagoService import PagoService
 from services.RetencionService import RetencionService
 from model.Facturacion import Facturacion
+from model.Arrendador import Arrendador
+from model.Localidad import Localidad
 from model.Arrendamiento import Arrendamiento
 from model.Pago import Pago
-from dtos.FacturacionDto import FacturacionDtoModificacion
+from dtos.FacturacionDto import FacturacionDtoModificacion, FacturacionDtoOut
 from dtos.ArrendadorDto import  ArrendadorDtoOut
 from dtos.PagoDto import  PagoDtoOut
+from util.streaming import filas_en_streaming, serializar_con
 
 class FacturacionService:
     """
@@ -36,6 +39,31 @@ class FacturacionService:
         """
         return db.query(Facturacion).order_by(asc(Facturacion.fecha_facturacion)).all()
 
+    @staticmethod
+    def opciones_carga_dto():
+        """
+        Opciones de carga anticipada para todas las relaciones que serializa FacturacionDtoOut.
+        Returns:
+            list: Opciones de SQLAlchemy para `Query.options`.
+        """
+        return [
+            joinedload(Facturacion.arrendador).joinedload(Arrendador.localidad).joinedload(Localidad.provincia),
+            joinedload(Facturacion.pago).options(*PagoService.opciones_carga_dto())
+        ]
+
+    @staticmethod
+    def listar_todos_streaming():
+        """
+        Obtiene todas las facturaciones, ordenadas por fecha, serializadas de a una a medida que se
+        leen con un cursor del lado del servidor.
+        Returns:
+            Iterator[dict]: Cada facturación serializada como FacturacionDtoOut.
+        """
+        return filas_en_streaming(
+            lambda db: db.query(Facturacion).options(*FacturacionService.opciones_carga_dto()).order_by(asc(Facturacion.fecha_facturacion), asc(Facturacion.id)),
+            serializar_con(FacturacionDtoOut)
+        )
+
     @staticmethod
     def obtener_por_id(db: Session, facturacion_id: int):
         """
@@ -1,18 +1,29 @@
 from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+import numpy as np
 from util.dbValidator import verificar_relaciones_existentes
 from fastapi import HTTPException
-from sqlalchemy import asc, extract, func
+from sqlalchemy import and_, asc, delete, desc, exists, func, insert, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session, joinedload
+from model.Arrendador import Arrendador
 from model.Arrendamiento import Arrendamiento
 from model.Arrendatario import Arrendatario
+from model.Localidad import Localidad
+from enums.EstadoArrendamiento import EstadoArrendamiento
 from enums.EstadoPago import EstadoPago
 from enums.PlazoPago import PlazoPago
 from enums.TipoArrendamiento import TipoArrendamiento
 from enums.TipoDiasPromedio import TipoDiasPromedio
-from model.Precio import Precio
+from enums.TipoOrigenPrecio import TipoOrigenPrecio
+from util.paginacion import codificar_cursor, decodificar_cursor
+from util import versionDatos
+from util.rangoFechas import en_mes, rango_mes
 from model.ParticipacionArrendador import ParticipacionArrendador
 from model.Pago import Pago
+from model.pago_precio_association import pago_precio_association
 from services.ArrendamientoService import ArrendamientoService
+from services.PrecioPromedioService import PrecioPromedioService
 from dtos.PagoDto import PagoDto, PagoDtoModificacion
 from datetime import date, timedelta
 
@@ -22,6 +33,9 @@ class PagoService:
     Clase de servicio que encapsula la lógica de negocio para la gestión de pagos y cuotas.
     """
 
+    # Cantidad máxima de filas por sentencia en las operaciones masivas
+    TAMANO_LOTE = 1000
+
     @staticmethod
     def listar_todos(db: Session):
         """
@@ -31,7 +45,84 @@ class PagoService:
         Returns:
             list[Pago]: Una lista de todos los pagos.
         """
-        return db.query(Pago).order_by(asc(Pago.vencimiento)).all()
+        return db.query(Pago).options(*PagoService.opciones_carga_dto()).order_by(asc(Pago.vencimiento), asc(Pago.id)).all()
+
+    @staticmethod
+    def opciones_carga_dto():
+        """
+        Opciones de carga anticipada para todas las relaciones que serializa PagoDtoOut,
+        de forma que una página de pagos se obtenga con una sola consulta.
+        Returns:
+            list: Opciones de SQLAlchemy para `Query.options`.
+        """
+        arrendamiento = joinedload(Pago.arrendamiento)
+        participacion = joinedload(Pago.participacion_arrendador)
+        return [
+            arrendamiento.joinedload(Arrendamiento.localidad).joinedload(Localidad.provincia),
+            arrendamiento.joinedload(Arrendamiento.usuario),
+            arrendamiento.joinedload(Arrendamiento.arrendatario).joinedload(Arrendatario.localidad).joinedload(Localidad.provincia),
+            participacion.joinedload(ParticipacionArrendador.arrendador).joinedload(Arrendador.localidad).joinedload(Localidad.provincia),
+            participacion.joinedload(ParticipacionArrendador.arrendamiento)
+        ]
+
+    @staticmethod
+    def listar_paginado(db: Session, limite: int = 50, cursor: str | None = None, descendente: bool = False,
+                        estado: EstadoPago | None = None, desde: date | None = None, hasta: date | None = None,
+                        arrendatario_id: int | None = None, arrendador_id: int | None = None,
+                        fuente_precio: TipoOrigenPrecio | None = None, contar: bool = True):
+        """
+        Obtiene una página de pagos ordenados por (vencimiento, id) usando paginación por clave:
+        cada página continúa desde la última fila de la anterior, por lo que su costo no depende
+        de cuántas páginas se hayan recorrido.
+        Args:
+            db (Session): La sesión de la base de datos.
+            limite (int, optional): Cantidad máxima de pagos por página. Defaults to 50.
+            cursor (str | None, optional): Cursor devuelto en la página anterior. Defaults to None.
+            descendente (bool, optional): Si es True ordena del vencimiento más reciente al más antiguo. Defaults to False.
+            estado (EstadoPago | None, optional): Filtra por estado. Defaults to None.
+            desde (date | None, optional): Vencimiento mínimo (inclusive). Defaults to None.
+            hasta (date | None, optional): Vencimiento máximo (inclusive). Defaults to None.
+            arrendatario_id (int | None, optional): Filtra por arrendatario del arrendamiento. Defaults to None.
+            arrendador_id (int | None, optional): Filtra por arrendador de la participación. Defaults to None.
+            fuente_precio (TipoOrigenPrecio | None, optional): Filtra por fuente de precio. Defaults to None.
+            contar (bool, optional): Si es True incluye el total de pagos que cumplen los filtros. Defaults to True.
+        Returns:
+            dict: Los pagos de la página, el cursor de la página siguiente (None si es la última) y el total.
+        Raises:
+            HTTPException: Si el cursor no es válido (400).
+        """
+        filtros = []
+        if estado is not None:
+            filtros.append(Pago.estado == estado)
+        if desde is not None:
+            filtros.append(Pago.vencimiento >= desde)
+        if hasta is not None:
+            filtros.append(Pago.vencimiento <= hasta)
+        if fuente_precio is not None:
+            filtros.append(Pago.fuente_precio == fuente_precio)
+        if arrendatario_id is not None:
+            filtros.append(Pago.arrendamiento_id.in_(select(Arrendamiento.id).where(Arrendamiento.arrendatario_id == arrendatario_id)))
+        if arrendador_id is not None:
+            filtros.append(Pago.participacion_arrendador_id.in_(select(ParticipacionArrendador.id).where(ParticipacionArrendador.arrendador_id == arrendador_id)))
+
+        total = db.query(func.count(Pago.id)).filter(*filtros).scalar() if contar else None
+
+        consulta = db.query(Pago).filter(*filtros)
+        if cursor:
+            vencimiento, pago_id = decodificar_cursor(cursor)
+            if descendente:
+                consulta = consulta.filter(or_(Pago.vencimiento < vencimiento, and_(Pago.vencimiento == vencimiento, Pago.id < pago_id)))
+            else:
+                consulta = consulta.filter(or_(Pago.vencimiento > vencimiento, and_(Pago.vencimiento == vencimiento, Pago.id > pago_id)))
+        orden = [desc(Pago.vencimiento), desc(Pago.id)] if descendente else [asc(Pago.vencimiento), asc(Pago.id)]
+        # Se pide una fila extra para saber si hay página siguiente
+        pagos = consulta.options(*PagoService.opciones_carga_dto()).order_by(*orden).limit(limite + 1).all()
+
+        siguiente_cursor = None
+        if len(pagos) > limite:
+            pagos = pagos[:limite]
+            siguiente_cursor = codificar_cursor(pagos[-1].vencimiento, pagos[-1].id)
+        return {"items": pagos, "siguiente_cursor": siguiente_cursor, "total": total}
 
     @staticmethod
     def obtener_por_id(db: Session, pago_id: int):
@@ -132,102 +223,248 @@ class PagoService:
         dia = min(fecha.day, [31, 29 if anio % 4 == 0 and (anio % 100 != 0 or anio % 400 == 0) else 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31][mes-1])
         return date(anio, mes, dia)
 
+    # Meses que abarca cada cuota según la periodicidad del arrendamiento
+    MESES_POR_PLAZO = {
+        PlazoPago.MENSUAL: 1,
+        PlazoPago.BIMESTRAL: 2,
+        PlazoPago.TRIMESTRAL: 3,
+        PlazoPago.CUATRIMESTRAL: 4,
+        PlazoPago.SEMESTRAL: 6,
+        PlazoPago.ANUAL: 12
+    }
+
     @staticmethod
-    def generarCuotas(db: Session, arrendamiento_id: int):
+    @lru_cache(maxsize=1024)
+    def _fechas_cuotas(fecha_inicio: date, fecha_fin: date, meses_por_cuota: int) -> tuple[date, ...]:
         """
-        Genera automáticamente las cuotas de pago para un arrendamiento.
+        Calcula las fechas de vencimiento de las cuotas de un período. El resultado se memoiza
+        por (fecha_inicio, fecha_fin, meses_por_cuota) porque muchos contratos comparten las mismas fechas.
         Args:
-            db (Session): La sesión de la base de datos.
-            arrendamiento_id (int): El ID del arrendamiento.
+            fecha_inicio (date): Fecha de inicio del arrendamiento.
+            fecha_fin (date): Fecha de fin del arrendamiento.
+            meses_por_cuota (int): Meses entre cuotas.
         Returns:
-            list[Pago]: La lista de cuotas generadas.
+            tuple[date, ...]: Las fechas de vencimiento.
+        """
+        fechas = []
+        fecha_actual = fecha_inicio
+        while fecha_actual <= fecha_fin:
+            fechas.append(fecha_actual)
+            fecha_actual = PagoService._sumar_meses(fecha_actual, meses_por_cuota)
+        return tuple(fechas)
+
+    @staticmethod
+    def _filas_cuotas(arrendamiento: Arrendamiento, participaciones: list[ParticipacionArrendador], hoy: date) -> list[dict]:
+        """
+        Arma los valores de las cuotas de un arrendamiento, una por participación y fecha de vencimiento.
+        Args:
+            arrendamiento (Arrendamiento): El arrendamiento.
+            participaciones (list[ParticipacionArrendador]): Sus participaciones.
+            hoy (date): Fecha actual, para marcar como vencidas las cuotas pasadas.
+        Returns:
+            list[dict]: Los valores de columna de cada cuota.
         Raises:
             HTTPException: Si no hay participaciones o la periodicidad no es válida.
         """
-        hoy = date.today()
-        arrendamiento = ArrendamientoService.obtener_por_id(db=db, arrendamiento_id=arrendamiento_id)
-        # Obtener participaciones
-        participaciones = db.query(ParticipacionArrendador).filter_by(arrendamiento_id=arrendamiento.id).all()
         if not participaciones:
             raise HTTPException(status_code=400, detail="No hay participaciones registradas para este arrendamiento.")
-        # Mapeo de periodicidad
-        periodos = {
-            PlazoPago.MENSUAL: 1,
-            PlazoPago.BIMESTRAL: 2,
-            PlazoPago.TRIMESTRAL: 3,
-            PlazoPago.CUATRIMESTRAL: 4,
-            PlazoPago.SEMESTRAL: 6,
-            PlazoPago.ANUAL: 12
-        }
-        meses_por_cuota = periodos.get(arrendamiento.plazo_pago)
+        meses_por_cuota = PagoService.MESES_POR_PLAZO.get(arrendamiento.plazo_pago)
         if not meses_por_cuota:
             raise HTTPException(status_code=400, detail=f"Periodicidad '{arrendamiento.plazo_pago}' no soportada.") 
         DOS_DECIMALES = Decimal('0.01')
         D_DOCE = Decimal('12')
         D_MESES_POR_CUOTA = Decimal(str(meses_por_cuota))
-        cuotas = []
+        fechas_cuotas = PagoService._fechas_cuotas(arrendamiento.fecha_inicio, arrendamiento.fecha_fin, meses_por_cuota)
+        if not fechas_cuotas:
+            return []
+        filas = []
         for participacion in participaciones:
-            fecha_actual = arrendamiento.fecha_inicio
-            fechas_cuotas = []
-            while fecha_actual <= arrendamiento.fecha_fin:
-                fechas_cuotas.append(fecha_actual)
-                fecha_actual = PagoService._sumar_meses(fecha_actual, meses_por_cuota)  
-            cantidad_cuotas = len(fechas_cuotas)
-            if cantidad_cuotas == 0:
-                continue 
-            lista_quintales_cuota = []
-            lista_porcentaje_cuota = []
-            dias_promedio_pago = None
             if arrendamiento.tipo == TipoArrendamiento.FIJO:
                 hectareas = Decimal(str(participacion.hectareas_asignadas))
                 quintales_ha = Decimal(str(participacion.quintales_asignados))
                 quintales_anuales = hectareas * quintales_ha
                 quintales_mensuales = quintales_anuales / D_DOCE
                 quintales_pago_exacto = quintales_mensuales * D_MESES_POR_CUOTA
-                quintales_pago_redondeado = quintales_pago_exacto.quantize(DOS_DECIMALES, rounding=ROUND_HALF_UP)
-                lista_quintales_cuota = [quintales_pago_redondeado] * cantidad_cuotas
-                lista_porcentaje_cuota = [None] * cantidad_cuotas
+                quintales_pago = float(quintales_pago_exacto.quantize(DOS_DECIMALES, rounding=ROUND_HALF_UP))
+                porcentaje_pago = None
                 dias_promedio_pago = arrendamiento.dias_promedio
             else:  
                 porcentaje_anual = Decimal(str(participacion.porcentaje))
-                if D_MESES_POR_CUOTA == 0:
-                    raise HTTPException(status_code=400, detail="Meses por cuota no puede ser cero.")
                 cuotas_por_anio = D_DOCE / D_MESES_POR_CUOTA                
-                if cuotas_por_anio == 0:
-                    raise HTTPException(status_code=400, detail="Cálculo de cuotas por año resultó en cero.")
                 porcentaje_por_cuota_exacto = porcentaje_anual / cuotas_por_anio
-                porcentaje_por_cuota_redondeado = porcentaje_por_cuota_exacto.quantize(DOS_DECIMALES, rounding=ROUND_HALF_UP)
-                lista_porcentaje_cuota = [porcentaje_por_cuota_redondeado] * cantidad_cuotas
-                lista_quintales_cuota = [None] * cantidad_cuotas # Rellenar con None
-                dias_promedio_pago = None
-            for i, fecha_vencimiento in enumerate(fechas_cuotas):
-                if(hoy > fecha_vencimiento):
-                    estado_pago = EstadoPago.VENCIDO
-                else:
-                    estado_pago = EstadoPago.PENDIENTE
-                # Obtener los valores de las listas
+                porcentaje_pago = float(porcentaje_por_cuota_exacto.quantize(DOS_DECIMALES, rounding=ROUND_HALF_UP))
                 quintales_pago = None
-                if lista_quintales_cuota[i] is not None:
-                    quintales_pago = float(lista_quintales_cuota[i])
-                porcentaje_pago = None
-                if lista_porcentaje_cuota[i] is not None:
-                    porcentaje_pago = float(lista_porcentaje_cuota[i])
-                cuotas.append(Pago(
-                    estado=estado_pago,
-                    quintales=quintales_pago,
-                    precio_promedio=None,
-                    vencimiento=fecha_vencimiento,
-                    fuente_precio=arrendamiento.origen_precio,
-                    monto_a_pagar=None,
-                    arrendamiento_id=arrendamiento.id,
-                    participacion_arrendador_id=participacion.id,
-                    dias_promedio = dias_promedio_pago,
-                    porcentaje = porcentaje_pago
-                ))
+                dias_promedio_pago = None
+            for fecha_vencimiento in fechas_cuotas:
+                filas.append({
+                    "estado": EstadoPago.VENCIDO if hoy > fecha_vencimiento else EstadoPago.PENDIENTE,
+                    "quintales": quintales_pago,
+                    "precio_promedio": None,
+                    "vencimiento": fecha_vencimiento,
+                    "fuente_precio": arrendamiento.origen_precio,
+                    "monto_a_pagar": None,
+                    "arrendamiento_id": arrendamiento.id,
+                    "participacion_arrendador_id": participacion.id,
+                    "dias_promedio": dias_promedio_pago,
+                    "porcentaje": porcentaje_pago
+                })
+        return filas
+
+    @staticmethod
+    def generarCuotas(db: Session, arrendamiento_id: int):
+        """
+        Genera automáticamente las cuotas de pago para un arrendamiento.
+        Args:
+            db (Session): La sesión de la base de datos.
+            arrendamiento_id (int): El ID del arrendamiento.
+        Returns:
+            list[Pago]: La lista de cuotas generadas.
+        Raises:
+            HTTPException: Si no hay participaciones o la periodicidad no es válida.
+        """
+        arrendamiento = ArrendamientoService.obtener_por_id(db=db, arrendamiento_id=arrendamiento_id)
+        # Obtener participaciones
+        participaciones = db.query(ParticipacionArrendador).filter_by(arrendamiento_id=arrendamiento.id).all()
+        cuotas = [Pago(**fila) for fila in PagoService._filas_cuotas(arrendamiento, participaciones, date.today())]
         db.add_all(cuotas)
         db.commit()
         return cuotas
 
+    @staticmethod
+    def _insertar_cuotas(db: Session, filas: list[dict]):
+        """
+        Inserta cuotas con una única sentencia INSERT de múltiples filas dentro de un savepoint,
+        de forma que un error solo descarta esas filas y no la transacción completa.
+        Args:
+            db (Session): La sesión de la base de datos.
+            filas (list[dict]): Valores de las cuotas a insertar.
+        Raises:
+            SQLAlchemyError: Si la inserción falla (el savepoint ya quedó revertido).
+        """
+        with db.begin_nested():
+            db.execute(insert(Pago.__table__).values(filas))
+
+    @staticmethod
+    def generarCuotasLote(db: Session, arrendamiento_ids: list[int] | None = None):
+        """
+        Genera las cuotas de varios arrendamientos en una sola operación.
+        Las cuotas se insertan en bloques de hasta TAMANO_LOTE filas con INSERT de múltiples filas; si un
+        bloque falla se reintenta contrato por contrato, así un contrato con errores no aborta el resto.
+        Args:
+            db (Session): La sesión de la base de datos.
+            arrendamiento_ids (list[int] | None, optional): Arrendamientos a procesar. Si es None se
+                procesan todos los arrendamientos ACTIVOS que todavía no tienen cuotas. Defaults to None.
+        Returns:
+            list[dict]: Resultado por arrendamiento con la cantidad de cuotas generadas o el error.
+        """
+        tiene_cuotas = exists().where(Pago.arrendamiento_id == Arrendamiento.id)
+        if arrendamiento_ids is None:
+            arrendamientos = (
+                db.query(Arrendamiento)
+                .filter(Arrendamiento.estado == EstadoArrendamiento.ACTIVO, ~tiene_cuotas)
+                .order_by(Arrendamiento.id)
+                .all()
+            )
+            con_cuotas = set()
+        else:
+            arrendamientos = db.query(Arrendamiento).filter(Arrendamiento.id.in_(arrendamiento_ids)).order_by(Arrendamiento.id).all()
+            con_cuotas = {
+                fila.arrendamiento_id for fila in
+                db.query(Pago.arrendamiento_id).filter(Pago.arrendamiento_id.in_(arrendamiento_ids)).distinct()
+            }
+        participaciones = {}
+        for participacion in (
+            db.query(ParticipacionArrendador)
+            .filter(ParticipacionArrendador.arrendamiento_id.in_([a.id for a in arrendamientos]))
+            .order_by(ParticipacionArrendador.id)
+        ):
+            participaciones.setdefault(participacion.arrendamiento_id, []).append(participacion)
+
+        resultados = {}
+        if arrendamiento_ids is not None:
+            encontrados = {a.id for a in arrendamientos}
+            for arrendamiento_id in dict.fromkeys(arrendamiento_ids):
+                if arrendamiento_id not in encontrados:
+                    resultados[arrendamiento_id] = {"arrendamiento_id": arrendamiento_id, "cuotas_generadas": 0, "error": "Arrendamiento no encontrado."}
+
+        hoy = date.today()
+        bloque = {}
+
+        def insertar_bloque():
+            filas = [fila for filas_contrato in bloque.values() for fila in filas_contrato]
+            try:
+                PagoService._insertar_cuotas(db, filas)
+            except SQLAlchemyError:
+                # Se reintenta contrato por contrato para aislar al que produce el error
+                for arrendamiento_id, filas_contrato in bloque.items():
+                    try:
+                        PagoService._insertar_cuotas(db, filas_contrato)
+                    except SQLAlchemyError as e:
+                        resultados[arrendamiento_id].update(cuotas_generadas=0, error=str(e.orig if hasattr(e, "orig") else e))
+            bloque.clear()
+
+        for arrendamiento in arrendamientos:
+            resultado = {"arrendamiento_id": arrendamiento.id, "cuotas_generadas": 0, "error": None}
+            resultados[arrendamiento.id] = resultado
+            if arrendamiento.id in con_cuotas:
+                resultado["error"] = "El arrendamiento ya tiene cuotas generadas."
+                continue
+            try:
+                filas = PagoService._filas_cuotas(arrendamiento, participaciones.get(arrendamiento.id, []), hoy)
+            except HTTPException as e:
+                resultado["error"] = e.detail
+                continue
+            if not filas:
+                continue
+            if bloque and sum(len(f) for f in bloque.values()) + len(filas) > PagoService.TAMANO_LOTE:
+                insertar_bloque()
+            bloque[arrendamiento.id] = filas
+            resultado["cuotas_generadas"] = len(filas)
+        if bloque:
+            insertar_bloque()
+        db.commit()
+        if arrendamiento_ids is not None:
+            return [resultados[arrendamiento_id] for arrendamiento_id in dict.fromkeys(arrendamiento_ids)]
+        return list(resultados.values())
+
+    @staticmethod
+    def _mes_referencia(vencimiento: date, dias_promedio: TipoDiasPromedio):
+        """
+        Obtiene el mes del cual se toman los precios para calcular el promedio de una cuota.
+        Las cuotas DEL_10_AL_15_MES_ACTUAL usan el mes del vencimiento, el resto el mes anterior.
+        Args:
+            vencimiento (date): Fecha de vencimiento de la cuota.
+            dias_promedio (TipoDiasPromedio): Forma de cálculo del promedio.
+        Returns:
+            tuple[int, int]: El año y el mes de referencia.
+        """
+        if dias_promedio == TipoDiasPromedio.DEL_10_AL_15_MES_ACTUAL:
+            return vencimiento.year, vencimiento.month
+        mes_anterior = vencimiento.replace(day=1) - timedelta(days=1)
+        return mes_anterior.year, mes_anterior.month
+
+    @staticmethod
+    def _obtener_precios_ventana(db: Session, origen: TipoOrigenPrecio, dias_promedio: TipoDiasPromedio, anio: int, mes: int):
+        """
+        Obtiene el precio promedio precalculado de una ventana de precios (origen, forma de cálculo y mes de referencia).
+        Args:
+            db (Session): La sesión de la base de datos.
+            origen (TipoOrigenPrecio): Fuente de los precios.
+            dias_promedio (TipoDiasPromedio): Forma de cálculo del promedio.
+            anio (int): Año de referencia.
+            mes (int): Mes de referencia.
+        Returns:
+            tuple[Decimal, list[int]]: El precio promedio y los IDs de los precios utilizados.
+        Raises:
+            HTTPException: Si no hay precios para la ventana o la forma de cálculo no está soportada (400).
+        """
+        if not isinstance(dias_promedio, TipoDiasPromedio):
+            raise HTTPException(status_code=400, detail=f"Tipo de dias_promedio '{dias_promedio}' no soportado.")
+        ventana = PrecioPromedioService.obtener(db, origen, dias_promedio, anio, mes)
+        if ventana is None:
+            raise HTTPException(status_code=400, detail=f"No hay precios requeridos para el origen {origen.name}' en {mes}/{anio}.")
+        return Decimal(ventana.promedio), list(ventana.precio_ids)
+
     @staticmethod
     def _obtener_precios_promedio(db: Session, pago: "Pago"):
         """
@@ -236,72 +473,11 @@ class PagoService:
             db (Session): La sesión de la base de datos.
             pago (Pago): El objeto de pago.
         Returns:
-            tuple[Decimal, list[Precio]]: El precio promedio calculado y la lista de precios utilizados.
+            tuple[Decimal, list[int]]: El precio promedio y los IDs de los precios utilizados.
         """
-        vencimiento = pago.vencimiento
-        mes_anterior = (vencimiento.replace(day=1) - timedelta(days=1)).month
-        anio_anterior = (vencimiento.replace(day=1) - timedelta(days=1)).year
-
-        query_base = db.query(Precio).filter(
-            Precio.origen == pago.fuente_precio,
-            extract("month", Precio.fecha_precio) == mes_anterior,
-            extract("year", Precio.fecha_precio) == anio_anterior
-        )
-
-        precios = []
-
-        match pago.arrendamiento.dias_promedio:
-            case TipoDiasPromedio.ULTIMOS_5_HABILES:
-                precios = query_base.order_by(Precio.fecha_precio.desc()).limit(5).all()
-                if not precios:
-                    raise HTTPException(status_code=400, detail=f"No hay precios requeridos para el origen {pago.fuente_precio.name}' en {mes_anterior}/{anio_anterior}.")
-
-                if len(precios) < 5:
-                    faltan = 5 - len(precios)
-                    precios_extra = db.query(Precio).filter(
-                        Precio.origen == pago.fuente_precio,
-                        Precio.fecha_precio < precios[-1].fecha_precio
-                    ).order_by(Precio.fecha_precio.desc()).limit(faltan).all()
-                    precios.extend(precios_extra)
-
-            case TipoDiasPromedio.ULTIMOS_10_HABILES:
-                precios = query_base.order_by(Precio.fecha_precio.desc()).limit(10).all()
-                if not precios:
-                    raise HTTPException(status_code=400, detail=f"No hay precios requeridos para el origen {pago.fuente_precio.name}' en {mes_anterior}/{anio_anterior}.")
-
-                if len(precios) < 10:
-                    faltan = 10 - len(precios)
-                    precios_extra = db.query(Precio).filter(
-                        Precio.origen == pago.fuente_precio,
-                        Precio.fecha_precio < precios[-1].fecha_precio
-                    ).order_by(Precio.fecha_precio.desc()).limit(faltan).all()
-                    precios.extend(precios_extra)
-
-            case TipoDiasPromedio.DEL_10_AL_15_MES_ACTUAL:
-                precios = db.query(Precio).filter(
-                    Precio.origen == pago.fuente_precio,
-                    extract("month", Precio.fecha_precio) == vencimiento.month,
-                    extract("year", Precio.fecha_precio) == vencimiento.year,
-                    extract("day", Precio.fecha_precio) >= 10,
-                    extract("day", Precio.fecha_precio) <= 15
-                ).order_by(Precio.fecha_precio).all()
-
-                if not precios:
-                    raise HTTPException(status_code=400, detail=f"No hay precios requeridos para el origen {pago.fuente_precio.name}' en {mes_anterior}/{anio_anterior}.")
-
-            case TipoDiasPromedio.ULTIMO_MES:
-                precios = query_base.order_by(Precio.fecha_precio).all()
-                if not precios:
-                    raise HTTPException(status_code=400, detail=f"No hay precios requeridos para el origen {pago.fuente_precio.name}' en {mes_anterior}/{anio_anterior}.")
-
-            case _:
-                raise HTTPException(status_code=400, detail=f"Tipo de dias_promedio '{pago.arrendamiento.dias_promedio}' no soportado.")
-
-        # Convertimos a Decimal para preservar precisión
-        total = sum(Decimal(p.precio_obtenido) for p in precios)
-        precio_promedio = (total / Decimal(len(precios))).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-
-        return precio_promedio, precios
+        dias_promedio = pago.arrendamiento.dias_promedio
+        anio, mes = PagoService._mes_referencia(pago.vencimiento, dias_promedio)
+        return PagoService._obtener_precios_ventana(db, pago.fuente_precio, dias_promedio, anio, mes)
 
 
     @staticmethod
@@ -327,7 +503,7 @@ class PagoService:
         if (pago.precio_promedio is not None and pago.precio_promedio > 0) or (pago.monto_a_pagar is not None and pago.monto_a_pagar > 0):
             raise HTTPException(status_code=400, detail="El pago ya tiene un monto y precio calculado.")
         
-        precio_promedio, precios_en_rango = PagoService._obtener_precios_promedio(db, pago)
+        precio_promedio, precio_ids = PagoService._obtener_precios_promedio(db, pago)
         
         pago.precio_promedio = (precio_promedio / Decimal("10"))
         
@@ -335,12 +511,105 @@ class PagoService:
             pago.monto_a_pagar = pago.precio_promedio * Decimal(str(pago.quintales))
 
         #Asignar precios a la relación many-to-many
-        pago.precios.extend(precios_en_rango)
+        db.execute(insert(pago_precio_association), [{"pago_id": pago.id, "precio_id": precio_id} for precio_id in precio_ids])
 
         db.commit()
         db.refresh(pago)
         return pago
-    
+
+    @staticmethod
+    def _filtros_sin_precio():
+        """
+        Condiciones que identifican a las cuotas de quintales a las que todavía no se les asignó precio.
+        Returns:
+            list: Condiciones de SQLAlchemy sobre Pago.
+        """
+        return [
+            Pago.quintales.isnot(None),
+            Pago.fuente_precio.isnot(None),
+            or_(Pago.porcentaje.is_(None), Pago.porcentaje == 0),
+            or_(Pago.precio_promedio.is_(None), Pago.precio_promedio == 0),
+            or_(Pago.monto_a_pagar.is_(None), Pago.monto_a_pagar == 0)
+        ]
+
+    @staticmethod
+    def _monto_cuota(precio_cuota: Decimal, quintales: float) -> Decimal:
+        """
+        Calcula el monto a pagar de una cuota, redondeado a dos decimales hacia arriba en los medios.
+        Lo usan la asignación de precios y la previsualización para que ambas den el mismo monto.
+        Args:
+            precio_cuota (Decimal): Precio promedio por quintal de la cuota.
+            quintales (float): Quintales de la cuota.
+        Returns:
+            Decimal: El monto a pagar.
+        """
+        return (precio_cuota * Decimal(str(quintales))).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+    @staticmethod
+    def generarPreciosCuotasEnLote(db: Session, *filtros):
+        """
+        Asigna precio promedio y monto a pagar a todas las cuotas que cumplan los filtros en una sola transacción.
+        Las cuotas se agrupan por (fuente_precio, dias_promedio, mes de referencia), el promedio de cada grupo
+        se calcula una única vez y luego se escriben precios, montos y relaciones pago_precio con sentencias masivas
+        de hasta TAMANO_LOTE filas cada una.
+        Solo se consideran cuotas de quintales sin precio asignado.
+        Args:
+            db (Session): La sesión de la base de datos.
+            *filtros: Condiciones de SQLAlchemy adicionales sobre Pago que delimitan las cuotas a procesar.
+        Returns:
+            list[dict]: Resumen por grupo con el precio calculado, la cantidad de cuotas y precios usados o el error.
+        """
+        filas = (
+            db.query(Pago.id, Pago.quintales, Pago.vencimiento, Pago.fuente_precio, Arrendamiento.dias_promedio)
+            .join(Arrendamiento, Pago.arrendamiento_id == Arrendamiento.id)
+            .filter(*filtros, *PagoService._filtros_sin_precio())
+            .all()
+        )
+        # Agrupar las cuotas por ventana de precios
+        grupos = {}
+        for fila in filas:
+            anio, mes = PagoService._mes_referencia(fila.vencimiento, fila.dias_promedio)
+            grupos.setdefault((fila.fuente_precio, fila.dias_promedio, anio, mes), []).append(fila)
+        actualizaciones = []
+        relaciones = []
+        resumen = []
+        for (origen, dias_promedio, anio, mes), cuotas in grupos.items():
+            grupo = {
+                "fuente_precio": origen.value if origen else None,
+                "dias_promedio": dias_promedio.value,
+                "mes_referencia": f"{mes:02d}-{anio}",
+                "cantidad_pagos": len(cuotas),
+                "cantidad_precios": 0,
+                "precio_promedio": None,
+                "error": None
+            }
+            resumen.append(grupo)
+            try:
+                precio_promedio, precio_ids = PagoService._obtener_precios_ventana(db, origen, dias_promedio, anio, mes)
+            except HTTPException as e:
+                grupo["error"] = e.detail
+                continue
+            precio_cuota = precio_promedio / Decimal("10")
+            grupo["cantidad_precios"] = len(precio_ids)
+            grupo["precio_promedio"] = float(precio_cuota)
+            for cuota in cuotas:
+                actualizaciones.append({
+                    "id": cuota.id,
+                    "precio_promedio": precio_cuota,
+                    "monto_a_pagar": PagoService._monto_cuota(precio_cuota, cuota.quintales)
+                })
+                relaciones.extend({"pago_id": cuota.id, "precio_id": precio_id} for precio_id in precio_ids)
+        lote = PagoService.TAMANO_LOTE
+        for i in range(0, len(actualizaciones), lote):
+            bloque = actualizaciones[i:i + lote]
+            # Se limpian relaciones previas para no violar la clave primaria de pago_precio
+            db.execute(delete(pago_precio_association).where(pago_precio_association.c.pago_id.in_([a["id"] for a in bloque])))
+            db.execute(update(Pago), bloque)
+        # Las relaciones son cuotas × precios de la ventana: se insertan en bloques propios
+        for i in range(0, len(relaciones), lote):
+            db.execute(insert(pago_precio_association), relaciones[i:i + lote])
+        db.commit()
+        return resumen
     
     @staticmethod
     def generarPreciosCuotasMensual(db: Session):
@@ -348,37 +617,27 @@ class PagoService:
         Job periódico asignarle el precio a las cuotas del mes actual
         y que toman precios del mes anterior, además son cuotas de pago
         y no de entrega de producción por eso se sacan las que tienen quintales = None
+        Returns:
+            list[dict]: Resumen por grupo de precios devuelto por `generarPreciosCuotasEnLote`.
         """
         hoy = date.today()
         anio, mes = hoy.year, hoy.month
 
         # Rango del mes actual
-        fecha_inicio = date(anio, mes, 1)
-        fecha_fin = date(anio + (mes // 12), (mes % 12) + 1, 1)
+        fecha_inicio, fecha_fin = rango_mes(anio, mes)
 
-        # Traer pagos del mes
-        pagos = (
-            db.query(Pago)
-            .filter(
-                Pago.vencimiento >= fecha_inicio,
-                Pago.vencimiento < fecha_fin,
-                Pago.estado == EstadoPago.PENDIENTE
-            ).all()
-        )
-        contador = 0
-        for pago in pagos:
+        resumen = PagoService.generarPreciosCuotasEnLote(
+            db,
+            Pago.vencimiento >= fecha_inicio,
+            Pago.vencimiento < fecha_fin,
+            Pago.estado == EstadoPago.PENDIENTE,
             #Excluir cuotas especiales
-            if pago.dias_promedio == TipoDiasPromedio.DEL_10_AL_15_MES_ACTUAL:
-                continue
-            if pago.quintales is None or pago.porcentaje > 0:
-                continue
-            contador+=1
-            print(f"----Calculando precio a pago de id: {pago.id}")
-            #Aplicar el cálculo de precio de la cuota
-            PagoService.generarPrecioCuota(db, pago.id)
-
-        db.commit()
+            or_(Pago.dias_promedio.is_(None), Pago.dias_promedio != TipoDiasPromedio.DEL_10_AL_15_MES_ACTUAL)
+        )
+        PagoService._informar_resumen_lote(resumen)
+        contador = sum(g["cantidad_pagos"] for g in resumen if g["error"] is None)
         print(f"✅[{hoy}] Job de actualización: precios de cuotas actualizados para mes {mes}-{anio}: {contador}.")
+        return resumen
         
     @staticmethod
     def generarPrecioCuotas10a15(db: Session):
@@ -386,59 +645,168 @@ class PagoService:
         Genera el precio de las cuotas que tienen como forma de calcular
         el precio promedio los precios ubicados entre el 10 y el 15 de cada mes.
         Se utilizará este método una vez por mes el día 16.
+        Returns:
+            list[dict]: Resumen por grupo de precios devuelto por `generarPreciosCuotasEnLote`.
         """
         hoy = date.today()
         anio, mes = hoy.year, hoy.month
 
         # Rango del mes actual
-        fecha_inicio = date(anio, mes, 1)
-        fecha_fin = date(anio + (mes // 12), (mes % 12) + 1, 1)
-        pagos = (
-            db.query(Pago)
-            .filter(
-                Pago.vencimiento >= fecha_inicio,
-                Pago.vencimiento < fecha_fin,
-                Pago.estado == EstadoPago.PENDIENTE,
-                Pago.dias_promedio == TipoDiasPromedio.DEL_10_AL_15_MES_ACTUAL,
-                Pago.quintales.isnot(None)
-            )
+        fecha_inicio, fecha_fin = rango_mes(anio, mes)
+        resumen = PagoService.generarPreciosCuotasEnLote(
+            db,
+            Pago.vencimiento >= fecha_inicio,
+            Pago.vencimiento < fecha_fin,
+            Pago.estado == EstadoPago.PENDIENTE,
+            Pago.dias_promedio == TipoDiasPromedio.DEL_10_AL_15_MES_ACTUAL
         )
-        for pago in pagos:
-            print(f"----Calculando precio a pago de id: {pago.id}")
-            #Aplicar el cálculo de precio de la cuota
-            PagoService.generarPrecioCuota(db, pago.id)
+        PagoService._informar_resumen_lote(resumen)
+        contador = sum(g["cantidad_pagos"] for g in resumen if g["error"] is None)
+        print(f"✅[{hoy}] Job de actualización: precios de cuotas actualizados para mes {mes}-{anio}: {contador}.")
+        return resumen
 
-        db.commit()
-        print(f"✅[{hoy}] Job de actualización: precios de cuotas actualizados para mes {mes}-{anio}: {len(pagos)}.")
+    @staticmethod
+    def _informar_resumen_lote(resumen: list[dict]):
+        """
+        Imprime el resumen por grupo de una asignación de precios en lote.
+        Args:
+            resumen (list[dict]): Resumen devuelto por `generarPreciosCuotasEnLote`.
+        """
+        for grupo in resumen:
+            if grupo["error"]:
+                print(f"❌----Grupo {grupo['fuente_precio']} {grupo['dias_promedio']} {grupo['mes_referencia']}: {grupo['cantidad_pagos']} pagos sin precio. {grupo['error']}")
+            else:
+                print(f"----Grupo {grupo['fuente_precio']} {grupo['dias_promedio']} {grupo['mes_referencia']}: precio {grupo['precio_promedio']} asignado a {grupo['cantidad_pagos']} pagos.")
 
 
     @staticmethod
-    def actualizarPagosVencidos(db: Session):
+    def previsualizarPreciosMes(db: Session, anio: int, mes: int):
         """
-        Marca como VENCIDO todos los pagos con vencimiento en el día de ayer
-        que aún estén en estado PENDIENTE.
+        Calcula, sin modificar la base de datos, el precio promedio y el monto que se les asignaría
+        a las cuotas pendientes de un mes que todavía no tienen precio.
+        Los datos se traen con una única consulta y las cuotas se agrupan de forma vectorizada en su ventana
+        de precios (fuente, forma de cálculo y mes de referencia), cuyo promedio se obtiene una sola vez.
+        El monto de cada cuota se calcula con Decimal, igual que en la asignación real.
+        Args:
+            db (Session): La sesión de la base de datos.
+            anio (int): Año de vencimiento de las cuotas.
+            mes (int): Mes de vencimiento de las cuotas.
+        Returns:
+            tuple[int, Iterator[dict]]: La cantidad de cuotas y un iterador con la previsualización de cada una.
         """
-        hoy = date.today()
-        ayer = hoy - timedelta(days=1)
-
-        # Buscar pagos pendientes con vencimiento ayer
-        pagos = (
-            db.query(Pago)
-            .filter(
-                Pago.vencimiento == ayer,
-                Pago.estado == EstadoPago.PENDIENTE
-            ).all()
+        filas = (
+            db.query(
+                Pago.id, Pago.arrendamiento_id, Arrendador.nombre_o_razon_social, Pago.vencimiento,
+                Pago.fuente_precio, Arrendamiento.dias_promedio, Pago.quintales
+            )
+            .join(Arrendamiento, Pago.arrendamiento_id == Arrendamiento.id)
+            .join(ParticipacionArrendador, Pago.participacion_arrendador_id == ParticipacionArrendador.id)
+            .join(Arrendador, ParticipacionArrendador.arrendador_id == Arrendador.id)
+            .filter(en_mes(Pago.vencimiento, anio, mes), Pago.estado == EstadoPago.PENDIENTE, *PagoService._filtros_sin_precio())
+            .order_by(Pago.vencimiento, Pago.id)
+            .all()
         )
+        if not filas:
+            return 0, iter(())
+
+        ids, arrendamientos, arrendadores, vencimientos, fuentes, dias, quintales = zip(*filas)
+        origenes = list(TipoOrigenPrecio)
+        tipos = list(TipoDiasPromedio)
+        cod_origen = np.array([origenes.index(f) for f in fuentes])
+        cod_tipo = np.array([tipos.index(d) for d in dias])
+        # Mes de referencia: el del vencimiento para DEL_10_AL_15_MES_ACTUAL, el anterior para el resto
+        meses_venc = np.array(vencimientos, dtype="datetime64[M]")
+        es_10_al_15 = cod_tipo == tipos.index(TipoDiasPromedio.DEL_10_AL_15_MES_ACTUAL)
+        meses_ref = np.where(es_10_al_15, meses_venc, meses_venc - np.timedelta64(1, "M")).astype(np.int64)
+
+        # Una clave entera por ventana para agrupar con np.unique
+        claves = (cod_origen * len(tipos) + cod_tipo) * 100000 + meses_ref
+        ventanas, grupo = np.unique(claves, return_inverse=True)
+        precios_cuota = [None] * len(ventanas)
+        errores = [None] * len(ventanas)
+        for i, clave in enumerate(ventanas.tolist()):
+            combinado, mes_abs = divmod(clave, 100000)
+            origen, tipo = origenes[combinado // len(tipos)], tipos[combinado % len(tipos)]
+            anio_ref, mes_ref = 1970 + mes_abs // 12, mes_abs % 12 + 1
+            try:
+                promedio, _ = PagoService._obtener_precios_ventana(db, origen, tipo, anio_ref, mes_ref)
+                precios_cuota[i] = promedio / Decimal("10")
+            except HTTPException as e:
+                errores[i] = e.detail
+
+        meses_texto = np.datetime_as_string(meses_ref.astype("datetime64[M]"))
+
+        def generar():
+            for (pago_id, arrendamiento_id, arrendador, vencimiento, fuente, dias_promedio, qq,
+                 mes_texto, g) in zip(
+                    ids, arrendamientos, arrendadores, vencimientos, fuentes, dias, quintales,
+                    meses_texto.tolist(), grupo.tolist()):
+                precio = precios_cuota[g]
+                yield {
+                    "pago_id": pago_id,
+                    "arrendamiento_id": arrendamiento_id,
+                    "arrendador": arrendador,
+                    "vencimiento": vencimiento.isoformat(),
+                    "fuente_precio": fuente.value,
+                    "dias_promedio": dias_promedio.value,
+                    "mes_referencia": f"{mes_texto[5:7]}-{mes_texto[:4]}",
+                    "quintales": qq,
+                    "precio_promedio": round(float(precio), 3) if precio is not None else None,
+                    "monto_a_pagar": float(PagoService._monto_cuota(precio, qq)) if precio is not None else None,
+                    "error": errores[g]
+                }
+
+        return len(filas), generar()
 
-        if not pagos:
-            print(f"✅ No se encontraron pagos VENCIDOS para {ayer}.")
-            return
-
-        for pago in pagos:
-            pago.estado = EstadoPago.VENCIDO
+    @staticmethod
+    def actualizarPagosVencidos(db: Session, dias_atras: int | None = None):
+        """
+        Marca como VENCIDO todos los pagos PENDIENTES cuyo vencimiento es anterior a hoy.
+        No depende de que el job haya corrido el día anterior: si se saltó algún día (contenedor detenido,
+        scheduler pausado), la siguiente ejecución pone al día todos los pagos atrasados.
+        Se actualiza con UPDATE por bloques de hasta TAMANO_LOTE pagos, cada uno en su propia transacción,
+        para no mantener bloqueada la tabla durante una puesta al día grande.
+        Args:
+            db (Session): La sesión de la base de datos.
+            dias_atras (int | None, optional): Si se indica, solo se consideran los pagos con vencimiento
+                en los últimos `dias_atras` días. Defaults to None (todos los vencidos).
+        Returns:
+            int: Cantidad de pagos marcados como vencidos.
+        """
+        hoy = date.today()
+        condiciones = [Pago.estado == EstadoPago.PENDIENTE, Pago.vencimiento < hoy]
+        if dias_atras is not None:
+            condiciones.append(Pago.vencimiento >= hoy - timedelta(days=dias_atras))
+
+        total = 0
+        ultimo_id = 0
+        while True:
+            bloque = db.execute(
+                select(Pago.id, Pago.vencimiento)
+                .where(*condiciones, Pago.id > ultimo_id)
+                .order_by(Pago.id)
+                .limit(PagoService.TAMANO_LOTE)
+            ).all()
+            if not bloque:
+                break
+            ultimo_id = bloque[-1].id
+            # Se ejecuta sobre la conexión para versionar solo los meses afectados: con Session.execute
+            # se versionaría toda la tabla y se invalidarían todos los reportes en caché
+            conn = db.connection()
+            resultado = conn.execute(
+                update(Pago)
+                .where(Pago.id.in_([f.id for f in bloque]), Pago.estado == EstadoPago.PENDIENTE)
+                .values(estado=EstadoPago.VENCIDO)
+            )
+            versionDatos.incrementar(conn, {("pago", f.vencimiento.year, f.vencimiento.month) for f in bloque})
+            db.commit()
+            total += resultado.rowcount
 
-        db.commit()
-        print(f"✅[{hoy}] Job de actualización: Se actualizaron {len(pagos)} pagos como VENCIDOS para la fecha {ayer}.")
+        if not total:
+            print(f"✅ No se encontraron pagos VENCIDOS anteriores a {hoy}.")
+        else:
+            print(f"✅[{hoy}] Job de actualización: Se actualizaron {total} pagos como VENCIDOS con vencimiento anterior a {hoy}.")
+        return total
         
     @staticmethod
     def obtener_pagos_agrupados_mes(db: Session):
@@ -459,8 +827,7 @@ class PagoService:
             )
             .join(Arrendamiento, Pago.arrendamiento_id == Arrendamiento.id)
             .join(Arrendatario, Arrendamiento.arrendatario_id == Arrendatario.id)
-            .filter(extract("year", Pago.vencimiento) == today.year)
-            .filter(extract("month", Pago.vencimiento) == today.month)
+            .filter(en_mes(Pago.vencimiento, today.year, today.month))
             .filter(Pago.estado.in_(["PENDIENTE", "VENCIDO"]))
             .group_by(Arrendatario.razon_social)
             .all()
@@ -500,8 +867,7 @@ class PagoService:
             )
             .join(Arrendamiento, Pago.arrendamiento_id == Arrendamiento.id)
             .join(Arrendatario, Arrendamiento.arrendatario_id == Arrendatario.id)
-            .filter(extract("year", Pago.vencimiento) == proximo_mes_ano)
-            .filter(extract("month", Pago.vencimiento) == proximo_mes)
+            .filter(en_mes(Pago.vencimiento, proximo_mes_ano, proximo_mes))
             .filter(Pago.estado.in_(["PENDIENTE"]))
             .group_by(Arrendatario.razon_social)
             .all()
@@ -531,8 +897,7 @@ class PagoService:
         """
         results = (
             db.query(Pago.vencimiento, Pago.estado)
-            .filter(extract("month", Pago.vencimiento) == mes)
-            .filter(extract("year", Pago.vencimiento) == anio)
+            .filter(en_mes(Pago.vencimiento, anio, mes))
             .all()
         )
         response = []
@@ -0,0 +1,224 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from sqlalchemy.orm import Session
+from enums.TipoDiasPromedio import TipoDiasPromedio
+from enums.TipoOrigenPrecio import TipoOrigenPrecio
+from model.Precio import Precio
+from model.PrecioPromedioMensual import PrecioPromedioMensual
+from util.precioCache import PrecioCache, PrecioSerie
+from util.rangoFechas import rango_mes
+
+class PrecioPromedioService:
+    """
+    Clase de servicio que mantiene la tabla de promedios precalculados por ventana de precios
+    (origen, mes de referencia y forma de cálculo) y la expone a los cálculos de cuotas y reportes.
+    """
+
+    # Mayor cantidad de precios que puede requerir una ventana (ULTIMOS_10_HABILES)
+    MAX_PRECIOS_VENTANA = 10
+
+    @staticmethod
+    def ventana(precios: list[PrecioSerie], tipo: TipoDiasPromedio, anio: int, mes: int) -> list[PrecioSerie]:
+        """
+        Selecciona de una serie de precios ordenada por fecha los que forman una ventana.
+        Args:
+            precios (list[PrecioSerie]): Precios de un origen ordenados por fecha.
+            tipo (TipoDiasPromedio): Forma de cálculo del promedio.
+            anio (int): Año de referencia.
+            mes (int): Mes de referencia.
+        Returns:
+            list[PrecioSerie]: Los precios de la ventana, vacía si el mes no tiene los precios requeridos.
+        """
+        fechas = [p.fecha_precio for p in precios]
+        inicio, fin = rango_mes(anio, mes)
+        desde, hasta = bisect_left(fechas, inicio), bisect_left(fechas, fin)
+
+        match tipo:
+            case TipoDiasPromedio.ULTIMOS_5_HABILES | TipoDiasPromedio.ULTIMOS_10_HABILES:
+                if desde == hasta:
+                    return []
+                # Los últimos N del mes, completando con los anteriores si el mes tiene menos de N precios
+                cantidad = 5 if tipo == TipoDiasPromedio.ULTIMOS_5_HABILES else 10
+                return precios[max(0, hasta - cantidad):hasta]
+            case TipoDiasPromedio.DEL_10_AL_15_MES_ACTUAL:
+                return precios[bisect_left(fechas, date(anio, mes, 10)):bisect_right(fechas, date(anio, mes, 15))]
+            case TipoDiasPromedio.ULTIMO_MES:
+                return precios[desde:hasta]
+        return []
+
+    @staticmethod
+    def _armar_fila(origen: TipoOrigenPrecio, tipo: TipoDiasPromedio, anio: int, mes: int, precios: list[PrecioSerie]) -> PrecioPromedioMensual:
+        """
+        Construye la fila de promedio de una ventana a partir de sus precios.
+        Args:
+            origen (TipoOrigenPrecio): Fuente de los precios.
+            tipo (TipoDiasPromedio): Forma de cálculo del promedio.
+            anio (int): Año de referencia.
+            mes (int): Mes de referencia.
+            precios (list[PrecioSerie]): Precios de la ventana (no vacía).
+        Returns:
+            PrecioPromedioMensual: La fila calculada, sin agregar a la sesión.
+        """
+        suma = sum((Decimal(p.precio_obtenido) for p in precios), Decimal("0"))
+        return PrecioPromedioMensual(
+            origen=origen,
+            anio=anio,
+            mes=mes,
+            tipo=tipo,
+            suma=suma,
+            cantidad=len(precios),
+            promedio=(suma / Decimal(len(precios))).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP),
+            precio_ids=[p.id for p in precios]
+        )
+
+    @staticmethod
+    def _guardar_mes(db: Session, origen: TipoOrigenPrecio, anio: int, mes: int, precios: list[PrecioSerie]):
+        """
+        Recalcula y guarda en la sesión las filas de todas las formas de cálculo de un mes.
+        Las ventanas que quedan sin precios se eliminan.
+        Args:
+            db (Session): La sesión de la base de datos.
+            origen (TipoOrigenPrecio): Fuente de los precios.
+            anio (int): Año de referencia.
+            mes (int): Mes de referencia.
+            precios (list[PrecioSerie]): Precios del origen ordenados por fecha que cubren el mes.
+        """
+        existentes = {
+            fila.tipo: fila for fila in db.query(PrecioPromedioMensual).filter(
+                PrecioPromedioMensual.origen == origen,
+                PrecioPromedioMensual.anio == anio,
+                PrecioPromedioMensual.mes == mes
+            )
+        }
+        for tipo in TipoDiasPromedio:
+            precios_ventana = PrecioPromedioService.ventana(precios, tipo, anio, mes)
+            fila = existentes.get(tipo)
+            if not precios_ventana:
+                if fila is not None:
+                    db.delete(fila)
+                continue
+            nueva = PrecioPromedioService._armar_fila(origen, tipo, anio, mes, precios_ventana)
+            if fila is None:
+                db.add(nueva)
+            else:
+                fila.suma, fila.cantidad, fila.promedio, fila.precio_ids = nueva.suma, nueva.cantidad, nueva.promedio, nueva.precio_ids
+
+    @staticmethod
+    def recalcular(db: Session, origen, fecha: date):
+        """
+        Actualiza las ventanas afectadas por un precio creado, modificado o eliminado en una fecha.
+        Un precio forma parte de las ventanas de su mes y, para ULTIMOS_N_HABILES, también de las de
+        los meses de los N precios siguientes, por eso se recalculan todos esos meses.
+        No confirma la transacción: la escritura del precio y la de sus promedios se confirman juntas.
+        Args:
+            db (Session): La sesión de la base de datos.
+            origen (TipoOrigenPrecio | str): Fuente del precio.
+            fecha (date): Fecha del precio.
+        """
+        origen = TipoOrigenPrecio(origen)
+        db.flush()
+        siguientes = (
+            db.query(Precio.fecha_precio)
+            .filter(Precio.origen == origen, Precio.fecha_precio > fecha)
+            .order_by(Precio.fecha_precio)
+            .limit(PrecioPromedioService.MAX_PRECIOS_VENTANA)
+            .all()
+        )
+        meses = sorted({(fecha.year, fecha.month)} | {(f.fecha_precio.year, f.fecha_precio.month) for f in siguientes})
+        inicio, _ = rango_mes(*meses[0])
+        _, fin = rango_mes(*meses[-1])
+        anteriores = (
+            db.query(Precio.id, Precio.fecha_precio, Precio.precio_obtenido)
+            .filter(Precio.origen == origen, Precio.fecha_precio < inicio)
+            .order_by(Precio.fecha_precio.desc())
+            .limit(PrecioPromedioService.MAX_PRECIOS_VENTANA)
+            .all()
+        )
+        del_rango = (
+            db.query(Precio.id, Precio.fecha_precio, Precio.precio_obtenido)
+            .filter(Precio.origen == origen, Precio.fecha_precio >= inicio, Precio.fecha_precio < fin)
+            .order_by(Precio.fecha_precio)
+            .all()
+        )
+        precios = [PrecioSerie(*f) for f in reversed(anteriores)] + [PrecioSerie(*f) for f in del_rango]
+        for anio, mes in meses:
+            PrecioPromedioService._guardar_mes(db, origen, anio, mes, precios)
+
+    @staticmethod
+    def reconstruir(db: Session):
+        """
+        Recalcula desde cero la tabla de promedios para todos los orígenes y meses con precios.
+        Se usa para la carga inicial de la tabla. Confirma la transacción.
+        Args:
+            db (Session): La sesión de la base de datos.
+        Returns:
+            int: Cantidad de filas generadas.
+        """
+        db.query(PrecioPromedioMensual).delete()
+        filas = 0
+        for origen in TipoOrigenPrecio:
+            precios = [
+                PrecioSerie(*f) for f in db.query(Precio.id, Precio.fecha_precio, Precio.precio_obtenido)
+                .filter(Precio.origen == origen)
+                .order_by(Precio.fecha_precio)
+            ]
+            # Solo los meses con precios tienen ventanas
+            for anio, mes in sorted({(p.fecha_precio.year, p.fecha_precio.month) for p in precios}):
+                for tipo in TipoDiasPromedio:
+                    precios_ventana = PrecioPromedioService.ventana(precios, tipo, anio, mes)
+                    if precios_ventana:
+                        db.add(PrecioPromedioService._armar_fila(origen, tipo, anio, mes, precios_ventana))
+                        filas += 1
+        db.commit()
+        return filas
+
+    @staticmethod
+    def obtener(db: Session, origen, tipo: TipoDiasPromedio, anio: int, mes: int):
+        """
+        Obtiene el promedio precalculado de una ventana.
+        Si la fila no existe (por ejemplo, precios cargados por fuera de la aplicación) se calcula
+        a partir de la serie en memoria de PrecioCache, sin guardarla.
+        Args:
+            db (Session): La sesión de la base de datos.
+            origen (TipoOrigenPrecio | str): Fuente de los precios.
+            tipo (TipoDiasPromedio): Forma de cálculo del promedio.
+            anio (int): Año de referencia.
+            mes (int): Mes de referencia.
+        Returns:
+            PrecioPromedioMensual | None: La fila de la ventana, o None si no hay precios para ella.
+        """
+        origen = TipoOrigenPrecio(origen)
+        fila = db.get(PrecioPromedioMensual, (origen, anio, mes, tipo))
+        if fila is not None:
+            return fila
+        precios = PrecioPromedioService.ventana(PrecioCache.serie(db, origen), tipo, anio, mes)
+        if not precios:
+            return None
+        return PrecioPromedioService._armar_fila(origen, tipo, anio, mes, precios)
+
+    @staticmethod
+    def promedio_meses(db: Session, origen, desde: date, hasta: date):
+        """
+        Calcula el promedio de todos los precios de los meses completos entre dos fechas,
+        combinando las sumas y cantidades de las filas ULTIMO_MES de cada mes.
+        Args:
+            db (Session): La sesión de la base de datos.
+            origen (TipoOrigenPrecio | str): Fuente de los precios.
+            desde (date): Fecha dentro del primer mes.
+            hasta (date): Fecha dentro del último mes.
+        Returns:
+            Decimal | None: El promedio de los precios, o None si no hay precios en esos meses.
+        """
+        suma, cantidad = Decimal("0"), 0
+        anio, mes = desde.year, desde.month
+        while (anio, mes) <= (hasta.year, hasta.month):
+            fila = PrecioPromedioService.obtener(db, origen, TipoDiasPromedio.ULTIMO_MES, anio, mes)
+            if fila is not None:
+                suma += Decimal(fila.suma)
+                cantidad += fila.cantidad
+            _, siguiente = rango_mes(anio, mes)
+            anio, mes = siguiente.year, siguiente.month
+        if cantidad == 0:
+            return None
+        return suma / Decimal(cantidad)
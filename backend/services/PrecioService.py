@@ -11,7 +11,10 @@ from sqlalchemy.orm import Session
 from enums.TipoOrigenPrecio import TipoOrigenPrecio
 from model.Precio import Precio
 from model.pago_precio_association import pago_precio_association
-from dtos.PrecioDto import PrecioDto, PrecioDtoModificacion
+from dtos.PrecioDto import PrecioDto, PrecioDtoModificacion, PrecioDtoOut
+from util.precioCache import PrecioCache
+from util.streaming import filas_en_streaming, serializar_con
+from services.PrecioPromedioService import PrecioPromedioService
 
 # Cargar variables del .env
 load_dotenv()
@@ -41,6 +44,15 @@ class PrecioService:
             list[Precio]: Una lista de todos los precios.
         """
         return db.query(Precio).all()
+
+    @staticmethod
+    def listar_precios_streaming():
+        """
+        Obtiene todos los precios serializados de a uno a medida que se leen con un cursor del lado del servidor.
+        Returns:
+            Iterator[dict]: Cada precio serializado como PrecioDtoOut.
+        """
+        return filas_en_streaming(lambda db: db.query(Precio).order_by(Precio.id), serializar_con(PrecioDtoOut))
     
     @staticmethod
     def listar_precios_agd(db: Session):
@@ -119,7 +131,9 @@ class PrecioService:
 
         nuevo = Precio(**dto.model_dump())
         db.add(nuevo)
+        PrecioPromedioService.recalcular(db, nuevo.origen, nuevo.fecha_precio)
         db.commit()
+        PrecioCache.invalidar(dto.origen)
         db.refresh(nuevo)
         return nuevo
 
@@ -154,9 +168,13 @@ class PrecioService:
                 detail=f"Ya existe un precio registrado para el origen '{dto.origen}' en la fecha {dto.fecha_precio.strftime('%d/%m/%Y')}."
             )
         
+        origen_anterior, fecha_anterior = obj.origen, obj.fecha_precio
         for campo, valor in dto.model_dump(exclude_unset=True).items():
             setattr(obj, campo, valor)
+        PrecioPromedioService.recalcular(db, origen_anterior, fecha_anterior)
+        PrecioPromedioService.recalcular(db, obj.origen, obj.fecha_precio)
         db.commit()
+        PrecioCache.invalidar(origen_anterior, obj.origen)
         db.refresh(obj)
         return obj
 
@@ -185,8 +203,11 @@ class PrecioService:
                 detail="No se puede eliminar el precio porque tiene pagos asociados."
             )
 
+        origen, fecha = obj.origen, obj.fecha_precio
         db.delete(obj)
+        PrecioPromedioService.recalcular(db, origen, fecha)
         db.commit()
+        PrecioCache.invalidar(origen)
         
         
     @staticmethod
@@ -271,6 +292,8 @@ class PrecioService:
     def actualizar_precio_bcr(db: Session):
         """
         Job que obtiene el precio de BCR y lo guarda en la base de datos si no existe.
+        Returns:
+            int: Cantidad de precios agregados (0 si ya estaba cargado).
         """
         fecha_precio, valor = PrecioService.obtener_precio_bcr_dia_anterior()
 
@@ -282,7 +305,7 @@ class PrecioService:
 
         if existe:
             print(f"Precio BCR ya cargado para {fecha_precio}.")
-            return None
+            return 0
 
         nuevo_precio = Precio(
             fecha_precio=fecha_precio,
@@ -290,10 +313,12 @@ class PrecioService:
             origen=TipoOrigenPrecio.BCR
         )
         db.add(nuevo_precio)
+        PrecioPromedioService.recalcular(db, TipoOrigenPrecio.BCR, fecha_precio)
         db.commit()
+        PrecioCache.invalidar(TipoOrigenPrecio.BCR)
         print(f"✅Precio BCR agregado: {valor} ({fecha_precio}).")
 
-        return None
+        return 1
 
     @staticmethod
     def actualizar_precio_agd(db: Session , payload: dict):
@@ -335,7 +360,9 @@ class PrecioService:
             origen=TipoOrigenPrecio.AGD
         )
         db.add(precio)
+        PrecioPromedioService.recalcular(db, TipoOrigenPrecio.AGD, hoy)
         db.commit()
+        PrecioCache.invalidar(TipoOrigenPrecio.AGD)
 
         return JSONResponse(
             status_code=201, 
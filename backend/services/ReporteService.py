@@ -1,12 +1,10 @@
 from decimal import Decimal
-from email.mime.application import MIMEApplication
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 import io
 import os
-from datetime import date
+from datetime import date, timedelta
 from pathlib import Path
-import smtplib
+import tempfile
+from typing import BinaryIO, Callable
 from dotenv import load_dotenv
 from fastapi import HTTPException
 from reportlab.lib.pagesizes import A4, landscape
@@ -20,12 +18,25 @@ from reportlab.lib.styles import getSampleStyleSheet
 import io
 from datetime import date
 from openpyxl import Workbook
-from openpyxl.styles import Font, Border, Side, Alignment
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Border, Side, Alignment, NamedStyle
 from openpyxl.utils import get_column_letter
-from sqlalchemy import func
+from openpyxl.worksheet.cell_range import CellRange
+from itertools import groupby
+from operator import attrgetter
+from sqlalchemy import extract, func, select
+from sqlalchemy.orm import contains_eager
 from util.Configuracion import Configuracion
+from enums.EstadoPago import EstadoPago
 from enums.TipoCondicion import TipoCondicion
-from model.Precio import Precio
+from enums.TipoOrigenPrecio import TipoOrigenPrecio
+from services.CorreoService import CorreoService
+from services.PrecioPromedioService import PrecioPromedioService
+from util import versionDatos
+from util.cacheReportes import CacheReportes
+from util.streaming import zip_en_streaming
+from util.pdfSecciones import SeccionPdf, generar_pdf_secciones
+from util.rangoFechas import rango_mes
 from model.Arrendador import Arrendador
 from model.Arrendatario import Arrendatario
 from model.Arrendamiento import Arrendamiento
@@ -63,13 +74,11 @@ def formato_moneda(valor):
 class ReporteService:  
     """
     Clase de servicio que encapsula la lógica para la generación de reportes en PDF y Excel,
-    así como el envío de reportes por correo electrónico.
+    así como el encolado de reportes para su envío por correo electrónico.
     """
     
-    SMTP_USER = os.getenv("SMTP_USER")
-    SMTP_SERVER = os.getenv("SMTP_SERVER")
-    SMTP_PORT = os.getenv("SMTP_PORT")
-    SMTP_PASS = os.getenv("SMTP_PASS")
+    # Bytes del Excel que se mantienen en memoria antes de pasar el archivo temporal a disco
+    EXCEL_MAX_MEMORIA = int(os.getenv("REPORTES_EXCEL_MAX_MEMORIA", str(8 * 1024 * 1024)))
 
     @staticmethod
     def enviar_reporte_pagos_mes_anterior(db):
@@ -95,12 +104,9 @@ class ReporteService:
             print("⚠️ No se encontraron destinatarios configurados en la tabla 'configuracion'.")
             return
         #Generar el reporte del mes anterior
-        buffer = ReporteService.generar_reporte_mensual_pdf(db, anio=ultimo_anio, mes=ultimo_mes)
-        #Preparar email
-        msg = MIMEMultipart()
-        msg["From"] = ReporteService.SMTP_USER
-        msg["To"] = ", ".join(destinatarios)
-        msg["Subject"] = f"Reporte de pagos pendientes {ultimo_mes:02d}/{ultimo_anio}"
+        buffer, _ = ReporteService.obtener_reporte_mensual_pdf(db, anio=ultimo_anio, mes=ultimo_mes)
+        #Encolar el correo; lo envía el job de la bandeja de salida
+        asunto = f"Reporte de pagos pendientes {ultimo_mes:02d}/{ultimo_anio}"
         cuerpo = f"""
         Estimados/as,
 
@@ -109,21 +115,10 @@ class ReporteService:
         Saludos,
         Sistema de Arrendamientos
         """
-        msg.attach(MIMEText(cuerpo, "plain"))
-        #Adjuntar PDF
         filename = f"reporte_pagos_pendientes_{ultimo_mes}_{ultimo_anio}.pdf"
-        adjunto = MIMEApplication(buffer.read(), _subtype="pdf")
-        adjunto.add_header("Content-Disposition", "attachment", filename=filename)
-        msg.attach(adjunto)
-        #Enviar correo
-        try:
-            with smtplib.SMTP(ReporteService.SMTP_SERVER, ReporteService.SMTP_PORT) as server:
-                server.starttls()
-                server.login(ReporteService.SMTP_USER, ReporteService.SMTP_PASS)
-                server.sendmail(ReporteService.SMTP_USER, destinatarios, msg.as_string())
-            print(f"✅ Reporte del mes {ultimo_mes:02d}/{ultimo_anio} enviado a {len(destinatarios)} destinatarios.")
-        except Exception as e:
-            print(f"❌ Error al enviar el correo: {e}")
+        with buffer:
+            CorreoService.encolar(db, destinatarios, asunto, cuerpo, buffer.read(), filename)
+        print(f"✅ Reporte del mes {ultimo_mes:02d}/{ultimo_anio} encolado para {len(destinatarios)} destinatarios.")
 
     @staticmethod
     def enviar_reportes_pagos(db):
@@ -142,14 +137,11 @@ class ReporteService:
             print("⚠️ No se encontraron destinatarios configurados en la tabla 'configuracion'.")
             return
         #Generar el reporte del mes actual
-        buffer = ReporteService.generar_reporte_pagos_pendientes_pdf(
+        buffer, _ = ReporteService.obtener_reporte_pagos_pendientes_pdf(
             db, anio=hoy.year, mes=hoy.month
         )
-        #Preparar el correo
-        msg = MIMEMultipart()
-        msg["From"] = ReporteService.SMTP_USER
-        msg["To"] = ", ".join(destinatarios)
-        msg["Subject"] = f"Reporte de pagos pendientes {hoy.month:02d}-{hoy.year}"
+        #Encolar el correo; lo envía el job de la bandeja de salida
+        asunto = f"Reporte de pagos pendientes {hoy.month:02d}-{hoy.year}"
         cuerpo = f"""
         Estimados/as,
 
@@ -158,24 +150,141 @@ class ReporteService:
         Saludos,
         Sistema de Arrendamientos
         """
-        msg.attach(MIMEText(cuerpo, "plain"))
-        #Adjuntar PDF
         filename = f"reporte_pagos_pendientes_{hoy.month}-{hoy.year}.pdf"
-        adjunto = MIMEApplication(buffer.read(), _subtype="pdf")
-        adjunto.add_header("Content-Disposition", "attachment", filename=filename)
-        msg.attach(adjunto)
-        #Enviar correo
-        try:
-            with smtplib.SMTP(ReporteService.SMTP_SERVER, ReporteService.SMTP_PORT) as server:
-                server.starttls()
-                server.login(ReporteService.SMTP_USER, ReporteService.SMTP_PASS)
-                server.sendmail(ReporteService.SMTP_USER, destinatarios, msg.as_string())
-            print(f"✅ Reporte de pagos enviados a {len(destinatarios)} destinatarios.")
-        except Exception as e:
-            print(f"❌ Error al enviar el correo: {e}")
+        with buffer:
+            CorreoService.encolar(db, destinatarios, asunto, cuerpo, buffer.read(), filename)
+        print(f"✅ Reporte de pagos encolado para {len(destinatarios)} destinatarios.")
+
+    @staticmethod
+    def obtener_reporte_mensual_pdf(db, anio: int, mes: int, progreso: Callable[[int, int], None] | None = None):
+        """
+        Obtiene el reporte mensual de pagos desde la caché de reportes, generándolo si no está
+        o si cambiaron los pagos, facturaciones o retenciones del mes.
+        Args:
+            db (Session): La sesión de la base de datos.
+            anio (int): El año del reporte.
+            mes (int): El mes del reporte.
+            progreso (Callable[[int, int], None] | None, optional): Recibe las secciones generadas y el total. Defaults to None.
+        Returns:
+            tuple[BinaryIO, bool]: El PDF y si se obtuvo de la caché.
+        """
+        huella = versionDatos.huella(db, {"pago": [(anio, mes)], "facturacion": [(anio, mes)], "retencion": [(anio, mes)]})
+        return CacheReportes.obtener_o_generar(
+            "mensual_pdf", {"anio": anio, "mes": mes}, huella,
+            lambda: ReporteService.generar_reporte_mensual_pdf(db, anio, mes, progreso=progreso)
+        )
+
+    @staticmethod
+    def obtener_reporte_facturacion_anual(db, anio_inicio: int, mes_inicio: int, cantidad_meses: int = 12, progreso: Callable[[int, int], None] | None = None):
+        """
+        Obtiene el reporte de facturación anual desde la caché de reportes, generándolo si no está
+        o si cambió la facturación de alguno de los meses del período.
+        Args:
+            db (Session): La sesión de la base de datos.
+            anio_inicio (int): El año de inicio del período fiscal.
+            mes_inicio (int): El mes de inicio del período fiscal.
+            cantidad_meses (int, optional): Cantidad de meses del período. Defaults to 12.
+            progreso (Callable[[int, int], None] | None, optional): Recibe las hojas generadas y el total. Defaults to None.
+        Returns:
+            tuple[BinaryIO, bool]: El Excel y si se obtuvo de la caché.
+        """
+        huella = versionDatos.huella(db, {"facturacion": ReporteService._meses_fiscales(anio_inicio, mes_inicio, cantidad_meses)})
+        return CacheReportes.obtener_o_generar(
+            "facturacion_anual_excel", {"anio": anio_inicio, "mes": mes_inicio, "cantidad_meses": cantidad_meses}, huella,
+            lambda: ReporteService.generar_reporte_facturacion_anual(db, anio_inicio, mes_inicio, cantidad_meses, progreso)
+        )
 
     @staticmethod
-    def generar_reporte_mensual_pdf(db, anio: int, mes: int, logo_path: str = None):
+    def obtener_reporte_pagos_pendientes_pdf(db, anio: int, mes: int, progreso: Callable[[int, int], None] | None = None):
+        """
+        Obtiene el reporte de pagos pendientes desde la caché de reportes, generándolo si no está
+        o si cambiaron los pagos del mes o los precios usados para el precio guía.
+        El precio guía depende del día en que se genera, por eso la fecha actual forma parte de la clave.
+        Args:
+            db (Session): La sesión de la base de datos.
+            anio (int): El año del reporte.
+            mes (int): El mes del reporte.
+            progreso (Callable[[int, int], None] | None, optional): Recibe las secciones generadas y el total. Defaults to None.
+        Returns:
+            tuple[BinaryIO, bool]: El PDF y si se obtuvo de la caché.
+        """
+        hoy = date.today()
+        mes_anterior, _ = rango_mes(hoy.year, hoy.month)
+        mes_anterior = mes_anterior - timedelta(days=1)
+        huella = versionDatos.huella(db, {
+            "pago": [(anio, mes)],
+            "precio": [(mes_anterior.year, mes_anterior.month), (hoy.year, hoy.month)]
+        })
+        return CacheReportes.obtener_o_generar(
+            "pagos_pendientes_pdf", {"anio": anio, "mes": mes, "hoy": hoy}, huella,
+            lambda: ReporteService.generar_reporte_pagos_pendientes_pdf(db, anio, mes, progreso=progreso)
+        )
+
+    @staticmethod
+    def _datos_reporte_mensual(db, fecha_inicio: date, fecha_fin: date):
+        """
+        Obtiene en una sola consulta ordenada los pagos REALIZADOS de un período, con su facturación y
+        retención, junto con los totales por arrendatario calculados en la base de datos con funciones de ventana.
+        Los arrendatarios sin pagos en el período también se devuelven, sin filas.
+        Args:
+            db (Session): La sesión de la base de datos.
+            fecha_inicio (date): Primer día del período.
+            fecha_fin (date): Primer día posterior al período.
+        Yields:
+            tuple[str, list[Row], Row]: Razón social del arrendatario, sus filas y la fila con los totales.
+        """
+        pagos = (
+            select(
+                Arrendamiento.arrendatario_id,
+                Pago.id.label("pago_id"),
+                Pago.vencimiento,
+                Pago.quintales,
+                Pago.porcentaje,
+                Pago.monto_a_pagar,
+                Arrendador.nombre_o_razon_social.label("nombre_arrendador"),
+                Facturacion.id.label("facturacion_id"),
+                Facturacion.monto_facturacion,
+                Facturacion.tipo_factura,
+                Retencion.id.label("retencion_id"),
+                Retencion.total_retencion
+            )
+            .join(Arrendamiento, Arrendamiento.id == Pago.arrendamiento_id)
+            .join(ParticipacionArrendador, ParticipacionArrendador.id == Pago.participacion_arrendador_id)
+            .join(Arrendador, Arrendador.id == ParticipacionArrendador.arrendador_id)
+            .outerjoin(Facturacion, Facturacion.pago_id == Pago.id)
+            .outerjoin(Retencion, Retencion.facturacion_id == Facturacion.id)
+            .where(Pago.vencimiento >= fecha_inicio, Pago.vencimiento < fecha_fin, Pago.estado == EstadoPago.REALIZADO)
+            .subquery()
+        )
+        por_arrendatario = {"partition_by": Arrendatario.id}
+        consulta = (
+            select(
+                Arrendatario.id.label("arrendatario_id"),
+                Arrendatario.razon_social,
+                pagos.c.pago_id,
+                pagos.c.vencimiento,
+                pagos.c.quintales,
+                pagos.c.porcentaje,
+                pagos.c.monto_a_pagar,
+                pagos.c.nombre_arrendador,
+                pagos.c.monto_facturacion,
+                pagos.c.tipo_factura,
+                pagos.c.total_retencion,
+                func.sum(pagos.c.quintales).over(**por_arrendatario).label("total_quintales"),
+                func.sum(pagos.c.monto_a_pagar).over(**por_arrendatario).label("total_pagos"),
+                func.sum(pagos.c.total_retencion).over(**por_arrendatario).label("total_retenciones"),
+                func.sum(pagos.c.monto_facturacion).over(**por_arrendatario).label("total_facturas")
+            )
+            .outerjoin(pagos, pagos.c.arrendatario_id == Arrendatario.id)
+            .order_by(Arrendatario.id, pagos.c.vencimiento, pagos.c.nombre_arrendador, pagos.c.pago_id, pagos.c.facturacion_id, pagos.c.retencion_id)
+        )
+        for _, grupo in groupby(db.execute(consulta), key=attrgetter("arrendatario_id")):
+            filas = list(grupo)
+            # Un arrendatario sin pagos llega como una única fila con las columnas del pago nulas
+            yield filas[0].razon_social, [f for f in filas if f.pago_id is not None], filas[0]
+
+    @staticmethod
+    def generar_reporte_mensual_pdf(db, anio: int, mes: int, logo_path: str = None, progreso: Callable[[int, int], None] | None = None):
         """
         Genera un reporte PDF de los pagos REALIZADOS en un mes y año específicos,
         agrupado por arrendatario.
@@ -184,6 +293,8 @@ class ReporteService:
             anio (int): El año del reporte.
             mes (int): El mes del reporte.
             logo_path (str, optional): Ruta al archivo de logo. Defaults to None.
+            progreso (Callable[[int, int], None] | None, optional): Recibe las secciones (arrendatarios) dibujadas
+                y el total. Defaults to None.
         Returns:
             io.BytesIO: Un buffer en memoria con el contenido del PDF.
         """
@@ -202,251 +313,223 @@ class ReporteService:
             )
         BASE_DIR = Path(__file__).resolve().parent.parent
         logo_path = BASE_DIR / "util" / "logo.png"
-        fecha_inicio = date(anio, mes, 1)
-        fecha_fin = date(anio + (mes // 12), (mes % 12) + 1, 1)
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=landscape(A4),
-            rightMargin=1 * cm,
-            leftMargin=1 * cm,
-            topMargin=2.5 * cm,
-            bottomMargin=1 * cm,
-        )
-        elements = []
-        styles = getSampleStyleSheet()
-        arrendatarios = db.query(Arrendatario).all()
-        for idx, arr in enumerate(arrendatarios):
-            titulo = Paragraph(f"<b>Arrendatario: {arr.razon_social}</b>", styles["Heading2"])
-            elements.append(titulo)
-            elements.append(Spacer(1, 0.5 * cm))
+        fecha_inicio, fecha_fin = rango_mes(anio, mes)
+        secciones = []
+        for razon_social, filas, totales in ReporteService._datos_reporte_mensual(db, fecha_inicio, fecha_fin):
             data = [["Arrendador", "Vencimiento", "Quintales / Porcentaje", "Monto a Pagar Arrendador", "Retención", "Monto Factura", "Tipo Factura"]]
-            total_pagos = 0
-            total_retenciones = 0
-            total_facturas = 0
-            total_quintales = 0
-            # Join completo para evitar duplicados
-            resultados = (
-                db.query(Pago, ParticipacionArrendador, Arrendador, Facturacion, Retencion)
-                .join(ParticipacionArrendador, Pago.participacion_arrendador_id == ParticipacionArrendador.id)
-                .join(Arrendador, Arrendador.id == ParticipacionArrendador.arrendador_id)
-                .outerjoin(Facturacion, Facturacion.pago_id == Pago.id)
-                .outerjoin(Retencion, Retencion.facturacion_id == Facturacion.id)
-                .filter(Pago.arrendamiento.has(arrendatario_id=arr.id))
-                .filter(Pago.vencimiento >= fecha_inicio, Pago.vencimiento < fecha_fin, Pago.estado == "REALIZADO")
-                .all()
-            )
-            processed_rows = set()  # (pago_id, arrendador_id, facturacion_id, retencion_id)
-            for pago, participacion, arrendador, fac, ret in resultados:
-                pago_id = getattr(pago, "id", id(pago))
-                arr_id = getattr(arrendador, "id", id(arrendador))
-                fac_id = getattr(fac, "id", None)
-                ret_id = getattr(ret, "id", None)
-                row_key = (pago_id, arr_id, fac_id, ret_id)
-                if row_key in processed_rows:
-                    continue
-                processed_rows.add(row_key)
+            for fila in filas:
                 # Quintales / Porcentaje
-                if getattr(pago, "quintales", None) is not None:
-                    quintales_val = float(pago.quintales)
-                    valor_quintales_row = f"{quintales_val:.2f} qq"
-                    try:
-                        total_quintales += float(pago.quintales)
-                    except Exception:
-                        pass
-                elif getattr(pago, "porcentaje", None) is not None:
-                    valor_quintales_row = f"{pago.porcentaje}%"
+                if fila.quintales is not None:
+                    valor_quintales_row = f"{float(fila.quintales):.2f} qq"
+                elif fila.porcentaje is not None:
+                    valor_quintales_row = f"{fila.porcentaje}%"
                 else:
                     valor_quintales_row = "-"
-                nombre_arrendador = arrendador.nombre_o_razon_social if arrendador else "-"
-                monto_pago = pago.monto_a_pagar or 0
-                total_pagos += monto_pago
-                monto_factura = fac.monto_facturacion if fac else "-"
-                if fac:
-                    total_facturas += fac.monto_facturacion or 0
-                retencion_valor = ret.total_retencion if ret else "-"
-                if ret:
-                    total_retenciones += ret.total_retencion or 0
-                tipo_factura = fac.tipo_factura.name if fac else "-"
                 data.append([
-                    nombre_arrendador,
-                    formato_fecha(pago.vencimiento),
+                    fila.nombre_arrendador,
+                    formato_fecha(fila.vencimiento),
                     valor_quintales_row,
-                    formato_moneda(monto_pago),
-                    formato_moneda(retencion_valor) if retencion_valor != "-" else "-",
-                    formato_moneda(monto_factura) if monto_factura != "-" else "-",
-                    tipo_factura
+                    formato_moneda(fila.monto_a_pagar or 0),
+                    formato_moneda(fila.total_retencion) if fila.total_retencion is not None else "-",
+                    formato_moneda(fila.monto_facturacion) if fila.monto_facturacion is not None else "-",
+                    fila.tipo_factura.name if fila.tipo_factura is not None else "-"
                 ])
             if len(data) == 1:
                 data.append(["-", "-", "-", "-", "-", "-", "-"])
             else:
-                total_quintales_str = f"{total_quintales:.2f} qq" if total_quintales else "-"
                 data.append([
                     "TOTAL",
                     "-",
-                    total_quintales_str,
-                    formato_moneda(total_pagos),
-                    formato_moneda(total_retenciones) if total_retenciones else "-",
-                    formato_moneda(total_facturas) if total_facturas else "-",
+                    f"{float(totales.total_quintales):.2f} qq" if totales.total_quintales else "-",
+                    formato_moneda(totales.total_pagos or 0),
+                    formato_moneda(totales.total_retenciones) if totales.total_retenciones else "-",
+                    formato_moneda(totales.total_facturas) if totales.total_facturas else "-",
                     "-"
                 ])
             # Mantener márgenes, no estirar tabla
             table_widths = [6 * cm, 4 * cm, 3.5 * cm, 4 * cm, 4 * cm, 4 * cm, 4 * cm]
-            table = Table(data, colWidths=table_widths)
-            table.setStyle(TableStyle([
-                ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                ("FONTNAME", (0, 0), (-1, 0), "Times-Roman"),
-                ("FONTSIZE", (0, 0), (-1, -1), 10),
-                ("BOTTOMPADDING", (0, 0), (-1, 0), 10),
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-                ("FONTNAME", (0, -1), (-1, -1), "Times-Roman"),
-                ("BACKGROUND", (0, -1), (-1, -1), colors.lightgrey),
-            ]))
-            elements.append(table)
-            if idx < len(arrendatarios) - 1:
-                elements.append(PageBreak())
-        def encabezado(canvas, doc):
-            canvas.saveState()
-            titulo_texto = f"Reporte de pagos {mes:02d}-{anio}"
-            canvas.setFont("Times-BoldItalic", 20)
-            canvas.drawCentredString(landscape(A4)[0] / 2, landscape(A4)[1] - 1 * cm, titulo_texto)
-            if logo_path and os.path.exists(logo_path):
-                try:
-                    img = Image(logo_path, width=5 * cm, height=2 * cm)
-                    img.drawOn(canvas, landscape(A4)[0] - 6 * cm, landscape(A4)[1] - 2.5 * cm)
-                except Exception:
-                    pass
-            canvas.restoreState()
-        doc.build(elements, onFirstPage=encabezado, onLaterPages=encabezado)
-        buffer.seek(0)
-        return buffer
+            secciones.append(SeccionPdf(f"<b>Arrendatario: {razon_social}</b>", data, table_widths))
+        return generar_pdf_secciones(f"Reporte de pagos {mes:02d}-{anio}", logo_path, secciones, progreso)
 
     @staticmethod
-    def generar_reporte_facturacion_anual(db, anio_inicio: int, mes_inicio: int):
+    def _meses_fiscales(anio_inicio: int, mes_inicio: int, cantidad_meses: int = 12) -> list[tuple[int, int]]:
         """
-        Genera un reporte en Excel de la facturación de un período fiscal de 12 meses, agrupado
-        por arrendatario en cada una de las hojas.
+        Calcula los meses de un período fiscal.
         Args:
-            db (Session): La sesión de la base de datos.
             anio_inicio (int): El año de inicio del período fiscal.
             mes_inicio (int): El mes de inicio del período fiscal.
+            cantidad_meses (int, optional): Cantidad de meses del período. Defaults to 12.
         Returns:
-            io.BytesIO: Un buffer en memoria con el contenido del Excel.
+            list[tuple[int, int]]: Los (año, mes) del período, en orden.
         """
-        wb = Workbook()
-        wb.remove(wb.active)
-        # Calcular los 12 meses fiscales
         meses = []
         anio = anio_inicio
         mes = mes_inicio
-        for _ in range(12):
+        for _ in range(cantidad_meses):
             meses.append((anio, mes))
             mes += 1
             if mes == 13:
                 mes = 1
                 anio += 1
-        # Estilos
-        bold_font = Font(bold=True)
-        thin_border = Border(
-            left=Side(style="thin"),
-            right=Side(style="thin"),
-            top=Side(style="thin"),
-            bottom=Side(style="thin")
-        )
+        return meses
+
+    @staticmethod
+    def _datos_facturacion_anual(db, meses: list[tuple[int, int]]):
+        """
+        Obtiene los datos del reporte de facturación anual con una consulta por tipo de dato:
+        los arrendatarios, los pares arrendatario-arrendador con participaciones y la suma facturada
+        agrupada por arrendatario, arrendador y mes de todo el período.
+        Args:
+            db (Session): La sesión de la base de datos.
+            meses (list[tuple[int, int]]): Los (año, mes) del período, en orden.
+        Returns:
+            tuple: Los arrendatarios, un dict arrendatario_id -> [(arrendador_id, nombre)] ordenado por nombre
+            y un dict (arrendatario_id, arrendador_id) -> {(año, mes): suma}.
+        """
         arrendatarios = db.query(Arrendatario).all()
-        for arr in arrendatarios:
+
+        arrendadores_por_arrendatario = {}
+        pares = (
+            db.query(Arrendamiento.arrendatario_id, Arrendador.id, Arrendador.nombre_o_razon_social)
+            .join(ParticipacionArrendador, ParticipacionArrendador.arrendamiento_id == Arrendamiento.id)
+            .join(Arrendador, Arrendador.id == ParticipacionArrendador.arrendador_id)
+            .distinct()
+            .order_by(Arrendamiento.arrendatario_id, Arrendador.nombre_o_razon_social, Arrendador.id)
+        )
+        for arrendatario_id, arrendador_id, nombre in pares:
+            arrendadores_por_arrendatario.setdefault(arrendatario_id, []).append((arrendador_id, nombre))
+
+        inicio, _ = rango_mes(*meses[0])
+        _, fin = rango_mes(*meses[-1])
+        anio_factura = extract("year", Facturacion.fecha_facturacion)
+        mes_factura = extract("month", Facturacion.fecha_facturacion)
+        filas = (
+            db.query(
+                Arrendamiento.arrendatario_id,
+                ParticipacionArrendador.arrendador_id,
+                anio_factura,
+                mes_factura,
+                func.sum(Facturacion.monto_facturacion)
+            )
+            .join(Pago, Facturacion.pago_id == Pago.id)
+            .join(ParticipacionArrendador, Pago.participacion_arrendador_id == ParticipacionArrendador.id)
+            .join(Arrendamiento, Pago.arrendamiento_id == Arrendamiento.id)
+            .filter(Facturacion.fecha_facturacion >= inicio, Facturacion.fecha_facturacion < fin)
+            .group_by(Arrendamiento.arrendatario_id, ParticipacionArrendador.arrendador_id, anio_factura, mes_factura)
+        )
+        sumas = {}
+        for arrendatario_id, arrendador_id, anio, mes, suma in filas:
+            sumas.setdefault((arrendatario_id, arrendador_id), {})[(int(anio), int(mes))] = suma or 0
+        return arrendatarios, arrendadores_por_arrendatario, sumas
+
+    @staticmethod
+    def generar_reporte_facturacion_anual(db, anio_inicio: int, mes_inicio: int, cantidad_meses: int = 12, progreso: Callable[[int, int], None] | None = None):
+        """
+        Genera un reporte en Excel de la facturación de un período fiscal (12 meses por defecto),
+        agrupado por arrendatario en cada una de las hojas.
+        Usa el modo de solo escritura de openpyxl con estilos con nombre: las filas se agregan en una
+        sola pasada, acumulando los totales, y el libro se escribe a un archivo temporal que solo
+        pasa a disco si supera EXCEL_MAX_MEMORIA, por lo que la memoria no crece con el tamaño del reporte.
+        Args:
+            db (Session): La sesión de la base de datos.
+            anio_inicio (int): El año de inicio del período fiscal.
+            mes_inicio (int): El mes de inicio del período fiscal.
+            cantidad_meses (int, optional): Cantidad de meses del período. Defaults to 12.
+            progreso (Callable[[int, int], None] | None, optional): Recibe las hojas (arrendatarios) generadas
+                y el total. Defaults to None.
+        Returns:
+            SpooledTemporaryFile: Un archivo temporal, posicionado al inicio, con el contenido del Excel.
+        """
+        wb = Workbook(write_only=True)
+        for estilo in ReporteService._estilos_excel():
+            wb.add_named_style(estilo)
+        meses = ReporteService._meses_fiscales(anio_inicio, mes_inicio, cantidad_meses)
+        columnas = len(meses) + 2
+        celda = ReporteService._celda_excel
+        arrendatarios, arrendadores_por_arrendatario, sumas = ReporteService._datos_facturacion_anual(db, meses)
+        for hechas, arr in enumerate(arrendatarios):
+            if progreso:
+                progreso(hechas, len(arrendatarios))
             sheet_title = arr.razon_social.replace("/", "-").replace("\\", "-")[:25]
             ws = wb.create_sheet(title=sheet_title)
+            #Anchos de columnas: en modo de solo escritura se definen antes de agregar filas
+            ws.column_dimensions["A"].width = 35
+            for c in range(2, columnas + 1):
+                ws.column_dimensions[get_column_letter(c)].width = 15
             #Título
-            ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=len(meses) + 2)
-            titulo = ws.cell(row=1, column=1, value=f"Reporte de facturación anual - Arrendatario: {arr.razon_social}")
-            titulo.font = Font(bold=True, size=14)
-            titulo.alignment = Alignment(horizontal="center", vertical="center")
+            ws.merged_cells.add(CellRange(min_col=1, min_row=1, max_col=columnas, max_row=1))
+            ws.append([celda(ws, f"Reporte de facturación anual - Arrendatario: {arr.razon_social}", "titulo")])
+            ws.append([])
             #Cabecera de la tabla
-            ws.cell(row=3, column=1, value="Arrendador").font = bold_font
-            for col_idx, (a, m) in enumerate(meses, start=2):
-                ws.cell(row=3, column=col_idx, value=f"{m:02d}-{a}").font = bold_font
-            ws.cell(row=3, column=len(meses) + 2, value="TOTAL").font = bold_font
-            #Buscar arrendadores relacionados
-            arrendadores = (
-                db.query(Arrendador)
-                .join(ParticipacionArrendador, ParticipacionArrendador.arrendador_id == Arrendador.id)
-                .join(Arrendamiento, Arrendamiento.id == ParticipacionArrendador.arrendamiento_id)
-                .filter(Arrendamiento.arrendatario_id == arr.id)
-                .distinct() 
-                .all()
+            ws.append(
+                [celda(ws, "Arrendador", "encabezado")]
+                + [celda(ws, f"{m:02d}-{a}", "encabezado") for a, m in meses]
+                + [celda(ws, "TOTAL", "encabezado")]
             )
+            arrendadores = arrendadores_por_arrendatario.get(arr.id, [])
             if not arrendadores:
-                ws.cell(row=4, column=1, value="-")
-                for col_idx in range(2, len(meses) + 3):
-                    ws.cell(row=4, column=col_idx, value=0).number_format = '#,##0.00'
-            else:
-                for row_idx, arrendador in enumerate(arrendadores, start=4):
-                    ws.cell(row=row_idx, column=1, value=arrendador.nombre_o_razon_social).font = bold_font
-                    total_arrendador = 0
-                    for col_idx, (a, m) in enumerate(meses, start=2):
-                        inicio = date(a, m, 1)
-                        fin = date(a + (m // 12), (m % 12) + 1, 1)
-                        suma_mes = (
-                            db.query(func.sum(Facturacion.monto_facturacion))
-                            .join(Pago, Facturacion.pago_id == Pago.id)
-                            .join(ParticipacionArrendador, Pago.participacion_arrendador_id == ParticipacionArrendador.id)
-                            .join(Arrendamiento, Pago.arrendamiento_id == Arrendamiento.id) # Join explícito
-                            .filter(
-                                Arrendamiento.arrendatario_id == arr.id, # Filtro por arrendatario
-                                ParticipacionArrendador.arrendador_id == arrendador.id, # Filtro por arrendador
-                                Facturacion.fecha_facturacion >= inicio, 
-                                Facturacion.fecha_facturacion < fin      
-                            )
-                            .scalar() or 0
-                        )
-                        total_arrendador += suma_mes
-                        cell = ws.cell(row=row_idx, column=col_idx, value=suma_mes)
-                        cell.number_format = '#,##0.00'
-                        if suma_mes == 0:
-                            cell.value = 0
-                    total_cell = ws.cell(row=row_idx, column=len(meses) + 2, value=total_arrendador)
-                    total_cell.font = bold_font
-                    total_cell.number_format = '#,##0.00'
-                    if total_arrendador == 0:
-                        total_cell.value = 0
-                total_row = len(arrendadores) + 4
-                ws.cell(row=total_row, column=1, value="TOTAL").font = bold_font
-                for col_idx in range(2, len(meses) + 3):
-                    col_sum = sum(ws.cell(row=r, column=col_idx).value or 0 for r in range(4, total_row))
-                    col_sum_cell = ws.cell(row=total_row, column=col_idx, value=col_sum)
-                    col_sum_cell.font = bold_font
-                    col_sum_cell.number_format = '#,##0.00'
-                    if col_sum == 0:
-                        col_sum_cell.value = 0
-            #Bordes y alineación
-            max_row = ws.max_row
-            max_col = len(meses) + 2 
-            for r in range(3, max_row + 1):
-                for c in range(1, max_col + 1):
-                    cell = ws.cell(row=r, column=c)
-                    cell.border = thin_border
-                    if c == 1:
-                        cell.alignment = Alignment(horizontal="center", vertical="center")
-                    else:
-                        cell.alignment = Alignment(horizontal="center", vertical="center")
-            #Ajustar anchos de columnas
-            for c in range(1, max_col + 1):
-                col_letter = get_column_letter(c)
-                if c == 1:
-                    ws.column_dimensions[col_letter].width = 35  
-                else:
-                    ws.column_dimensions[col_letter].width = 15
-        #Guardar en memoria
-        buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-        return buffer
+                ws.append([celda(ws, "-", "celda")] + [celda(ws, 0, "monto") for _ in range(columnas - 1)])
+                continue
+            totales_columnas = [0] * (columnas - 1)
+            for arrendador_id, nombre_arrendador in arrendadores:
+                sumas_arrendador = sumas.get((arr.id, arrendador_id), {})
+                valores = [sumas_arrendador.get(periodo, 0) for periodo in meses]
+                valores.append(sum(valores))
+                for i, valor in enumerate(valores):
+                    totales_columnas[i] += valor
+                ws.append(
+                    [celda(ws, nombre_arrendador, "encabezado")]
+                    + [celda(ws, valor, "monto") for valor in valores[:-1]]
+                    + [celda(ws, valores[-1], "monto_total")]
+                )
+            ws.append([celda(ws, "TOTAL", "encabezado")] + [celda(ws, total, "monto_total") for total in totales_columnas])
+        archivo = tempfile.SpooledTemporaryFile(max_size=ReporteService.EXCEL_MAX_MEMORIA)
+        wb.save(archivo)
+        archivo.seek(0)
+        return archivo
+
+    @staticmethod
+    def _estilos_excel() -> list[NamedStyle]:
+        """
+        Crea los estilos con nombre del reporte de facturación. Se registran una vez por libro y
+        cada celda solo guarda la referencia al estilo.
+        Returns:
+            list[NamedStyle]: Los estilos titulo, encabezado, celda, monto y monto_total.
+        """
+        borde = Border(
+            left=Side(style="thin"),
+            right=Side(style="thin"),
+            top=Side(style="thin"),
+            bottom=Side(style="thin")
+        )
+        centrado = Alignment(horizontal="center", vertical="center")
+        #Fuente por defecto del libro: un estilo con nombre sin fuente explícita queda sin tamaño
+        normal = Font(name="Calibri", size=11)
+        return [
+            NamedStyle(name="titulo", font=Font(bold=True, size=14), alignment=centrado),
+            NamedStyle(name="encabezado", font=Font(bold=True), border=borde, alignment=centrado),
+            NamedStyle(name="celda", font=normal, border=borde, alignment=centrado),
+            NamedStyle(name="monto", font=normal, border=borde, alignment=centrado, number_format="#,##0.00"),
+            NamedStyle(name="monto_total", font=Font(bold=True), border=borde, alignment=centrado, number_format="#,##0.00"),
+        ]
+
+    @staticmethod
+    def _celda_excel(ws, valor, estilo: str) -> WriteOnlyCell:
+        """
+        Crea una celda de una hoja de solo escritura con un estilo con nombre.
+        Args:
+            ws (WriteOnlyWorksheet): La hoja.
+            valor: El valor de la celda.
+            estilo (str): El nombre del estilo registrado en el libro.
+        Returns:
+            WriteOnlyCell: La celda lista para agregar a una fila.
+        """
+        celda = WriteOnlyCell(ws, value=valor)
+        celda.style = estilo
+        return celda
 
     @staticmethod
-    def generar_reporte_pagos_pendientes_pdf(db, anio: int, mes: int, logo_path: str = None):
+    def generar_reporte_pagos_pendientes_pdf(db, anio: int, mes: int, logo_path: str = None, progreso: Callable[[int, int], None] | None = None):
         """
         Genera un reporte PDF de los pagos PENDIENTES o VENCIDOS para un mes y año.
         Args:
@@ -454,6 +537,8 @@ class ReporteService:
             anio (int): El año del reporte.
             mes (int): El mes del reporte.
             logo_path (str, optional): Ruta al archivo de logo. Defaults to None.
+            progreso (Callable[[int, int], None] | None, optional): Recibe las secciones (arrendatarios) dibujadas
+                y el total. Defaults to None.
         Returns:
             io.BytesIO: Un buffer en memoria con el contenido del PDF.
         """
@@ -466,8 +551,7 @@ class ReporteService:
             )
         BASE_DIR = Path(__file__).resolve().parent.parent
         logo_path = BASE_DIR / "util" / "logo.png"
-        fecha_inicio = date(anio, mes, 1)
-        fecha_fin = date(anio + (mes // 12), (mes % 12) + 1, 1)
+        fecha_inicio, fecha_fin = rango_mes(anio, mes)
         
         hoy = date.today()
         if hoy.day <= 5 and hoy.month != 1:
@@ -476,44 +560,17 @@ class ReporteService:
             primer_dia_mes_actual = date(hoy.year -1, 12, 1)
         else:
             primer_dia_mes_actual = date(hoy.year, hoy.month, 1)
-        precios_mes_actual = db.query(Precio.precio_obtenido).filter(
-            Precio.fecha_precio >= primer_dia_mes_actual,
-            Precio.fecha_precio <= hoy,
-            Precio.origen == "BCR"
-        ).all()
-        if precios_mes_actual:
-            precio_guia_mes = (sum([p[0] for p in precios_mes_actual]) / len(precios_mes_actual)) / 10
+        promedio_bcr = PrecioPromedioService.promedio_meses(db, TipoOrigenPrecio.BCR, primer_dia_mes_actual, hoy)
+        if promedio_bcr is not None:
+            precio_guia_mes = promedio_bcr / 10
         else:
             precio_guia_mes = 0
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=landscape(A4),
-            rightMargin=1 * cm,
-            leftMargin=1 * cm,
-            topMargin=2.5 * cm,
-            bottomMargin=1 * cm,
-        )
-        elements = []
-        styles = getSampleStyleSheet()
+        # Nota aclaratoria al final de cada hoja
+        nota = f'<font size="9" color="grey"><i>Nota: Los montos marcados con (*) se calcularon usando precio guía de BCR {formato_moneda(precio_guia_mes)} (promedio del mes {primer_dia_mes_actual.month}/{primer_dia_mes_actual.year}).</i></font>'
+        secciones = []
         # Traer arrendatarios
         arrendatarios = db.query(Arrendatario).all()
-        # Estilo tabla centralizado
-        table_style = TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-            ("FONTNAME", (0, 0), (-1, 0), "Times-Roman"),
-            ("FONTSIZE", (0, 0), (-1, -1), 10),
-            ("BOTTOMPADDING", (0, 0), (-1, 0), 10),
-            ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-            ("FONTNAME", (0, -1), (-1, -1), "Times-Roman"),
-            ("BACKGROUND", (0, -1), (-1, -1), colors.lightgrey),
-        ])
-        for idx, arr in enumerate(arrendatarios):
-            titulo = Paragraph(f"<b>Arrendatario: {arr.razon_social}</b>", styles["Heading2"])
-            elements.append(titulo)
-            elements.append(Spacer(1, 0.5 * cm))
+        for arr in arrendatarios:
             # Encabezado de tabla
             data = [["Arrendador", "Vencimiento", "Quintales / Porcentaje", "Monto a Pagar", "Consulta precio de", "Tiene Retención"]]
             total_pagos = Decimal("0.0")
@@ -594,37 +651,13 @@ class ReporteService:
                     "-",
                     "-"
                 ])
-            table = Table(
+            secciones.append(SeccionPdf(
+                f"<b>Arrendatario: {arr.razon_social}</b>",
                 data,
-                colWidths=[7 * cm, 4 * cm, 4 * cm, 6 * cm, 4 * cm, 4 * cm]
-            )
-            table.setStyle(table_style)
-            elements.append(table)
-            # Nota aclaratoria al final de cada hoja
-            nota = Paragraph(
-                f'<font size="9" color="grey"><i>Nota: Los montos marcados con (*) se calcularon usando precio guía de BCR {formato_moneda(precio_guia_mes)} (promedio del mes {primer_dia_mes_actual.month}/{primer_dia_mes_actual.year}).</i></font>',
-                styles["Normal"]
-            )
-            elements.append(Spacer(1, 0.4 * cm))
-            elements.append(nota)
-            if idx < len(arrendatarios) - 1:
-                elements.append(PageBreak())
-        # ---- Encabezado con título + logo ----
-        def encabezado(canvas, doc):
-            canvas.saveState()
-            titulo_texto = f"Reporte de pagos pendientes {mes:02d}-{anio}"
-            canvas.setFont("Times-BoldItalic", 20)
-            canvas.drawCentredString(landscape(A4)[0] / 2, landscape(A4)[1] - 1 * cm, titulo_texto)
-            if logo_path and os.path.exists(logo_path):
-                try:
-                    img = Image(logo_path, width=5 * cm, height=2 * cm)
-                    img.drawOn(canvas, landscape(A4)[0] - 6 * cm, landscape(A4)[1] - 2.5 * cm)
-                except Exception:
-                    pass
-            canvas.restoreState()
-        doc.build(elements, onFirstPage=encabezado, onLaterPages=encabezado)
-        buffer.seek(0)
-        return buffer
+                [7 * cm, 4 * cm, 4 * cm, 6 * cm, 4 * cm, 4 * cm],
+                nota
+            ))
+        return generar_pdf_secciones(f"Reporte de pagos pendientes {mes:02d}-{anio}", logo_path, secciones, progreso)
 
     @staticmethod
     def generar_reporte_por_arrendador_pdf(db, arrendador_id: int, fecha_inicio: date, fecha_fin: date, logo_path: str = None):
@@ -645,6 +678,106 @@ class ReporteService:
             raise HTTPException(status_code=404, detail="Arrendador no encontrado")
         if fecha_inicio > fecha_fin:
             raise HTTPException(status_code=422, detail="La fecha de inicio no puede ser mayor a la fecha de fin del reporte")
+        pagos_query = (
+            db.query(Pago)
+            .join(ParticipacionArrendador, Pago.participacion_arrendador_id == ParticipacionArrendador.id)
+            .filter(
+                ParticipacionArrendador.arrendador_id == arrendador_id,
+                Pago.vencimiento >= fecha_inicio,
+                Pago.vencimiento <= fecha_fin,
+                Pago.estado != "CANCELADO"
+            )
+            .order_by(Pago.vencimiento, Pago.id)
+            .all()
+        )
+        precio_guia = ReporteService._precio_guia_historial(db)
+        return ReporteService._pdf_historial_arrendador(arrendador, pagos_query, fecha_inicio, fecha_fin, precio_guia, logo_path)
+
+    @staticmethod
+    def generar_historiales_arrendadores_zip(db, fecha_inicio: date, fecha_fin: date):
+        """
+        Genera el historial de pagos en PDF de todos los arrendadores en un rango de fechas,
+        empaquetado en un ZIP con un archivo por arrendador.
+        Los pagos de todos los arrendadores se leen en una sola consulta y se reparten por arrendador,
+        y el precio guía se calcula una vez para todos los documentos. La consulta se hace al llamar al
+        método; los PDF se generan de a uno mientras se transmite el ZIP.
+        Args:
+            db (Session): La sesión de la base de datos.
+            fecha_inicio (date): La fecha de inicio del reporte.
+            fecha_fin (date): La fecha de fin del reporte.
+        Returns:
+            Iterator[bytes]: Los bloques del archivo ZIP.
+        Raises:
+            HTTPException: Si la fecha de inicio es mayor a la de fin (422).
+        """
+        if fecha_inicio > fecha_fin:
+            raise HTTPException(status_code=422, detail="La fecha de inicio no puede ser mayor a la fecha de fin del reporte")
+        arrendadores = db.query(Arrendador).order_by(Arrendador.nombre_o_razon_social).all()
+        pagos = (
+            db.query(Pago)
+            .join(Pago.participacion_arrendador)
+            .options(contains_eager(Pago.participacion_arrendador))
+            .filter(
+                Pago.vencimiento >= fecha_inicio,
+                Pago.vencimiento <= fecha_fin,
+                Pago.estado != "CANCELADO"
+            )
+            .order_by(ParticipacionArrendador.arrendador_id, Pago.vencimiento, Pago.id)
+            .all()
+        )
+        pagos_por_arrendador = {
+            arrendador_id: list(grupo)
+            for arrendador_id, grupo in groupby(pagos, key=lambda pago: pago.participacion_arrendador.arrendador_id)
+        }
+        precio_guia = ReporteService._precio_guia_historial(db)
+        def documentos():
+            for arrendador in arrendadores:
+                nombre = arrendador.nombre_o_razon_social.replace("/", "-").replace("\\", "-")
+                buffer = ReporteService._pdf_historial_arrendador(
+                    arrendador, pagos_por_arrendador.get(arrendador.id, []), fecha_inicio, fecha_fin, precio_guia
+                )
+                yield f"{arrendador.id:04d}_{nombre}.pdf", buffer
+        return zip_en_streaming(documentos())
+
+    @staticmethod
+    def _precio_guia_historial(db) -> tuple[Decimal, date]:
+        """
+        Calcula el precio guía con el que se estiman los montos de los pagos en quintales sin precio
+        en el historial de pagos de un arrendador: el promedio BCR del mes en curso, dividido por 10.
+        Args:
+            db (Session): La sesión de la base de datos.
+        Returns:
+            tuple[Decimal, date]: El precio guía y el primer día del mes promediado.
+        """
+        hoy = date.today()
+        if hoy.day <= 1 and hoy.month != 1:
+            primer_dia_mes_actual = date(hoy.year, hoy.month -1, 1)
+        elif hoy.day <= 1 and hoy.month == 1:
+            primer_dia_mes_actual = date(hoy.year -1, 12, 1)
+        else:
+            primer_dia_mes_actual = date(hoy.year, hoy.month, 1)
+        promedio_bcr = PrecioPromedioService.promedio_meses(db, TipoOrigenPrecio.BCR, primer_dia_mes_actual, hoy)
+        if promedio_bcr is not None:
+            precio_guia_mes = promedio_bcr / Decimal("10.0")
+        else:
+            precio_guia_mes = Decimal("0.0")
+        return precio_guia_mes, primer_dia_mes_actual
+
+    @staticmethod
+    def _pdf_historial_arrendador(arrendador: Arrendador, pagos_query: list[Pago], fecha_inicio: date, fecha_fin: date, precio_guia: tuple[Decimal, date], logo_path: str = None):
+        """
+        Dibuja el PDF del historial de pagos de un arrendador a partir de sus pagos ya consultados.
+        Args:
+            arrendador (Arrendador): El arrendador.
+            pagos_query (list[Pago]): Sus pagos del rango, ordenados por vencimiento.
+            fecha_inicio (date): La fecha de inicio del reporte.
+            fecha_fin (date): La fecha de fin del reporte.
+            precio_guia (tuple[Decimal, date]): El precio guía y el mes promediado (ver _precio_guia_historial).
+            logo_path (str, optional): Ruta al archivo de logo. Defaults to None.
+        Returns:
+            io.BytesIO: Un buffer en memoria con el contenido del PDF.
+        """
+        precio_guia_mes, primer_dia_mes_actual = precio_guia
         BASE_DIR = Path(__file__).resolve().parent.parent
         logo_path_default = BASE_DIR / "util" / "logo.png"
         logo_path = logo_path or logo_path_default
@@ -659,40 +792,11 @@ class ReporteService:
         )
         elements = []
         styles = getSampleStyleSheet()
-        hoy = date.today()
-        if hoy.day <= 1 and hoy.month != 1:
-            primer_dia_mes_actual = date(hoy.year, hoy.month -1, 1)
-        elif hoy.day <= 1 and hoy.month == 1:
-            primer_dia_mes_actual = date(hoy.year -1, 12, 1)
-        else:
-            primer_dia_mes_actual = date(hoy.year, hoy.month, 1)
-        precios_mes_actual = db.query(Precio.precio_obtenido).filter(
-            Precio.fecha_precio >= primer_dia_mes_actual,
-            Precio.fecha_precio <= hoy,
-            Precio.origen == "BCR"
-        ).all()
-        if precios_mes_actual:
-            suma_precios = sum([p[0] for p in precios_mes_actual])
-            precio_guia_mes = (suma_precios / Decimal(len(precios_mes_actual))) / Decimal("10.0")
-        else:
-            precio_guia_mes = Decimal("0.0")
         titulo = Paragraph(f"<b>Arrendador: {arrendador.nombre_o_razon_social}</b>", styles["Heading2"])
         elements.append(titulo)
         subtitulo_rango = f"Tabla de pagos del arrendador entre {formato_fecha(fecha_inicio)} y {formato_fecha(fecha_fin)}"
         elements.append(Paragraph(subtitulo_rango, styles["Normal"]))
         elements.append(Spacer(1, 0.5 * cm))
-        pagos_query = (
-            db.query(Pago)
-            .join(ParticipacionArrendador, Pago.participacion_arrendador_id == ParticipacionArrendador.id)
-            .filter(
-                ParticipacionArrendador.arrendador_id == arrendador_id,
-                Pago.vencimiento >= fecha_inicio,
-                Pago.vencimiento <= fecha_fin,
-                Pago.estado != "CANCELADO"
-            )
-            .order_by(Pago.vencimiento)
-            .all()
-        )
         data = [["N° Pago", "Estado", "Vencimiento", "Quintales / Porcentaje", "Monto", "Tiene Retención"]]
         total_pagos = Decimal("0.0")
         total_quintales = 0.0
@@ -4,14 +4,19 @@ from decimal import Decimal
 from sqlalchemy import asc
 from util.dbValidator import verificar_relaciones_existentes
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from enums.PlazoPago import PlazoPago
 from enums.TipoCondicion import TipoCondicion
 from services.ArrendadorService import ArrendadorService
 from services.ArrendamientoService import ArrendamientoService
+from services.PagoService import PagoService
 from model.Retencion import Retencion
-from dtos.RetencionDto import RetencionDto, RetencionDtoModificacion
+from model.Facturacion import Facturacion
+from model.Arrendador import Arrendador
+from model.Localidad import Localidad
+from dtos.RetencionDto import RetencionDto, RetencionDtoModificacion, RetencionDtoOut
+from util.streaming import filas_en_streaming, serializar_con
 from util.Configuracion import Configuracion
 class RetencionService:
     """
@@ -30,6 +35,25 @@ class RetencionService:
         """
         return db.query(Retencion).order_by(asc(Retencion.fecha_retencion)).all()
 
+    @staticmethod
+    def listar_todos_streaming():
+        """
+        Obtiene todas las retenciones, ordenadas por fecha, serializadas de a una a medida que se
+        leen con un cursor del lado del servidor.
+        Returns:
+            Iterator[dict]: Cada retención serializada como RetencionDtoOut.
+        """
+        facturacion = joinedload(Retencion.facturacion)
+        opciones = [
+            joinedload(Retencion.arrendador).joinedload(Arrendador.localidad).joinedload(Localidad.provincia),
+            facturacion.joinedload(Facturacion.arrendador).joinedload(Arrendador.localidad).joinedload(Localidad.provincia),
+            facturacion.joinedload(Facturacion.pago).options(*PagoService.opciones_carga_dto())
+        ]
+        return filas_en_streaming(
+            lambda db: db.query(Retencion).options(*opciones).order_by(asc(Retencion.fecha_retencion), asc(Retencion.id)),
+            serializar_con(RetencionDtoOut)
+        )
+
     @staticmethod
     def obtener_por_id(db: Session, retencion_id: int):
         """
@@ -0,0 +1,417 @@
+import hashlib
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from dtos.ReporteDto import TrabajoReporteDto, TrabajoReporteDtoOut
+from enums.EstadoTrabajoReporte import EstadoTrabajoReporte
+from enums.TipoReporte import TipoReporte
+from model.TrabajoReporte import TrabajoReporte
+from services.ReporteService import ReporteService
+from util.cacheReportes import CacheReportes
+from util.database import SessionBatch, engine_batch
+
+MEDIA_TYPE_PDF = "application/pdf"
+MEDIA_TYPE_EXCEL = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+ACTIVOS = (EstadoTrabajoReporte.PENDIENTE, EstadoTrabajoReporte.EN_PROCESO)
+
+class TrabajoReporteService:
+    """
+    Clase de servicio que genera reportes en segundo plano con un pool acotado de hilos por proceso.
+    Las solicitudes devuelven un identificador de trabajo cuyo estado se consulta hasta que el archivo
+    está listo para descargar. El estado vive en la tabla trabajo_reporte y los archivos en REPORTES_TRABAJOS_DIR,
+    que debe ser compartido entre los procesos de la API igual que la caché de reportes, así que cualquier
+    worker responde la consulta y la descarga. Las solicitudes idénticas mientras un trabajo está pendiente
+    o en proceso se unifican en ese mismo trabajo mediante la clave única clave_en_curso.
+    El progreso es el porcentaje de secciones del reporte generadas (arrendatarios del PDF u hojas del Excel);
+    el historial de un arrendador es un único documento y pasa de 0 a 100 al terminar.
+    El proceso que genera un trabajo lo marca como vivo cada REPORTES_TRABAJOS_LATIDO segundos; si deja de hacerlo
+    durante REPORTES_TRABAJOS_ABANDONO segundos el trabajo se da por fallido. Los trabajos terminados se conservan
+    REPORTES_TRABAJOS_TTL segundos.
+    """
+
+    MAX_HILOS = int(os.getenv("REPORTES_TRABAJOS_MAX", "2"))
+    MAX_COLA = int(os.getenv("REPORTES_TRABAJOS_COLA", "20"))
+    TTL = int(os.getenv("REPORTES_TRABAJOS_TTL", "3600"))
+    LATIDO = int(os.getenv("REPORTES_TRABAJOS_LATIDO", "30"))
+    ABANDONO = int(os.getenv("REPORTES_TRABAJOS_ABANDONO", "300"))
+    INTERVALO_PURGA = 60
+    INSTANCIA = f"{socket.gethostname()}:{os.getpid()}"
+    DIRECTORIO = Path(os.getenv("REPORTES_TRABAJOS_DIR", CacheReportes.DIRECTORIO / "trabajos"))
+
+    _executor = ThreadPoolExecutor(max_workers=MAX_HILOS, thread_name_prefix="reportes")
+    # Trabajos encolados en este proceso, solo para enviar su latido
+    _locales: set[str] = set()
+    _hilo_latido: threading.Thread | None = None
+    _ultima_purga = float("-inf")
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _parametros(dto: TrabajoReporteDto) -> dict:
+        """
+        Valida y extrae los parámetros que usa cada tipo de reporte.
+        Args:
+            dto (TrabajoReporteDto): La solicitud.
+        Returns:
+            dict: Los parámetros del reporte.
+        Raises:
+            HTTPException: Si faltan parámetros para el tipo de reporte (422).
+        """
+        if dto.tipo == TipoReporte.HISTORIAL_ARRENDADOR_PDF:
+            if dto.arrendador_id is None or dto.inicio is None or dto.fin is None:
+                raise HTTPException(status_code=422, detail="El historial de un arrendador requiere arrendador_id, inicio y fin.")
+            return {"arrendador_id": dto.arrendador_id, "inicio": dto.inicio, "fin": dto.fin}
+        if dto.anio is None or dto.mes is None:
+            raise HTTPException(status_code=422, detail="El reporte requiere anio y mes.")
+        if not 1 <= dto.mes <= 12:
+            raise HTTPException(status_code=422, detail="El mes debe estar entre 1 y 12.")
+        return {"anio": dto.anio, "mes": dto.mes}
+
+    @staticmethod
+    def _cargar_parametros(trabajo: TrabajoReporte) -> dict:
+        """
+        Lee los parámetros guardados de un trabajo, con las fechas del historial como date.
+        Args:
+            trabajo (TrabajoReporte): El trabajo.
+        Returns:
+            dict: Los parámetros del reporte.
+        """
+        parametros = json.loads(trabajo.parametros)
+        for campo in ("inicio", "fin"):
+            if campo in parametros:
+                parametros[campo] = date.fromisoformat(parametros[campo])
+        return parametros
+
+    @staticmethod
+    def _generar(db: Session, tipo: TipoReporte, parametros: dict, progreso: Callable[[int, int], None]):
+        """
+        Genera el reporte pedido, usando la caché de reportes cuando el tipo la tiene.
+        Args:
+            db (Session): La sesión de la base de datos.
+            tipo (TipoReporte): Reporte a generar.
+            parametros (dict): Parámetros del reporte.
+            progreso (Callable[[int, int], None]): Recibe las secciones generadas y el total.
+        Returns:
+            BinaryIO: El archivo del reporte, posicionado al inicio.
+        """
+        match tipo:
+            case TipoReporte.MENSUAL_PDF:
+                buffer, _ = ReporteService.obtener_reporte_mensual_pdf(db, parametros["anio"], parametros["mes"], progreso)
+            case TipoReporte.FACTURACION_EXCEL:
+                buffer, _ = ReporteService.obtener_reporte_facturacion_anual(db, parametros["anio"], parametros["mes"], progreso=progreso)
+            case TipoReporte.PAGOS_PENDIENTES_PDF:
+                buffer, _ = ReporteService.obtener_reporte_pagos_pendientes_pdf(db, parametros["anio"], parametros["mes"], progreso)
+            case TipoReporte.HISTORIAL_ARRENDADOR_PDF:
+                buffer = ReporteService.generar_reporte_por_arrendador_pdf(db, parametros["arrendador_id"], parametros["inicio"], parametros["fin"])
+        return buffer
+
+    @staticmethod
+    def _informar_progreso(trabajo_id: str) -> Callable[[int, int], None]:
+        """
+        Crea la función que guarda el progreso de un trabajo a medida que se generan las secciones del reporte.
+        Solo escribe cuando cambia el porcentaje, y como mucho 99: el 100 se guarda junto con el archivo.
+        Args:
+            trabajo_id (str): Identificador del trabajo.
+        Returns:
+            Callable[[int, int], None]: Función que recibe las secciones generadas y el total.
+        """
+        ultimo = -1
+
+        def informar(hechas: int, total: int):
+            nonlocal ultimo
+            porcentaje = min(99, hechas * 100 // total) if total else 0
+            if porcentaje == ultimo:
+                return
+            ultimo = porcentaje
+            try:
+                with engine_batch.begin() as conn:
+                    conn.execute(
+                        update(TrabajoReporte)
+                        .where(TrabajoReporte.id == trabajo_id)
+                        .values(progreso=porcentaje, actualizado=datetime.now())
+                    )
+            except Exception as e:
+                print(f"Error guardando el progreso del trabajo de reporte {trabajo_id}: {e}")
+
+        return informar
+
+    @staticmethod
+    def _guardar_archivo(trabajo_id: str, buffer):
+        """
+        Copia el archivo generado al directorio compartido de trabajos.
+        La escritura es atómica: otro proceso nunca descarga un archivo a medio escribir.
+        Args:
+            trabajo_id (str): Identificador del trabajo.
+            buffer (BinaryIO): El archivo del reporte; se cierra al terminar.
+        """
+        TrabajoReporteService.DIRECTORIO.mkdir(parents=True, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(dir=TrabajoReporteService.DIRECTORIO, prefix=".tmp-")
+        with buffer, os.fdopen(descriptor, "wb") as archivo:
+            shutil.copyfileobj(buffer, archivo)
+        os.replace(temporal, TrabajoReporteService.DIRECTORIO / trabajo_id)
+
+    @staticmethod
+    def _ejecutar(trabajo_id: str):
+        """
+        Genera el archivo de un trabajo en un hilo del pool y registra el resultado en la base de datos.
+        Usa una sesión del pool batch para no ocupar conexiones de las peticiones de la API.
+        Args:
+            trabajo_id (str): Identificador del trabajo a ejecutar.
+        """
+        db = SessionBatch()
+        try:
+            trabajo = db.get(TrabajoReporte, trabajo_id)
+            if trabajo is None or trabajo.estado != EstadoTrabajoReporte.PENDIENTE:
+                # Se dio por abandonado o se purgó antes de empezar
+                return
+            trabajo.estado = EstadoTrabajoReporte.EN_PROCESO
+            trabajo.iniciado = trabajo.actualizado = datetime.now()
+            db.commit()
+            try:
+                buffer = TrabajoReporteService._generar(
+                    db, trabajo.tipo, TrabajoReporteService._cargar_parametros(trabajo),
+                    TrabajoReporteService._informar_progreso(trabajo_id)
+                )
+                TrabajoReporteService._guardar_archivo(trabajo_id, buffer)
+                trabajo.estado = EstadoTrabajoReporte.TERMINADO
+                trabajo.progreso = 100
+            except HTTPException as e:
+                db.rollback()
+                trabajo.estado = EstadoTrabajoReporte.ERROR
+                trabajo.codigo_error = e.status_code
+                trabajo.error = str(e.detail)[:500]
+            except Exception as e:
+                print(f"Error generando el reporte {trabajo.tipo.value} ({trabajo_id}): {e}")
+                db.rollback()
+                trabajo.estado = EstadoTrabajoReporte.ERROR
+                trabajo.codigo_error = 500
+                trabajo.error = "Error inesperado al generar el reporte."
+            trabajo.terminado = trabajo.actualizado = datetime.now()
+            trabajo.clave_en_curso = None
+            db.commit()
+        except Exception as e:
+            print(f"Error registrando el trabajo de reporte {trabajo_id}: {e}")
+            db.rollback()
+        finally:
+            db.close()
+            with TrabajoReporteService._lock:
+                TrabajoReporteService._locales.discard(trabajo_id)
+
+    @staticmethod
+    def _latido():
+        """
+        Actualiza periódicamente la señal de vida de los trabajos encolados en este proceso.
+        Termina cuando el proceso ya no tiene trabajos pendientes ni en proceso.
+        """
+        while True:
+            time.sleep(TrabajoReporteService.LATIDO)
+            with TrabajoReporteService._lock:
+                ids = list(TrabajoReporteService._locales)
+                if not ids:
+                    TrabajoReporteService._hilo_latido = None
+                    return
+            try:
+                with engine_batch.begin() as conn:
+                    conn.execute(
+                        update(TrabajoReporte)
+                        .where(TrabajoReporte.id.in_(ids), TrabajoReporte.estado.in_(ACTIVOS))
+                        .values(actualizado=datetime.now())
+                    )
+            except Exception as e:
+                print(f"Error actualizando el latido de los trabajos de reportes: {e}")
+
+    @staticmethod
+    def _encolar(trabajo_id: str):
+        """
+        Envía un trabajo al pool de hilos de este proceso y arranca el latido si no está corriendo.
+        Args:
+            trabajo_id (str): Identificador del trabajo.
+        """
+        with TrabajoReporteService._lock:
+            TrabajoReporteService._locales.add(trabajo_id)
+            if TrabajoReporteService._hilo_latido is None:
+                TrabajoReporteService._hilo_latido = threading.Thread(target=TrabajoReporteService._latido, name="reportes-latido", daemon=True)
+                TrabajoReporteService._hilo_latido.start()
+        TrabajoReporteService._executor.submit(TrabajoReporteService._ejecutar, trabajo_id)
+
+    @staticmethod
+    def _purgar(db: Session):
+        """
+        Da por fallidos los trabajos cuyo proceso dejó de enviar el latido y elimina los terminados hace más
+        de TTL segundos junto con sus archivos. Cada proceso lo hace a lo sumo una vez por INTERVALO_PURGA segundos.
+        Args:
+            db (Session): La sesión de la base de datos.
+        """
+        with TrabajoReporteService._lock:
+            if time.monotonic() - TrabajoReporteService._ultima_purga < TrabajoReporteService.INTERVALO_PURGA:
+                return
+            TrabajoReporteService._ultima_purga = time.monotonic()
+        ahora = datetime.now()
+        db.execute(
+            update(TrabajoReporte)
+            .where(
+                TrabajoReporte.estado.in_(ACTIVOS),
+                TrabajoReporte.actualizado < ahora - timedelta(seconds=TrabajoReporteService.ABANDONO)
+            )
+            .values(
+                estado=EstadoTrabajoReporte.ERROR,
+                codigo_error=500,
+                error="El proceso que generaba el reporte se detuvo.",
+                terminado=ahora,
+                clave_en_curso=None
+            )
+        )
+        limite = ahora - timedelta(seconds=TrabajoReporteService.TTL)
+        vencidos = db.scalars(select(TrabajoReporte.id).where(TrabajoReporte.terminado < limite)).all()
+        if vencidos:
+            db.execute(delete(TrabajoReporte).where(TrabajoReporte.id.in_(vencidos)))
+        db.commit()
+        for trabajo_id in vencidos:
+            (TrabajoReporteService.DIRECTORIO / trabajo_id).unlink(missing_ok=True)
+
+    @staticmethod
+    def solicitar(db: Session, dto: TrabajoReporteDto) -> TrabajoReporteDtoOut:
+        """
+        Encola la generación de un reporte, o devuelve el trabajo en curso si ya se pidió el mismo reporte.
+        Args:
+            db (Session): La sesión de la base de datos.
+            dto (TrabajoReporteDto): La solicitud.
+        Returns:
+            TrabajoReporteDtoOut: El trabajo nuevo o el existente.
+        Raises:
+            HTTPException: Si faltan parámetros (422), la cola está llena (429)
+                o la solicitud coincidió con un trabajo que terminó en ese momento (409).
+        """
+        parametros = TrabajoReporteService._parametros(dto)
+        contenido = json.dumps([dto.tipo.value, parametros], sort_keys=True, default=str)
+        clave = hashlib.sha256(contenido.encode()).hexdigest()
+        TrabajoReporteService._purgar(db)
+
+        existente = db.scalars(select(TrabajoReporte).where(TrabajoReporte.clave_en_curso == clave)).first()
+        if existente is not None:
+            return TrabajoReporteService._salida(db, existente)
+        activos = db.scalar(select(func.count()).select_from(TrabajoReporte).where(TrabajoReporte.clave_en_curso.is_not(None)))
+        if activos >= TrabajoReporteService.MAX_COLA:
+            raise HTTPException(status_code=429, detail="Hay demasiados reportes en generación. Intente nuevamente en unos minutos.")
+
+        ahora = datetime.now()
+        trabajo = TrabajoReporte(
+            id=uuid.uuid4().hex,
+            tipo=dto.tipo,
+            parametros=json.dumps(parametros, default=str),
+            clave_en_curso=clave,
+            estado=EstadoTrabajoReporte.PENDIENTE,
+            progreso=0,
+            instancia=TrabajoReporteService.INSTANCIA,
+            creado=ahora,
+            actualizado=ahora
+        )
+        db.add(trabajo)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Otro proceso encoló el mismo reporte al mismo tiempo
+            db.rollback()
+            existente = db.scalars(select(TrabajoReporte).where(TrabajoReporte.clave_en_curso == clave)).first()
+            if existente is None:
+                raise HTTPException(status_code=409, detail="El mismo reporte acaba de terminar de generarse. Intente nuevamente.")
+            return TrabajoReporteService._salida(db, existente)
+        TrabajoReporteService._encolar(trabajo.id)
+        return TrabajoReporteService._salida(db, trabajo)
+
+    @staticmethod
+    def _salida(db: Session, trabajo: TrabajoReporte) -> TrabajoReporteDtoOut:
+        """
+        Arma el DTO de un trabajo, con la cantidad de trabajos pendientes solicitados antes si todavía no empezó.
+        Args:
+            db (Session): La sesión de la base de datos.
+            trabajo (TrabajoReporte): El trabajo.
+        Returns:
+            TrabajoReporteDtoOut: El estado del trabajo.
+        """
+        salida = TrabajoReporteDtoOut.model_validate(trabajo)
+        if trabajo.estado == EstadoTrabajoReporte.PENDIENTE:
+            salida.posicion_cola = db.scalar(
+                select(func.count()).select_from(TrabajoReporte)
+                .where(TrabajoReporte.estado == EstadoTrabajoReporte.PENDIENTE, TrabajoReporte.creado < trabajo.creado)
+            )
+        return salida
+
+    @staticmethod
+    def _buscar(db: Session, trabajo_id: str) -> TrabajoReporte:
+        """
+        Busca un trabajo vigente.
+        Args:
+            db (Session): La sesión de la base de datos.
+            trabajo_id (str): Identificador del trabajo.
+        Returns:
+            TrabajoReporte: El trabajo.
+        Raises:
+            HTTPException: Si el trabajo no existe o ya expiró (404).
+        """
+        TrabajoReporteService._purgar(db)
+        trabajo = db.get(TrabajoReporte, trabajo_id)
+        limite = datetime.now() - timedelta(seconds=TrabajoReporteService.TTL)
+        if trabajo is None or (trabajo.terminado is not None and trabajo.terminado < limite):
+            raise HTTPException(status_code=404, detail="Trabajo de reporte no encontrado o expirado.")
+        return trabajo
+
+    @staticmethod
+    def obtener(db: Session, trabajo_id: str) -> TrabajoReporteDtoOut:
+        """
+        Obtiene el estado de un trabajo.
+        Args:
+            db (Session): La sesión de la base de datos.
+            trabajo_id (str): Identificador del trabajo.
+        Returns:
+            TrabajoReporteDtoOut: El estado del trabajo.
+        Raises:
+            HTTPException: Si el trabajo no existe o ya expiró (404).
+        """
+        return TrabajoReporteService._salida(db, TrabajoReporteService._buscar(db, trabajo_id))
+
+    @staticmethod
+    def archivo(db: Session, trabajo_id: str) -> tuple[Path, str, str]:
+        """
+        Obtiene el archivo generado por un trabajo terminado.
+        Args:
+            db (Session): La sesión de la base de datos.
+            trabajo_id (str): Identificador del trabajo.
+        Returns:
+            tuple[Path, str, str]: La ruta del archivo, su tipo de contenido y el nombre de descarga.
+        Raises:
+            HTTPException: Si el trabajo o su archivo no existen (404), todavía no terminó (409)
+                o falló (el código del error original).
+        """
+        trabajo = TrabajoReporteService._buscar(db, trabajo_id)
+        if trabajo.estado == EstadoTrabajoReporte.ERROR:
+            raise HTTPException(status_code=trabajo.codigo_error, detail=trabajo.error)
+        if trabajo.estado != EstadoTrabajoReporte.TERMINADO:
+            raise HTTPException(status_code=409, detail="El reporte todavía se está generando.")
+        ruta = TrabajoReporteService.DIRECTORIO / trabajo.id
+        if not ruta.is_file():
+            raise HTTPException(status_code=404, detail="El archivo del reporte ya no está disponible.")
+        p = TrabajoReporteService._cargar_parametros(trabajo)
+        match trabajo.tipo:
+            case TipoReporte.MENSUAL_PDF:
+                return ruta, MEDIA_TYPE_PDF, f"reporte_pagos_{p['mes']}-{p['anio']}.pdf"
+            case TipoReporte.FACTURACION_EXCEL:
+                return ruta, MEDIA_TYPE_EXCEL, f"reporte_facturacion_{p['mes']:02d}-{p['anio']}.xlsx"
+            case TipoReporte.PAGOS_PENDIENTES_PDF:
+                return ruta, MEDIA_TYPE_PDF, f"reporte_pagos_pendientes_{p['mes']}-{p['anio']}.pdf"
+            case TipoReporte.HISTORIAL_ARRENDADOR_PDF:
+                inicio, fin = p["inicio"], p["fin"]
+                return ruta, MEDIA_TYPE_PDF, f"reporte_pagos_arrendador_{inicio.month}-{inicio.year}_{fin.month}-{fin.year}.pdf"
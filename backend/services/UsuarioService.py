@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from model.Usuario import Usuario
 from dtos.UsuarioDto import UsuarioDto, UsuarioLogueado
 from util.jwtYPasswordHandler import hash_password, verify_password
+from util.usuarioCache import UsuarioCache
 
 class UsuarioService:
     """
@@ -98,6 +99,7 @@ class UsuarioService:
         for campo, valor in campos.items():
             setattr(usuario, campo, valor)
         db.commit()
+        UsuarioCache.invalidar(usuario_id)
         db.refresh(usuario)
         return usuario
 
@@ -122,6 +124,7 @@ class UsuarioService:
         verificar_relaciones_existentes(usuario)
         db.delete(usuario)
         db.commit()
+        UsuarioCache.invalidar(usuario_id)
 
     @staticmethod
     def cambiar_contrasena(db: Session, usuario_id: int, contrasena_actual: str, contrasena_nueva: str):
@@ -154,6 +157,7 @@ class UsuarioService:
         # Commit en la DB
         db.add(usuario)
         db.commit()
+        UsuarioCache.invalidar(usuario_id)
         db.refresh(usuario)
 
         return usuario
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import BinaryIO, Callable
+
+class CacheReportes:
+    """
+    Caché en disco de los archivos de reportes ya generados (PDF y Excel).
+    La clave combina el tipo de reporte, sus parámetros y la huella de versión de los datos que usa
+    (ver util/versionDatos.py), por lo que un cambio en esos datos genera una clave nueva y el archivo
+    anterior deja de usarse hasta que el desalojo lo elimina.
+    El tamaño total se limita a REPORTES_CACHE_MAX_MB, desalojando los archivos usados hace más tiempo.
+    """
+
+    DIRECTORIO = Path(os.getenv("REPORTES_CACHE_DIR", Path(tempfile.gettempdir()) / "cache_reportes"))
+    MAX_BYTES = int(float(os.getenv("REPORTES_CACHE_MAX_MB", "200")) * 1024 * 1024)
+
+    _lock = threading.Lock()
+
+    @staticmethod
+    def clave(tipo: str, parametros: dict, huella: str) -> str:
+        """
+        Calcula la clave de un reporte.
+        Args:
+            tipo (str): Tipo de reporte.
+            parametros (dict): Parámetros con los que se genera.
+            huella (str): Huella de versión de los datos.
+        Returns:
+            str: El hash SHA-256 que identifica al archivo.
+        """
+        contenido = json.dumps([tipo, parametros, huella], sort_keys=True, default=str)
+        return hashlib.sha256(contenido.encode()).hexdigest()
+
+    @staticmethod
+    def obtener(clave: str) -> BinaryIO | None:
+        """
+        Abre un reporte de la caché y lo marca como usado recientemente.
+        Si el archivo se desaloja mientras se lee, el archivo abierto sigue siendo válido.
+        Args:
+            clave (str): Clave del reporte.
+        Returns:
+            BinaryIO | None: El archivo abierto para lectura, o None si no está en la caché.
+        """
+        ruta = CacheReportes.DIRECTORIO / clave
+        try:
+            archivo = open(ruta, "rb")
+        except FileNotFoundError:
+            return None
+        os.utime(ruta)
+        return archivo
+
+    @staticmethod
+    def guardar(clave: str, contenido: BinaryIO):
+        """
+        Copia un reporte a la caché y desaloja los menos usados si se supera el tamaño máximo.
+        La escritura es atómica: otro proceso nunca lee un archivo a medio escribir.
+        Args:
+            clave (str): Clave del reporte.
+            contenido (BinaryIO): Archivo o buffer con el reporte; se lee desde el inicio.
+        """
+        contenido.seek(0, os.SEEK_END)
+        if contenido.tell() > CacheReportes.MAX_BYTES:
+            return
+        contenido.seek(0)
+        CacheReportes.DIRECTORIO.mkdir(parents=True, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(dir=CacheReportes.DIRECTORIO, prefix=".tmp-")
+        with os.fdopen(descriptor, "wb") as archivo:
+            shutil.copyfileobj(contenido, archivo)
+        os.replace(temporal, CacheReportes.DIRECTORIO / clave)
+        CacheReportes._desalojar()
+
+    @staticmethod
+    def _desalojar():
+        """
+        Elimina los archivos usados hace más tiempo hasta que la caché entre en el tamaño máximo.
+        Los subdirectorios, como el de los trabajos de reportes, no se cuentan ni se desalojan.
+        """
+        with CacheReportes._lock:
+            archivos = []
+            for ruta in CacheReportes.DIRECTORIO.iterdir():
+                if ruta.name.startswith(".tmp-") or ruta.is_dir():
+                    continue
+                try:
+                    estado = ruta.stat()
+                except FileNotFoundError:
+                    continue
+                archivos.append((estado.st_mtime, estado.st_size, ruta))
+            total = sum(tamano for _, tamano, _ in archivos)
+            for _, tamano, ruta in sorted(archivos, key=lambda a: a[0]):
+                if total <= CacheReportes.MAX_BYTES:
+                    break
+                ruta.unlink(missing_ok=True)
+                total -= tamano
+
+    @staticmethod
+    def obtener_o_generar(tipo: str, parametros: dict, huella: str, generar: Callable[[], BinaryIO]) -> tuple[BinaryIO, bool]:
+        """
+        Devuelve el reporte desde la caché o lo genera y lo guarda.
+        Args:
+            tipo (str): Tipo de reporte.
+            parametros (dict): Parámetros con los que se genera.
+            huella (str): Huella de versión de los datos.
+            generar (Callable[[], BinaryIO]): Función que genera el reporte si no está en la caché.
+        Returns:
+            tuple[BinaryIO, bool]: El reporte, posicionado al inicio, y si se obtuvo de la caché.
+        """
+        clave = CacheReportes.clave(tipo, parametros, huella)
+        archivo = CacheReportes.obtener(clave)
+        if archivo is not None:
+            return archivo, True
+        archivo = generar()
+        CacheReportes.guardar(clave, archivo)
+        archivo.seek(0)
+        return archivo, False
@@ -1,8 +1,12 @@
+import logging
 import os
-import time  # <-- NUEVO IMPORT
-from sqlalchemy import create_engine
+import random
+import threading
+import time
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
-from sqlalchemy.exc import OperationalError  # <-- NUEVO IMPORT
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -12,11 +16,212 @@ load_dotenv(dotenv_path=env_path)
 # Configuración de la base de datos MySQL
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-# Crear engine
-engine = create_engine(DATABASE_URL, echo=True)
+# Perfiles de pool de conexiones. Cada uno usa su propio engine para que las ráfagas de un tipo de
+# trabajo (por ejemplo, reportes o exportaciones) no dejen sin conexiones a las peticiones de la API.
+# Los valores se pueden cambiar con DB_POOL_<PERFIL>_SIZE, DB_POOL_<PERFIL>_MAX_OVERFLOW y DB_POOL_<PERFIL>_TIMEOUT.
+PERFILES_POOL = {
+    "api": {"pool_size": 10, "max_overflow": 10, "pool_timeout": 30},
+    "scheduler": {"pool_size": 2, "max_overflow": 2, "pool_timeout": 60},
+    "batch": {"pool_size": 3, "max_overflow": 2, "pool_timeout": 120},
+    "lider": {"pool_size": 1, "max_overflow": 1, "pool_timeout": 5},
+}
+# Segundos máximos de conexión y de lectura/escritura del engine de la elección de líder: si la base no responde,
+# la renovación de la concesión falla antes de que venza en lugar de quedar bloqueada
+DB_LIDER_TIMEOUT = int(os.getenv("DB_LIDER_TIMEOUT", "5"))
+# Segundos tras los que se renueva una conexión, por debajo del wait_timeout de MySQL
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+# Las sentencias que superan el umbral se cuentan siempre y se registran en el log según el muestreo
+DB_CONSULTA_LENTA_MS = float(os.getenv("DB_CONSULTA_LENTA_MS", "500"))
+DB_CONSULTA_LENTA_MUESTREO = float(os.getenv("DB_CONSULTA_LENTA_MUESTREO", "0.2"))
 
-# Crear SessionLocal
+logger_consultas_lentas = logging.getLogger("db.consultas_lentas")
+
+class MetricasPool:
+    """
+    Contadores de uso de un pool de conexiones, actualizados por los eventos del engine.
+    Atributos:
+        perfil (str): Nombre del perfil del pool.
+        pedidos (int): Pedidos de conexión al pool, incluidos los que agotaron el tiempo de espera.
+        checkouts (int): Conexiones entregadas por el pool.
+        conexiones_nuevas (int): Conexiones abiertas contra la base de datos.
+        invalidaciones (int): Conexiones descartadas por error o por pre-ping fallido.
+        timeouts (int): Pedidos de conexión que agotaron pool_timeout.
+        espera_total (float): Segundos acumulados esperando una conexión.
+        espera_maxima (float): Mayor espera registrada, en segundos.
+        consultas_lentas (int): Sentencias que superaron DB_CONSULTA_LENTA_MS.
+    """
+
+    def __init__(self, perfil: str):
+        self.perfil = perfil
+        self.pedidos = 0
+        self.checkouts = 0
+        self.conexiones_nuevas = 0
+        self.invalidaciones = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self.consultas_lentas = 0
+        self._lock = threading.Lock()
+
+    def registrar_espera(self, segundos: float):
+        with self._lock:
+            self.pedidos += 1
+            self.espera_total += segundos
+            self.espera_maxima = max(self.espera_maxima, segundos)
+
+    def incrementar(self, contador: str):
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+class PoolMedido(QueuePool):
+    """
+    QueuePool que mide cuánto tarda cada pedido de conexión, incluida la espera cuando el pool
+    está agotado y la apertura de la conexión si hay que crear una nueva.
+    """
+    metricas: MetricasPool
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.metricas.incrementar("timeouts")
+            raise
+        finally:
+            self.metricas.registrar_espera(time.perf_counter() - inicio)
+
+    def recreate(self):
+        # engine.dispose() reemplaza el pool; las métricas se conservan
+        nuevo = super().recreate()
+        nuevo.metricas = self.metricas
+        return nuevo
+
+def _configuracion_perfil(perfil: str) -> dict:
+    """
+    Obtiene la configuración de un perfil de pool, con los valores de entorno por sobre los por defecto.
+    Args:
+        perfil (str): Nombre del perfil.
+    Returns:
+        dict: Argumentos de pool para create_engine.
+    """
+    prefijo = f"DB_POOL_{perfil.upper()}_"
+    base = PERFILES_POOL[perfil]
+    return {
+        "pool_size": int(os.getenv(prefijo + "SIZE", base["pool_size"])),
+        "max_overflow": int(os.getenv(prefijo + "MAX_OVERFLOW", base["max_overflow"])),
+        "pool_timeout": float(os.getenv(prefijo + "TIMEOUT", base["pool_timeout"])),
+    }
+
+def _instrumentar(engine, metricas: MetricasPool):
+    """
+    Registra los eventos del engine que alimentan las métricas del pool y el log de sentencias lentas.
+    Args:
+        engine (Engine): El engine a instrumentar.
+        metricas (MetricasPool): Las métricas del perfil.
+    """
+    engine.pool.metricas = metricas
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        metricas.incrementar("conexiones_nuevas")
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        metricas.incrementar("checkouts")
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidate(dbapi_connection, connection_record, exception):
+        metricas.incrementar("invalidaciones")
+
+    # Una conexión ejecuta una sentencia a la vez: basta un único valor, que se pisa en la siguiente
+    # sentencia aunque una que falló no haya llegado a after_cursor_execute
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info["inicio_sentencia"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        inicio = conn.info.pop("inicio_sentencia", None)
+        if inicio is None:
+            return
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+        if duracion_ms < DB_CONSULTA_LENTA_MS:
+            return
+        metricas.incrementar("consultas_lentas")
+        if random.random() < DB_CONSULTA_LENTA_MUESTREO:
+            logger_consultas_lentas.warning("[%s] %.0f ms: %s", metricas.perfil, duracion_ms, " ".join(statement.split())[:500])
+
+    @event.listens_for(engine, "handle_error")
+    def _error(contexto):
+        if contexto.connection is not None:
+            contexto.connection.info.pop("inicio_sentencia", None)
+
+def crear_engine(perfil: str, connect_args: dict | None = None):
+    """
+    Crea el engine de un perfil de pool con pre-ping, reciclado de conexiones e instrumentación.
+    Args:
+        perfil (str): Nombre del perfil ("api", "scheduler", "batch" o "lider").
+        connect_args (dict | None, optional): Argumentos de conexión del driver. Defaults to None.
+    Returns:
+        Engine: El engine configurado.
+    """
+    nuevo = create_engine(
+        DATABASE_URL,
+        echo=DB_ECHO,
+        poolclass=PoolMedido,
+        pool_pre_ping=True,
+        pool_recycle=DB_POOL_RECYCLE,
+        connect_args=connect_args or {},
+        **_configuracion_perfil(perfil)
+    )
+    _instrumentar(nuevo, MetricasPool(perfil))
+    return nuevo
+
+# Crear engines: el de la API es el principal (creación de tablas, migraciones y peticiones)
+engine = crear_engine("api")
+engine_scheduler = crear_engine("scheduler")
+engine_batch = crear_engine("batch")
+engine_lider = crear_engine(
+    "lider",
+    {"connect_timeout": DB_LIDER_TIMEOUT, "read_timeout": DB_LIDER_TIMEOUT, "write_timeout": DB_LIDER_TIMEOUT}
+    if DATABASE_URL and DATABASE_URL.startswith("mysql+pymysql") else None
+)
+ENGINES = {"api": engine, "scheduler": engine_scheduler, "batch": engine_batch, "lider": engine_lider}
+
+# Crear SessionLocal (peticiones), SessionScheduler (jobs programados) y SessionBatch (procesos largos y streaming)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionScheduler = sessionmaker(autocommit=False, autoflush=False, bind=engine_scheduler)
+SessionBatch = sessionmaker(autocommit=False, autoflush=False, bind=engine_batch)
+
+def estado_pools() -> dict:
+    """
+    Obtiene el estado actual y los contadores acumulados de cada pool de conexiones.
+    Returns:
+        dict: Por perfil, tamaño, conexiones en uso, disponibles, overflow y métricas de espera.
+    """
+    estado = {}
+    for perfil, eng in ENGINES.items():
+        pool = eng.pool
+        m = pool.metricas
+        configuracion = _configuracion_perfil(perfil)
+        estado[perfil] = {
+            "tamano": pool.size(),
+            "en_uso": pool.checkedout(),
+            "disponibles": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": configuracion["max_overflow"],
+            "timeout_segundos": configuracion["pool_timeout"],
+            "pedidos": m.pedidos,
+            "checkouts": m.checkouts,
+            "conexiones_nuevas": m.conexiones_nuevas,
+            "invalidaciones": m.invalidaciones,
+            "timeouts": m.timeouts,
+            "espera_promedio_ms": round(m.espera_total / m.pedidos * 1000, 3) if m.pedidos else 0.0,
+            "espera_maxima_ms": round(m.espera_maxima * 1000, 3),
+            "consultas_lentas": m.consultas_lentas,
+        }
+    return estado
 
 class Base(DeclarativeBase):
     """
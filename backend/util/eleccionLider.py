@@ -0,0 +1,124 @@
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from model.LiderScheduler import LiderScheduler
+from util.database import engine_lider
+
+class EleccionLider:
+    """
+    Elección del proceso que ejecuta los jobs programados cuando la API corre con varios workers.
+    Cada proceso intenta renovar la concesión de la tabla lider_scheduler cada SCHEDULER_LEASE_RENOVACION
+    segundos; la renovación es un único UPDATE condicionado a que la concesión sea propia o haya vencido,
+    así que solo un proceso puede tenerla. Si el líder se cae, otro la toma cuando vence, a más tardar
+    SCHEDULER_LEASE_SEGUNDOS después de la última renovación.
+    Las consultas usan un engine propio con timeouts cortos (DB_LIDER_TIMEOUT), para que una base que no responde
+    haga fallar la renovación antes del vencimiento en lugar de bloquearla.
+    Los vencimientos usan el reloj de cada proceso: los hosts deben estar sincronizados y en la misma zona horaria.
+    """
+
+    NOMBRE = "scheduler"
+    DURACION = int(os.getenv("SCHEDULER_LEASE_SEGUNDOS", "60"))
+    RENOVACION = int(os.getenv("SCHEDULER_LEASE_RENOVACION", "15"))
+    INSTANCIA = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    es_lider = False
+    _vence: datetime | None = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def renovar() -> bool:
+        """
+        Renueva la concesión si es propia, o la toma si está libre o vencida.
+        Returns:
+            bool: True si este proceso es el líder hasta el próximo vencimiento.
+        """
+        ahora = datetime.now()
+        vence = ahora + timedelta(seconds=EleccionLider.DURACION)
+        valores = {"instancia": EleccionLider.INSTANCIA, "vence": vence, "renovado": ahora}
+        with EleccionLider._lock:
+            try:
+                with engine_lider.begin() as conn:
+                    adquirida = conn.execute(
+                        update(LiderScheduler)
+                        .where(
+                            LiderScheduler.nombre == EleccionLider.NOMBRE,
+                            or_(LiderScheduler.instancia == EleccionLider.INSTANCIA, LiderScheduler.vence < ahora)
+                        )
+                        .values(**valores)
+                    ).rowcount == 1
+                    if not adquirida and conn.execute(select(LiderScheduler.nombre).where(LiderScheduler.nombre == EleccionLider.NOMBRE)).first() is None:
+                        conn.execute(insert(LiderScheduler).values(nombre=EleccionLider.NOMBRE, **valores))
+                        adquirida = True
+            except IntegrityError:
+                # Otro proceso creó la fila al mismo tiempo y se quedó con la concesión
+                adquirida = False
+            if adquirida != EleccionLider.es_lider:
+                print(f"{'👑 Concesión del scheduler adquirida' if adquirida else '⚠️ Concesión del scheduler perdida'} por {EleccionLider.INSTANCIA}.")
+            EleccionLider.es_lider = adquirida
+            EleccionLider._vence = vence if adquirida else None
+            return adquirida
+
+    @staticmethod
+    def vigente() -> bool:
+        """
+        Indica si la última concesión obtenida sigue vigente, sin consultar la base de datos.
+        No toma el lock, para no esperar a una renovación bloqueada en la base de datos.
+        Returns:
+            bool: True si este proceso es el líder y la concesión no venció.
+        """
+        vence = EleccionLider._vence
+        return vence is not None and datetime.now() < vence
+
+    @staticmethod
+    def segundos_restantes() -> float:
+        """
+        Segundos que faltan para que venza la última concesión obtenida, sin consultar la base de datos.
+        Returns:
+            float: Los segundos restantes, o 0 si este proceso no es el líder o la concesión ya venció.
+        """
+        vence = EleccionLider._vence
+        return max(0.0, (vence - datetime.now()).total_seconds()) if vence is not None else 0.0
+
+    @staticmethod
+    def liberar():
+        """
+        Libera la concesión al detener la aplicación para que otro proceso la tome sin esperar el vencimiento.
+        """
+        with EleccionLider._lock:
+            if not EleccionLider.es_lider:
+                return
+            try:
+                with engine_lider.begin() as conn:
+                    conn.execute(
+                        update(LiderScheduler)
+                        .where(LiderScheduler.nombre == EleccionLider.NOMBRE, LiderScheduler.instancia == EleccionLider.INSTANCIA)
+                        .values(vence=datetime.now())
+                    )
+            except Exception as e:
+                print(f"Error al liberar la concesión del scheduler: {e}")
+            EleccionLider.es_lider = False
+            EleccionLider._vence = None
+
+    @staticmethod
+    def estado() -> dict:
+        """
+        Obtiene el estado de la elección en este proceso y el líder actual según la base de datos.
+        Returns:
+            dict: Instancia propia, si es líder, y la instancia y el vencimiento de la concesión vigente.
+        """
+        with engine_lider.connect() as conn:
+            fila = conn.execute(
+                select(LiderScheduler.instancia, LiderScheduler.vence, LiderScheduler.renovado)
+                .where(LiderScheduler.nombre == EleccionLider.NOMBRE)
+            ).first()
+        return {
+            "instancia": EleccionLider.INSTANCIA,
+            "es_lider": EleccionLider.vigente(),
+            "lider": fila.instancia if fila is not None and fila.vence > datetime.now() else None,
+            "vence": fila.vence if fila is not None else None,
+            "renovado": fila.renovado if fila is not None else None,
+        }
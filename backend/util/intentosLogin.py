@@ -0,0 +1,89 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from fastapi import HTTPException
+
+class IntentosLogin:
+    """
+    Limita los inicios de sesión fallidos para que los ataques de fuerza bruta no consuman CPU en bcrypt.
+    Se cuentan los fallos de los últimos LOGIN_VENTANA segundos por CUIL y por dirección IP; al superar
+    el máximo, los intentos siguientes se rechazan con 429 antes de verificar la contraseña.
+    Un inicio de sesión correcto borra los fallos del CUIL.
+    """
+
+    VENTANA = int(os.getenv("LOGIN_VENTANA", "900"))
+    MAX_FALLOS_CUIL = int(os.getenv("LOGIN_MAX_FALLOS_CUIL", "5"))
+    MAX_FALLOS_IP = int(os.getenv("LOGIN_MAX_FALLOS_IP", "30"))
+    # Cantidad de claves a partir de la cual se descartan las que ya no tienen fallos en la ventana
+    MAX_CLAVES = 10000
+
+    _fallos: dict[tuple[str, str], deque[float]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _vigentes(clave: tuple[str, str], ahora: float) -> deque[float]:
+        """
+        Obtiene los fallos de una clave dentro de la ventana, descartando los anteriores. Se llama con el lock tomado.
+        Args:
+            clave (tuple[str, str]): Tipo ("cuil" o "ip") y valor.
+            ahora (float): Momento actual, según time.monotonic.
+        Returns:
+            deque[float]: Los momentos de los fallos vigentes.
+        """
+        fallos = IntentosLogin._fallos.get(clave, deque())
+        while fallos and ahora - fallos[0] >= IntentosLogin.VENTANA:
+            fallos.popleft()
+        return fallos
+
+    @staticmethod
+    def verificar(cuil: str, ip: str | None):
+        """
+        Rechaza el intento si el CUIL o la IP superaron el máximo de fallos.
+        Args:
+            cuil (str): El CUIL con el que se intenta iniciar sesión.
+            ip (str | None): La dirección IP del cliente.
+        Raises:
+            HTTPException: Si hay demasiados fallos recientes (429), con el encabezado Retry-After.
+        """
+        ahora = time.monotonic()
+        with IntentosLogin._lock:
+            for clave, maximo in ((("cuil", cuil), IntentosLogin.MAX_FALLOS_CUIL), (("ip", ip), IntentosLogin.MAX_FALLOS_IP)):
+                fallos = IntentosLogin._vigentes(clave, ahora)
+                if len(fallos) >= maximo:
+                    espera = math.ceil(IntentosLogin.VENTANA - (ahora - fallos[-maximo]))
+                    raise HTTPException(
+                        status_code=429,
+                        detail="Demasiados intentos fallidos de inicio de sesión. Intente nuevamente más tarde.",
+                        headers={"Retry-After": str(espera)}
+                    )
+
+    @staticmethod
+    def registrar_fallo(cuil: str, ip: str | None):
+        """
+        Registra un inicio de sesión fallido para el CUIL y la IP.
+        Args:
+            cuil (str): El CUIL con el que se intentó iniciar sesión.
+            ip (str | None): La dirección IP del cliente.
+        """
+        ahora = time.monotonic()
+        with IntentosLogin._lock:
+            if len(IntentosLogin._fallos) >= IntentosLogin.MAX_CLAVES:
+                for clave in list(IntentosLogin._fallos):
+                    if not IntentosLogin._vigentes(clave, ahora):
+                        del IntentosLogin._fallos[clave]
+            for clave in (("cuil", cuil), ("ip", ip)):
+                fallos = IntentosLogin._vigentes(clave, ahora)
+                fallos.append(ahora)
+                IntentosLogin._fallos[clave] = fallos
+
+    @staticmethod
+    def registrar_exito(cuil: str):
+        """
+        Borra los fallos del CUIL tras un inicio de sesión correcto.
+        Args:
+            cuil (str): El CUIL que inició sesión.
+        """
+        with IntentosLogin._lock:
+            IntentosLogin._fallos.pop(("cuil", cuil), None)
@@ -1,3 +1,10 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from fastapi import HTTPException
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
@@ -7,28 +14,150 @@ SECRET_KEY = "claveHasheoEjemplo"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 180
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+#Costo de bcrypt. Con min y max iguales al costo configurado, los hashes con otro costo se marcan
+#para actualizar y se vuelven a generar en el próximo inicio de sesión correcto
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS
+)
+
+def _hashear(password: str) -> str:
+    """
+    Genera el hash de una contraseña en el proceso actual. Se ejecuta en el pool de hash.
+    """
+    return pwd_context.hash(password)
+
+def _verificar_y_actualizar(password: str, hashed: str) -> tuple[bool, str | None]:
+    """
+    Verifica una contraseña y, si el hash usa otro costo, genera uno nuevo. Se ejecuta en el pool de hash.
+    """
+    return pwd_context.verify_and_update(password, hashed)
+
+class PoolHash:
+    """
+    Pool de procesos acotado donde se generan y verifican los hash de contraseñas.
+    bcrypt consume CPU a propósito; en procesos separados no ocupa los hilos que atienden la API
+    ni compite por el GIL. Si hay más de HASH_COLA_MAX operaciones pendientes, las nuevas se
+    rechazan con 503 en lugar de encolarse sin límite.
+    """
+
+    PROCESOS = int(os.getenv("HASH_PROCESOS", "2"))
+    COLA_MAX = int(os.getenv("HASH_COLA_MAX", "32"))
+
+    _pool: ProcessPoolExecutor | None = None
+    _pendientes = 0
+    _pendientes_max = 0
+    _completadas = 0
+    _rechazadas = 0
+    _tiempo_total = 0.0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _enviar(funcion, *args) -> Future:
+        """
+        Envía una operación al pool, creándolo la primera vez que se usa.
+        Usa el método spawn para no copiar por fork los hilos de la aplicación.
+        Args:
+            funcion: Función del módulo a ejecutar.
+            *args: Sus argumentos.
+        Returns:
+            Future: El resultado de la operación.
+        Raises:
+            HTTPException: Si la cola de operaciones pendientes está llena (503).
+        """
+        with PoolHash._lock:
+            if PoolHash._pendientes >= PoolHash.COLA_MAX:
+                PoolHash._rechazadas += 1
+                raise HTTPException(status_code=503, detail="Hay demasiados inicios de sesión en curso. Intente nuevamente en unos segundos.")
+            if PoolHash._pool is None:
+                PoolHash._pool = ProcessPoolExecutor(max_workers=PoolHash.PROCESOS, mp_context=multiprocessing.get_context("spawn"))
+            PoolHash._pendientes += 1
+            PoolHash._pendientes_max = max(PoolHash._pendientes_max, PoolHash._pendientes)
+        inicio = time.perf_counter()
+        try:
+            futuro = PoolHash._pool.submit(funcion, *args)
+        except Exception:
+            PoolHash._terminar(inicio)
+            raise
+        futuro.add_done_callback(lambda _: PoolHash._terminar(inicio))
+        return futuro
+
+    @staticmethod
+    def _terminar(inicio: float):
+        """
+        Registra el fin de una operación del pool.
+        Args:
+            inicio (float): Momento en que se envió, según time.perf_counter.
+        """
+        with PoolHash._lock:
+            PoolHash._pendientes -= 1
+            PoolHash._completadas += 1
+            PoolHash._tiempo_total += time.perf_counter() - inicio
+
+    @staticmethod
+    def estado() -> dict:
+        """
+        Métricas del pool de hash.
+        Returns:
+            dict: Procesos, operaciones pendientes (actual y máximo), completadas, rechazadas y tiempo promedio en ms.
+        """
+        with PoolHash._lock:
+            return {
+                "procesos": PoolHash.PROCESOS,
+                "cola_max": PoolHash.COLA_MAX,
+                "bcrypt_rounds": BCRYPT_ROUNDS,
+                "pendientes": PoolHash._pendientes,
+                "pendientes_max": PoolHash._pendientes_max,
+                "completadas": PoolHash._completadas,
+                "rechazadas": PoolHash._rechazadas,
+                "tiempo_promedio_ms": round(PoolHash._tiempo_total / PoolHash._completadas * 1000, 1) if PoolHash._completadas else 0.0,
+            }
+
+    @staticmethod
+    def cerrar():
+        """
+        Detiene los procesos del pool al cerrar la aplicación.
+        """
+        with PoolHash._lock:
+            pool, PoolHash._pool = PoolHash._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
 
 def hash_password(password: str) -> str:
     """
-    Genera un hash seguro para una contraseña.
+    Genera un hash seguro para una contraseña, en el pool de hash.
     Args:
         password (str): La contraseña en texto plano.
     Returns:
         str: El hash de la contraseña.
     """
-    return pwd_context.hash(password)
+    return PoolHash._enviar(_hashear, password).result()
 
 def verify_password(password: str, hashed: str) -> bool:
     """
-    Verifica si una contraseña coincide con su hash.
+    Verifica si una contraseña coincide con su hash, en el pool de hash.
     Args:
         password (str): La contraseña en texto plano a verificar.
         hashed (str): El hash almacenado con el cual comparar.
     Returns:
         bool: True si coinciden, False en caso contrario.
     """
-    return pwd_context.verify(password, hashed)
+    return PoolHash._enviar(_verificar_y_actualizar, password, hashed).result()[0]
+
+async def verify_and_update_password(password: str, hashed: str) -> tuple[bool, str | None]:
+    """
+    Verifica una contraseña en el pool de hash sin bloquear el event loop.
+    Args:
+        password (str): La contraseña en texto plano a verificar.
+        hashed (str): El hash almacenado con el cual comparar.
+    Returns:
+        tuple[bool, str | None]: Si coinciden, y el nuevo hash si el almacenado usa otro costo de bcrypt.
+    """
+    return await asyncio.wrap_future(PoolHash._enviar(_verificar_y_actualizar, password, hashed))
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     """
@@ -0,0 +1,114 @@
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import DateTime, String, Index, inspect, text
+from sqlalchemy.orm import Mapped, mapped_column
+from util.database import Base, engine
+
+# Lock con nombre de MySQL que serializa las migraciones entre los procesos que arrancan a la vez
+NOMBRE_LOCK = "migraciones_esquema"
+ESPERA_LOCK = int(os.getenv("MIGRACIONES_ESPERA_LOCK", "600"))
+
+class VersionEsquema(Base):
+    """
+    Modelo de base de datos que registra las migraciones de esquema ya aplicadas.
+    Atributos:
+        version (int): Número de la migración aplicada.
+        descripcion (str): Descripción breve de la migración.
+        aplicada (datetime): Momento en que se aplicó.
+    """
+    __tablename__ = "version_esquema"
+
+    version: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    descripcion: Mapped[str] = mapped_column(String(255), nullable=False)
+    aplicada: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+
+def _crear_indices(conn, *indices: Index):
+    """
+    Crea los índices indicados si todavía no existen en la base de datos.
+    `create_all` no agrega índices a tablas ya existentes, por eso las migraciones los crean explícitamente.
+    Args:
+        conn (Connection): Conexión dentro de la transacción de la migración.
+        *indices (Index): Índices declarados en los modelos.
+    """
+    inspector = inspect(conn)
+    for indice in indices:
+        existentes = {i["name"] for i in inspector.get_indexes(indice.table.name)}
+        if indice.name not in existentes:
+            indice.create(conn)
+
+def indices_fechas(conn):
+    """
+    Migración 1: índices compuestos para los filtros por rango de fechas sobre pago y precio.
+    Args:
+        conn (Connection): Conexión dentro de la transacción de la migración.
+    """
+    from model.Pago import Pago
+    from model.Precio import Precio
+    _crear_indices(conn, *Pago.__table__.indexes, *Precio.__table__.indexes)
+
+def promedios_mensuales(conn):
+    """
+    Migración 2: carga inicial de la tabla precio_promedio_mensual a partir de los precios existentes.
+    Args:
+        conn (Connection): Conexión dentro de la transacción de la migración.
+    """
+    from sqlalchemy.orm import Session
+    from model.PrecioPromedioMensual import PrecioPromedioMensual
+    from services.PrecioPromedioService import PrecioPromedioService
+    PrecioPromedioMensual.__table__.create(conn, checkfirst=True)
+    db = Session(bind=conn, join_transaction_mode="create_savepoint")
+    PrecioPromedioService.reconstruir(db)
+    db.close()
+
+#Lista ordenada de migraciones (versión, descripción, función). Las nuevas se agregan al final con la versión siguiente.
+MIGRACIONES = [
+    (1, "Índices compuestos de fechas en pago y precio", indices_fechas),
+    (2, "Promedios precalculados por ventana de precios", promedios_mensuales),
+]
+
+@contextmanager
+def _lock_migraciones():
+    """
+    Mantiene tomado el lock de migraciones mientras dura el bloque, con GET_LOCK en una conexión propia.
+    Es un lock de sesión y no de transacción, así que no se pierde con el commit implícito de los DDL de MySQL.
+    En otros motores (SQLite en desarrollo) no hay varios procesos aplicando migraciones y no se toma.
+    Raises:
+        RuntimeError: Si el lock no se obtiene en MIGRACIONES_ESPERA_LOCK segundos.
+    """
+    if engine.dialect.name != "mysql":
+        yield
+        return
+    with engine.connect() as conn:
+        obtenido = conn.execute(text("SELECT GET_LOCK(:nombre, :espera)"), {"nombre": NOMBRE_LOCK, "espera": ESPERA_LOCK}).scalar()
+        if obtenido != 1:
+            raise RuntimeError(f"No se obtuvo el lock de migraciones en {ESPERA_LOCK} segundos.")
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT RELEASE_LOCK(:nombre)"), {"nombre": NOMBRE_LOCK})
+
+def aplicar_migraciones():
+    """
+    Aplica en orden las migraciones pendientes y registra cada una en la tabla version_esquema.
+    Cada migración corre en su propia transacción, junto con su registro. Todos los procesos de la API
+    las aplican al arrancar: el lock de migraciones hace que solo uno lo haga a la vez, y las versiones
+    aplicadas se leen con el lock tomado para que los demás no repitan las que ya aplicó otro.
+    Returns:
+        list[int]: Las versiones aplicadas en esta ejecución.
+    """
+    nuevas = []
+    with _lock_migraciones():
+        VersionEsquema.__table__.create(bind=engine, checkfirst=True)
+        with engine.connect() as conn:
+            aplicadas = set(conn.execute(VersionEsquema.__table__.select().with_only_columns(VersionEsquema.version)).scalars())
+
+        for version, descripcion, migracion in MIGRACIONES:
+            if version in aplicadas:
+                continue
+            with engine.begin() as conn:
+                migracion(conn)
+                conn.execute(VersionEsquema.__table__.insert().values(version=version, descripcion=descripcion, aplicada=datetime.now()))
+            print(f"Migración {version} aplicada: {descripcion}")
+            nuevas.append(version)
+    return nuevas
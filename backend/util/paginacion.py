@@ -0,0 +1,35 @@
+import base64
+import json
+from datetime import date
+from fastapi import HTTPException
+
+#Cursores opacos para paginación por clave (keyset): codifican los valores de la última fila
+#devuelta según el orden de la consulta, para que la página siguiente continúe desde ahí.
+
+def codificar_cursor(vencimiento: date, id: int) -> str:
+    """
+    Codifica la posición de una fila como cursor opaco.
+    Args:
+        vencimiento (date): Fecha de la última fila de la página.
+        id (int): Identificador de la última fila de la página.
+    Returns:
+        str: El cursor en base64 apto para URL.
+    """
+    contenido = json.dumps({"v": vencimiento.isoformat(), "id": id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(contenido.encode()).decode().rstrip("=")
+
+def decodificar_cursor(cursor: str) -> tuple[date, int]:
+    """
+    Decodifica un cursor generado por `codificar_cursor`.
+    Args:
+        cursor (str): El cursor recibido.
+    Returns:
+        tuple[date, int]: La fecha y el identificador de la última fila de la página anterior.
+    Raises:
+        HTTPException: Si el cursor no es válido (400).
+    """
+    try:
+        contenido = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return date.fromisoformat(contenido["v"]), int(contenido["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido.")
@@ -0,0 +1,203 @@
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+from pypdf import PdfWriter
+from pypdf.generic import NameObject
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import Image, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+#Renderizado de los reportes PDF que tienen una sección por arrendatario (mensual y pagos pendientes).
+#Los datos se consultan en el proceso de la API y acá solo llegan textos, así las secciones se pueden
+#dibujar en un pool de procesos y unir en orden. Este módulo no importa modelos ni la base de datos
+#para que los procesos del pool arranquen rápido.
+
+# Procesos del pool; por defecto los núcleos disponibles para el contenedor
+NUCLEOS = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+PDF_PROCESOS = int(os.getenv("REPORTES_PDF_PROCESOS", "0")) or NUCLEOS
+# Debajo de esta cantidad de secciones se renderiza en el mismo proceso: el costo de arrancar y unir no se compensa
+PDF_MIN_SECCIONES = int(os.getenv("REPORTES_PDF_MIN_SECCIONES", "8"))
+
+ESTILO_TABLA = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+    ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+    ("FONTNAME", (0, 0), (-1, 0), "Times-Roman"),
+    ("FONTSIZE", (0, 0), (-1, -1), 10),
+    ("BOTTOMPADDING", (0, 0), (-1, 0), 10),
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+    ("FONTNAME", (0, -1), (-1, -1), "Times-Roman"),
+    ("BACKGROUND", (0, -1), (-1, -1), colors.lightgrey),
+])
+
+_pool: ProcessPoolExecutor | None = None
+_lock = threading.Lock()
+
+class SeccionPdf:
+    """
+    Sección de un reporte PDF: una página (o más, si la tabla no entra) con el título, la tabla y una nota.
+    Solo contiene textos y números para poder enviarse a otro proceso.
+    Atributos:
+        titulo (str): Título de la sección, con el marcado de Paragraph de ReportLab.
+        filas (list[list[str]]): Filas de la tabla, incluidas la cabecera y la fila de totales.
+        anchos (list[float]): Ancho de cada columna, en puntos.
+        nota (str | None): Nota al pie de la tabla, con marcado de Paragraph.
+    """
+
+    def __init__(self, titulo: str, filas: list[list[str]], anchos: list[float], nota: str | None = None):
+        self.titulo = titulo
+        self.filas = filas
+        self.anchos = anchos
+        self.nota = nota
+
+def _renderizar(titulo_encabezado: str, logo_path: str | None, secciones: list[SeccionPdf]) -> bytes:
+    """
+    Dibuja secciones consecutivas en un PDF, con un salto de página entre secciones y el mismo
+    encabezado (título y logo) en todas las páginas.
+    Args:
+        titulo_encabezado (str): Título que se dibuja arriba de cada página.
+        logo_path (str | None): Ruta del logo.
+        secciones (list[SeccionPdf]): Las secciones, en orden.
+    Returns:
+        bytes: El contenido del PDF.
+    """
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=landscape(A4),
+        rightMargin=1 * cm,
+        leftMargin=1 * cm,
+        topMargin=2.5 * cm,
+        bottomMargin=1 * cm,
+    )
+    elements = []
+    styles = getSampleStyleSheet()
+    for idx, seccion in enumerate(secciones):
+        if idx > 0:
+            elements.append(PageBreak())
+        elements.append(Paragraph(seccion.titulo, styles["Heading2"]))
+        elements.append(Spacer(1, 0.5 * cm))
+        table = Table(seccion.filas, colWidths=seccion.anchos)
+        table.setStyle(ESTILO_TABLA)
+        elements.append(table)
+        if seccion.nota:
+            elements.append(Spacer(1, 0.4 * cm))
+            elements.append(Paragraph(seccion.nota, styles["Normal"]))
+    def encabezado(canvas, doc):
+        canvas.saveState()
+        canvas.setFont("Times-BoldItalic", 20)
+        canvas.drawCentredString(landscape(A4)[0] / 2, landscape(A4)[1] - 1 * cm, titulo_encabezado)
+        if logo_path and os.path.exists(logo_path):
+            try:
+                img = Image(logo_path, width=5 * cm, height=2 * cm)
+                img.drawOn(canvas, landscape(A4)[0] - 6 * cm, landscape(A4)[1] - 2.5 * cm)
+            except Exception:
+                pass
+        canvas.restoreState()
+    doc.build(elements, onFirstPage=encabezado, onLaterPages=encabezado)
+    return buffer.getvalue()
+
+def _pool_procesos() -> ProcessPoolExecutor:
+    """
+    Crea el pool de procesos la primera vez que se usa.
+    Usa el método spawn: hacer fork de la API copiaría sus hilos (scheduler, pools de conexiones) en un estado inconsistente.
+    Returns:
+        ProcessPoolExecutor: El pool.
+    """
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_PROCESOS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def cerrar():
+    """
+    Detiene los procesos del pool al cerrar la aplicación.
+    """
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+def _dividir(secciones: list[SeccionPdf], partes: int) -> list[list[SeccionPdf]]:
+    """
+    Divide las secciones en grupos consecutivos con una cantidad de filas parecida.
+    Args:
+        secciones (list[SeccionPdf]): Las secciones, en orden.
+        partes (int): Cantidad máxima de grupos.
+    Returns:
+        list[list[SeccionPdf]]: Los grupos, en orden.
+    """
+    objetivo = sum(len(s.filas) for s in secciones) / partes
+    grupos, grupo, filas = [], [], 0
+    for seccion in secciones:
+        grupo.append(seccion)
+        filas += len(seccion.filas)
+        if filas >= objetivo and len(grupos) < partes - 1:
+            grupos.append(grupo)
+            grupo, filas = [], 0
+    if grupo:
+        grupos.append(grupo)
+    return grupos
+
+def _unificar_imagenes(writer: PdfWriter):
+    """
+    Hace que todas las páginas usen una sola copia de cada imagen (el logo se repite en cada PDF parcial).
+    ReportLab nombra las imágenes con el hash de su contenido, así que el mismo nombre es la misma imagen.
+    Args:
+        writer (PdfWriter): El PDF unido.
+    """
+    vistas = {}
+    for pagina in writer.pages:
+        recursos = pagina.get("/Resources")
+        xobjects = recursos.get_object().get("/XObject") if recursos is not None else None
+        if xobjects is None:
+            continue
+        xobjects = xobjects.get_object()
+        for nombre, referencia in list(xobjects.items()):
+            xobjects[NameObject(nombre)] = vistas.setdefault(nombre, referencia)
+    writer.compress_identical_objects(remove_identicals=False, remove_orphans=True)
+
+def generar_pdf_secciones(titulo_encabezado: str, logo_path: str | None, secciones: list[SeccionPdf], progreso: Callable[[int, int], None] | None = None) -> io.BytesIO:
+    """
+    Genera un reporte PDF a partir de sus secciones.
+    Con muchas secciones y más de un núcleo, las secciones se reparten en grupos consecutivos que se
+    dibujan en paralelo en el pool de procesos, y los PDF parciales se unen en orden. El logo, que se
+    repite en cada parcial, queda una sola vez en el archivo final.
+    Args:
+        titulo_encabezado (str): Título que se dibuja arriba de cada página.
+        logo_path (str | None): Ruta del logo.
+        secciones (list[SeccionPdf]): Las secciones, en orden.
+        progreso (Callable[[int, int], None] | None, optional): Recibe las secciones dibujadas y el total
+            cada vez que termina un grupo. Defaults to None.
+    Returns:
+        io.BytesIO: Un buffer en memoria con el contenido del PDF.
+    """
+    logo_path = str(logo_path) if logo_path else None
+    if PDF_PROCESOS <= 1 or len(secciones) < PDF_MIN_SECCIONES:
+        buffer = io.BytesIO(_renderizar(titulo_encabezado, logo_path, secciones))
+        if progreso:
+            progreso(len(secciones), len(secciones))
+        buffer.seek(0)
+        return buffer
+    grupos = _dividir(secciones, PDF_PROCESOS)
+    pool = _pool_procesos()
+    parciales = pool.map(_renderizar, [titulo_encabezado] * len(grupos), [logo_path] * len(grupos), grupos)
+    writer = PdfWriter()
+    hechas = 0
+    for grupo, parcial in zip(grupos, parciales):
+        writer.append(io.BytesIO(parcial))
+        hechas += len(grupo)
+        if progreso:
+            progreso(hechas, len(secciones))
+    _unificar_imagenes(writer)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    buffer.seek(0)
+    return buffer
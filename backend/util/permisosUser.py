@@ -5,9 +5,9 @@ from jose import jwt
 from jose.exceptions import JWTError, ExpiredSignatureError
 from dtos.UsuarioDto import UsuarioLogueado
 from enums.TipoRol import TipoRol
-from model.Usuario import Usuario
 from util.jwtYPasswordHandler import ALGORITHM, SECRET_KEY
 from util.database import get_db
+from util.usuarioCache import UsuarioCache
 from sqlalchemy.orm import Session
 
 
@@ -18,6 +18,8 @@ security = HTTPBearer()
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)) -> UsuarioLogueado:
     """
     Obtiene el usuario actual autenticado a partir del token JWT.
+    La existencia del usuario se verifica con UsuarioCache, que deja su rol en memoria para
+    las dependencias de permisos de la misma petición.
     Args:
         credentials (HTTPAuthorizationCredentials): Las credenciales extraídas del header de autorización.
         db (Session): Sesión de base de datos.
@@ -30,8 +32,7 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         id = payload.get("id")
-        usuario = db.query(Usuario).get(id)
-        if usuario is None:
+        if UsuarioCache.rol(db, id) is None:
             raise HTTPException(status_code=401, detail="Token inválido.")
 
         return UsuarioLogueado.model_validate(payload)
@@ -54,8 +55,7 @@ def admin_required(current_user: UsuarioLogueado = Depends(get_current_user), db
     Raises:
         HTTPException: Si el usuario no tiene rol de Administrador (403).
     """
-    usuario = db.query(Usuario).get(current_user.id)
-    if usuario.rol != TipoRol.ADMINISTRADOR:
+    if UsuarioCache.rol(db, current_user.id) != TipoRol.ADMINISTRADOR:
         raise HTTPException(status_code=403, detail="No tienes permisos de Administrador.")
     return current_user
 
@@ -72,7 +72,6 @@ def canEditDelete(current_user: UsuarioLogueado = Depends(get_current_user), db:
     Raises:
         HTTPException: Si el usuario tiene rol CONSULTA (403).
     """
-    usuario = db.query(Usuario).get(current_user.id)
-    if usuario.rol == TipoRol.CONSULTA:
+    if UsuarioCache.rol(db, current_user.id) in (TipoRol.CONSULTA, None):
         raise HTTPException(status_code=403, detail="No tienes permisos para realizar esta acción.")
     return current_user
\ No newline at end of file
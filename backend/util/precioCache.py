@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import NamedTuple
+from sqlalchemy.orm import Session
+from enums.TipoOrigenPrecio import TipoOrigenPrecio
+from model.Precio import Precio
+from util.rangoFechas import rango_mes
+
+class PrecioSerie(NamedTuple):
+    """
+    Entrada liviana de la serie de precios en memoria.
+    Atributos:
+        id (int): Identificador del precio en la base de datos.
+        fecha_precio (date): Fecha del precio.
+        precio_obtenido (Decimal): Valor del precio.
+    """
+    id: int
+    fecha_precio: date
+    precio_obtenido: Decimal
+
+class _SerieOrigen:
+    """
+    Serie de precios de un origen, ordenada por fecha en arreglos paralelos para búsquedas binarias.
+    """
+    def __init__(self, precios: list[PrecioSerie]):
+        self.precios = precios
+        self.fechas = [p.fecha_precio for p in precios]
+        self.cargada = time.monotonic()
+
+class PrecioCache:
+    """
+    Caché en memoria de las series de precios por `TipoOrigenPrecio`.
+    Cada serie se carga de forma diferida con una única consulta y se invalida
+    desde PrecioService cada vez que se crea, modifica o elimina un precio.
+    Como resguardo ante escrituras hechas desde otro proceso, las series expiran
+    luego de PRECIO_CACHE_TTL segundos.
+    """
+
+    TTL = int(os.getenv("PRECIO_CACHE_TTL", "600"))
+
+    _series: dict[TipoOrigenPrecio, _SerieOrigen] = {}
+    _generacion = 0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _serie(db: Session, origen) -> _SerieOrigen:
+        """
+        Obtiene la serie de un origen, cargándola desde la base de datos si no está en memoria o expiró.
+        Args:
+            db (Session): La sesión de la base de datos.
+            origen (TipoOrigenPrecio | str): Origen de los precios.
+        Returns:
+            _SerieOrigen: La serie ordenada por fecha.
+        """
+        origen = TipoOrigenPrecio(origen)
+        with PrecioCache._lock:
+            serie = PrecioCache._series.get(origen)
+            if serie is not None and time.monotonic() - serie.cargada < PrecioCache.TTL:
+                return serie
+            generacion = PrecioCache._generacion
+        filas = (
+            db.query(Precio.id, Precio.fecha_precio, Precio.precio_obtenido)
+            .filter(Precio.origen == origen)
+            .order_by(Precio.fecha_precio)
+            .all()
+        )
+        serie = _SerieOrigen([PrecioSerie(f.id, f.fecha_precio, Decimal(f.precio_obtenido)) for f in filas])
+        with PrecioCache._lock:
+            # Si hubo una invalidación mientras se consultaba, la serie puede estar desactualizada y no se guarda
+            if generacion == PrecioCache._generacion:
+                PrecioCache._series[origen] = serie
+        return serie
+
+    @staticmethod
+    def invalidar(*origenes):
+        """
+        Descarta las series en memoria de los orígenes indicados, o de todos si no se indica ninguno.
+        Args:
+            *origenes (TipoOrigenPrecio | str): Orígenes a invalidar.
+        """
+        with PrecioCache._lock:
+            PrecioCache._generacion += 1
+            if not origenes:
+                PrecioCache._series.clear()
+                return
+            for origen in origenes:
+                if origen is not None:
+                    PrecioCache._series.pop(TipoOrigenPrecio(origen), None)
+
+    @staticmethod
+    def serie(db: Session, origen) -> list[PrecioSerie]:
+        """
+        Obtiene todos los precios de un origen, ordenados por fecha.
+        Args:
+            db (Session): La sesión de la base de datos.
+            origen (TipoOrigenPrecio | str): Origen de los precios.
+        Returns:
+            list[PrecioSerie]: La serie completa del origen.
+        """
+        return PrecioCache._serie(db, origen).precios
+
+    @staticmethod
+    def en_rango(db: Session, origen, desde: date, hasta: date) -> list[PrecioSerie]:
+        """
+        Obtiene los precios de un origen entre dos fechas inclusive, ordenados por fecha.
+        Args:
+            db (Session): La sesión de la base de datos.
+            origen (TipoOrigenPrecio | str): Origen de los precios.
+            desde (date): Fecha inicial (inclusive).
+            hasta (date): Fecha final (inclusive).
+        Returns:
+            list[PrecioSerie]: Los precios del rango.
+        """
+        serie = PrecioCache._serie(db, origen)
+        return serie.precios[bisect_left(serie.fechas, desde):bisect_right(serie.fechas, hasta)]
+
+    @staticmethod
+    def en_mes(db: Session, origen, anio: int, mes: int) -> list[PrecioSerie]:
+        """
+        Obtiene los precios de un origen en un mes, ordenados por fecha.
+        Args:
+            db (Session): La sesión de la base de datos.
+            origen (TipoOrigenPrecio | str): Origen de los precios.
+            anio (int): Año a consultar.
+            mes (int): Mes a consultar.
+        Returns:
+            list[PrecioSerie]: Los precios del mes.
+        """
+        inicio, fin = rango_mes(anio, mes)
+        return PrecioCache.en_rango(db, origen, inicio, fin - timedelta(days=1))
+
+    @staticmethod
+    def entre_dias(db: Session, origen, anio: int, mes: int, dia_desde: int = 10, dia_hasta: int = 15) -> list[PrecioSerie]:
+        """
+        Obtiene los precios de un origen entre dos días de un mes, ordenados por fecha.
+        Args:
+            db (Session): La sesión de la base de datos.
+            origen (TipoOrigenPrecio | str): Origen de los precios.
+            anio (int): Año a consultar.
+            mes (int): Mes a consultar.
+            dia_desde (int, optional): Primer día (inclusive). Defaults to 10.
+            dia_hasta (int, optional): Último día (inclusive). Defaults to 15.
+        Returns:
+            list[PrecioSerie]: Los precios de la ventana.
+        """
+        return PrecioCache.en_rango(db, origen, date(anio, mes, dia_desde), date(anio, mes, dia_hasta))
+
+    @staticmethod
+    def ultimos_antes_de(db: Session, origen, fecha: date, cantidad: int) -> list[PrecioSerie]:
+        """
+        Obtiene los últimos precios de un origen anteriores a una fecha, del más reciente al más antiguo.
+        Args:
+            db (Session): La sesión de la base de datos.
+            origen (TipoOrigenPrecio | str): Origen de los precios.
+            fecha (date): Fecha límite (exclusiva).
+            cantidad (int): Cantidad máxima de precios a devolver.
+        Returns:
+            list[PrecioSerie]: Los precios encontrados.
+        """
+        serie = PrecioCache._serie(db, origen)
+        fin = bisect_left(serie.fechas, fecha)
+        return serie.precios[max(0, fin - cantidad):fin][::-1]
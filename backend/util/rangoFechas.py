@@ -0,0 +1,43 @@
+from datetime import date, timedelta
+from sqlalchemy import and_
+
+#Helpers para filtrar por períodos con rangos semiabiertos [inicio, fin) sobre la columna de fecha.
+#A diferencia de extract("month"/"year"/"day", columna), estas condiciones permiten que MySQL use los índices.
+
+def rango_mes(anio: int, mes: int):
+    """
+    Calcula el rango semiabierto que cubre un mes completo.
+    Args:
+        anio (int): Año del mes.
+        mes (int): Mes (1 a 12).
+    Returns:
+        tuple[date, date]: El primer día del mes y el primer día del mes siguiente.
+    """
+    return date(anio, mes, 1), date(anio + (mes // 12), (mes % 12) + 1, 1)
+
+def en_mes(columna, anio: int, mes: int):
+    """
+    Construye la condición "la fecha de la columna cae en el mes indicado".
+    Args:
+        columna: Columna de tipo fecha de SQLAlchemy.
+        anio (int): Año del mes.
+        mes (int): Mes (1 a 12).
+    Returns:
+        ColumnElement[bool]: La condición `inicio <= columna < fin`.
+    """
+    inicio, fin = rango_mes(anio, mes)
+    return and_(columna >= inicio, columna < fin)
+
+def entre_dias(columna, anio: int, mes: int, dia_desde: int, dia_hasta: int):
+    """
+    Construye la condición "la fecha de la columna cae entre dos días (inclusive) del mes indicado".
+    Args:
+        columna: Columna de tipo fecha de SQLAlchemy.
+        anio (int): Año del mes.
+        mes (int): Mes (1 a 12).
+        dia_desde (int): Primer día (inclusive).
+        dia_hasta (int): Último día (inclusive).
+    Returns:
+        ColumnElement[bool]: La condición `desde <= columna < hasta + 1 día`.
+    """
+    return and_(columna >= date(anio, mes, dia_desde), columna < date(anio, mes, dia_hasta) + timedelta(days=1))
@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from util import versionDatos
+
+#GET condicionales (ETag y Last-Modified) para los datos maestros. Las versiones son las de toda la tabla
+#que util/versionDatos.py guarda en version_datos en la misma transacción que cada escritura, así que son
+#las mismas para todos los procesos de la API: un ETag obtenido de un worker es válido en cualquier otro.
+
+# Tablas de las que depende cada respuesta, incluidas las relaciones que serializan sus DTO
+PROVINCIAS = ("provincia",)
+LOCALIDADES = ("localidad", "provincia")
+ARRENDADORES = ("arrendador", "localidad", "provincia")
+ARRENDATARIOS = ("arrendatario", "localidad", "provincia")
+
+# Last-Modified de las tablas que todavía no tienen escrituras registradas. Es seguro que difiera entre
+# procesos: la primera escritura registra un momento posterior a cualquier respuesta ya enviada.
+_INICIO = datetime.now(timezone.utc).replace(microsecond=0)
+
+def _no_modificado(request: Request, etag: str, modificada: datetime) -> bool:
+    """
+    Evalúa los encabezados condicionales de la petición.
+    If-None-Match tiene prioridad; If-Modified-Since solo se usa si no viene If-None-Match.
+    Args:
+        request (Request): La petición HTTP.
+        etag (str): ETag actual de la respuesta.
+        modificada (datetime): Fecha de la última modificación.
+    Returns:
+        bool: True si el cliente ya tiene la versión actual.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etiquetas = [e.strip() for e in if_none_match.split(",")]
+        # Comparación débil: se ignora el prefijo W/
+        return "*" in etiquetas or etag.removeprefix("W/") in [e.removeprefix("W/") for e in etiquetas]
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return modificada <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def respuesta_condicional(request: Request, db: Session, tablas: tuple[str, ...], obtener: Callable[[], object], dto: type[BaseModel]) -> Response:
+    """
+    Responde un listado o un objeto con ETag y Last-Modified según las versiones de las tablas de las que depende.
+    Si el cliente ya tiene la versión actual se devuelve 304 tras una única lectura de version_datos, sin consultar los datos.
+    Args:
+        request (Request): La petición HTTP.
+        db (Session): La sesión de la base de datos.
+        tablas (tuple[str, ...]): Tablas de las que depende la respuesta, incluidas las de las relaciones serializadas.
+        obtener (Callable[[], object]): Función que obtiene el objeto o la lista de objetos; solo se llama si hay que enviarlos.
+        dto (type[BaseModel]): DTO de salida de cada objeto.
+    Returns:
+        Response: 304 sin cuerpo, o 200 con el contenido en JSON.
+    """
+    versiones, modificada = versionDatos.versiones_tablas(db, tablas)
+    etag = f'W/"{".".join(str(v) for v in versiones)}"'
+    modificada = modificada.replace(tzinfo=timezone.utc) if modificada is not None else _INICIO
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(modificada, usegmt=True),
+        # El navegador puede guardar la respuesta pero debe revalidarla en cada uso
+        "Cache-Control": "private, no-cache"
+    }
+    if _no_modificado(request, etag, modificada):
+        return Response(status_code=304, headers=headers)
+    resultado = obtener()
+    if isinstance(resultado, list):
+        contenido = [dto.model_validate(obj).model_dump(mode="json") for obj in resultado]
+    else:
+        contenido = dto.model_validate(resultado).model_dump(mode="json")
+    return JSONResponse(content=contenido, headers=headers)
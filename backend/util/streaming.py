@@ -0,0 +1,195 @@
+import csv
+import io
+import json
+import shutil
+import zipfile
+import zlib
+from typing import BinaryIO, Callable, Iterable
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Query, Session
+from util.database import SessionBatch
+
+MEDIA_TYPE_NDJSON = "application/x-ndjson"
+
+def lineas_ndjson(filas: Iterable, tamano_bloque: int = 500):
+    """
+    Serializa las filas como JSON delimitado por saltos de línea, agrupando varias líneas por bloque
+    para no enviar un fragmento HTTP por cada fila.
+    Args:
+        filas (Iterable): Filas a serializar (dicts, DTOs o cualquier objeto soportado por jsonable_encoder).
+        tamano_bloque (int, optional): Cantidad de líneas por bloque enviado. Defaults to 500.
+    Yields:
+        str: Bloques de líneas JSON terminadas en salto de línea.
+    """
+    bloque = []
+    for fila in filas:
+        bloque.append(json.dumps(fila if isinstance(fila, dict) else jsonable_encoder(fila), ensure_ascii=False, default=str))
+        if len(bloque) >= tamano_bloque:
+            yield "\n".join(bloque) + "\n"
+            bloque = []
+    if bloque:
+        yield "\n".join(bloque) + "\n"
+
+def respuesta_ndjson(filas: Iterable, headers: dict | None = None) -> StreamingResponse:
+    """
+    Construye una respuesta HTTP que transmite las filas en formato NDJSON a medida que se generan.
+    Args:
+        filas (Iterable): Filas a transmitir.
+        headers (dict | None, optional): Encabezados adicionales de la respuesta. Defaults to None.
+    Returns:
+        StreamingResponse: La respuesta en streaming.
+    """
+    return StreamingResponse(lineas_ndjson(filas), media_type=MEDIA_TYPE_NDJSON, headers=headers)
+
+def lineas_csv(columnas: list[str], filas: Iterable[dict], tamano_bloque: int = 500):
+    """
+    Serializa las filas como CSV con una fila de encabezado, agrupando varias filas por bloque.
+    El primer bloque empieza con la marca BOM de UTF-8 para que Excel reconozca los acentos.
+    Args:
+        columnas (list[str]): Nombres de las columnas, en orden.
+        filas (Iterable[dict]): Filas a serializar; los valores nulos quedan como celdas vacías.
+        tamano_bloque (int, optional): Cantidad de filas por bloque enviado. Defaults to 500.
+    Yields:
+        str: Bloques de líneas CSV.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columnas, lineterminator="\r\n")
+    buffer.write("\ufeff")
+    writer.writeheader()
+    cantidad = 0
+    for fila in filas:
+        writer.writerow(fila)
+        cantidad += 1
+        if cantidad >= tamano_bloque:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            cantidad = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def comprimir_gzip(bloques: Iterable[str | bytes], nivel: int = 6):
+    """
+    Comprime en formato gzip los bloques de una respuesta a medida que se generan.
+    Args:
+        bloques (Iterable[str | bytes]): Bloques de texto (se codifican en UTF-8) o bytes.
+        nivel (int, optional): Nivel de compresión de 1 a 9. Defaults to 6.
+    Yields:
+        bytes: Los bloques comprimidos.
+    """
+    compresor = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for bloque in bloques:
+        comprimido = compresor.compress(bloque.encode("utf-8") if isinstance(bloque, str) else bloque)
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
+
+class _SalidaZip:
+    """
+    Destino de escritura de un ZIP en streaming: acumula lo que escribe zipfile hasta que se retira.
+    No admite seek, por lo que zipfile escribe el tamaño y el CRC de cada archivo después de su contenido.
+    """
+
+    def __init__(self):
+        self._bloques = []
+
+    def write(self, datos: bytes) -> int:
+        self._bloques.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def retirar(self) -> bytes:
+        """
+        Devuelve lo escrito desde el último retiro.
+        Returns:
+            bytes: Los bytes acumulados.
+        """
+        datos = b"".join(self._bloques)
+        self._bloques = []
+        return datos
+
+def zip_en_streaming(archivos: Iterable[tuple[str, BinaryIO]]):
+    """
+    Arma un archivo ZIP a medida que se generan sus archivos, sin esperar a tenerlos todos.
+    En memoria solo queda el archivo que se está agregando.
+    Args:
+        archivos (Iterable[tuple[str, BinaryIO]]): Pares de nombre dentro del ZIP y contenido; cada contenido se cierra al agregarlo.
+    Yields:
+        bytes: Los bloques del ZIP.
+    """
+    salida = _SalidaZip()
+    with zipfile.ZipFile(salida, "w", compression=zipfile.ZIP_DEFLATED) as zip_archivo:
+        for nombre, contenido in archivos:
+            with contenido, zip_archivo.open(nombre, "w") as destino:
+                shutil.copyfileobj(contenido, destino)
+            yield salida.retirar()
+    yield salida.retirar()
+
+def bloques_archivo(archivo: BinaryIO, tamano_bloque: int = 64 * 1024):
+    """
+    Lee un archivo binario en bloques de tamaño fijo para enviarlo en una respuesta en streaming,
+    y lo cierra al terminar.
+    Args:
+        archivo (BinaryIO): El archivo, posicionado donde se empieza a leer.
+        tamano_bloque (int, optional): Bytes por bloque. Defaults to 64 KiB.
+    Yields:
+        bytes: Los bloques del archivo.
+    """
+    try:
+        while bloque := archivo.read(tamano_bloque):
+            yield bloque
+    finally:
+        archivo.close()
+
+def pide_ndjson(request: Request, formato: str | None = None) -> bool:
+    """
+    Indica si el cliente pidió la representación NDJSON de un listado, ya sea con el parámetro
+    `formato=ndjson` o con el encabezado `Accept: application/x-ndjson`.
+    Args:
+        request (Request): La petición HTTP.
+        formato (str | None, optional): Valor del parámetro de consulta `formato`. Defaults to None.
+    Returns:
+        bool: True si se debe responder en NDJSON.
+    """
+    if formato is not None:
+        return formato == "ndjson"
+    return MEDIA_TYPE_NDJSON in request.headers.get("accept", "")
+
+def serializar_con(dto: type[BaseModel]) -> Callable[[Iterable], Iterable[dict]]:
+    """
+    Crea un serializador que valida cada objeto con un DTO de salida y lo convierte a un dict JSON.
+    Args:
+        dto (type[BaseModel]): El DTO de salida.
+    Returns:
+        Callable[[Iterable], Iterable[dict]]: Función que transforma las filas de la consulta en dicts.
+    """
+    def serializar(filas: Iterable) -> Iterable[dict]:
+        for fila in filas:
+            yield dto.model_validate(fila).model_dump(mode="json")
+    return serializar
+
+def filas_en_streaming(armar_consulta: Callable[[Session], Query], serializar: Callable[[Iterable], Iterable[dict]], tamano_lote: int = 500):
+    """
+    Recorre una consulta con un cursor del lado del servidor (`yield_per`) y serializa cada fila
+    a medida que llega, sin materializar el listado completo en memoria.
+    La consulta usa una sesión propia del pool batch porque la de la petición se cierra antes de enviar
+    la respuesta, y así un listado largo no retiene conexiones del pool de la API.
+    Mientras el cursor está abierto no se pueden emitir otras consultas por la misma conexión, por eso
+    todas las relaciones que se serializan deben cargarse en la misma consulta con joinedload (muchos a uno).
+    Args:
+        armar_consulta (Callable[[Session], Query]): Construye la consulta a partir de la sesión.
+        serializar (Callable[[Iterable], Iterable[dict]]): Convierte las filas de la consulta en dicts.
+        tamano_lote (int, optional): Filas que se traen del servidor por vez. Defaults to 500.
+    Yields:
+        dict: Cada fila serializada.
+    """
+    db = SessionBatch()
+    try:
+        yield from serializar(armar_consulta(db).yield_per(tamano_lote))
+    finally:
+        db.close()
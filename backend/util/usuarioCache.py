@@ -0,0 +1,64 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy.orm import Session
+from enums.TipoRol import TipoRol
+from model.Usuario import Usuario
+
+class UsuarioCache:
+    """
+    Caché en memoria del rol de los usuarios autenticados, compartida por las dependencias de permisos.
+    Evita consultar la tabla usuario en cada petición protegida y otra vez al verificar el rol.
+    Se invalida desde UsuarioService al modificar o eliminar un usuario o cambiar su contraseña;
+    como resguardo ante cambios hechos desde otro proceso, las entradas expiran luego de
+    USUARIO_CACHE_TTL segundos. Guarda como máximo USUARIO_CACHE_MAX usuarios, descartando
+    los usados hace más tiempo.
+    """
+
+    TTL = int(os.getenv("USUARIO_CACHE_TTL", "30"))
+    MAX_USUARIOS = int(os.getenv("USUARIO_CACHE_MAX", "1000"))
+
+    _roles: OrderedDict[int, tuple[TipoRol, float]] = OrderedDict()
+    _generacion = 0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def rol(db: Session, usuario_id: int) -> TipoRol | None:
+        """
+        Obtiene el rol actual de un usuario, consultando la base de datos solo si no está en la caché o expiró.
+        Args:
+            db (Session): La sesión de la base de datos.
+            usuario_id (int): El ID del usuario.
+        Returns:
+            TipoRol | None: El rol del usuario, o None si el usuario no existe.
+        """
+        ahora = time.monotonic()
+        with UsuarioCache._lock:
+            entrada = UsuarioCache._roles.get(usuario_id)
+            if entrada is not None and ahora - entrada[1] < UsuarioCache.TTL:
+                UsuarioCache._roles.move_to_end(usuario_id)
+                return entrada[0]
+            generacion = UsuarioCache._generacion
+        rol = db.query(Usuario.rol).filter(Usuario.id == usuario_id).scalar()
+        if rol is None:
+            return None
+        with UsuarioCache._lock:
+            # Si hubo una invalidación mientras se consultaba, el rol puede estar desactualizado y no se guarda
+            if generacion == UsuarioCache._generacion:
+                UsuarioCache._roles[usuario_id] = (rol, ahora)
+                UsuarioCache._roles.move_to_end(usuario_id)
+                while len(UsuarioCache._roles) > UsuarioCache.MAX_USUARIOS:
+                    UsuarioCache._roles.popitem(last=False)
+        return rol
+
+    @staticmethod
+    def invalidar(usuario_id: int):
+        """
+        Descarta el rol en memoria de un usuario.
+        Args:
+            usuario_id (int): El ID del usuario.
+        """
+        with UsuarioCache._lock:
+            UsuarioCache._generacion += 1
+            UsuarioCache._roles.pop(usuario_id, None)
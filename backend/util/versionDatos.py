@@ -0,0 +1,165 @@
+import hashlib
+from datetime import datetime, timezone
+from itertools import chain
+from sqlalchemy import and_, event, inspect, or_, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from model.Facturacion import Facturacion
+from model.Pago import Pago
+from model.VersionDatos import VersionDatos
+
+#Versionado persistente de los datos que usan los reportes y los GET condicionales de la API. Las versiones
+#se guardan en la tabla version_datos, en la misma transacción que cada escritura: las ven todos los procesos
+#de la API y sobreviven a reinicios, así la caché de reportes en disco y los ETag siguen siendo válidos.
+
+# Tablas versionadas por mes y la columna de fecha que define el mes de cada fila
+COLUMNA_MES = {
+    "pago": "vencimiento",
+    "facturacion": "fecha_facturacion",
+    "retencion": "fecha_retencion",
+    "precio": "fecha_precio",
+}
+# Tablas versionadas como un todo: cambian poco y sus datos (nombres, condición fiscal, ubicación) aparecen en
+# todos los reportes y en las respuestas con ETag
+TABLAS_MAESTRAS = ("arrendatario", "arrendador", "arrendamiento", "participacion_arrendador", "localidad", "provincia")
+TODA_LA_TABLA = (0, 0)
+
+def _valores(obj, atributo: str) -> list:
+    """
+    Obtiene el valor actual y el anterior (si cambió en esta transacción) de un atributo.
+    Args:
+        obj: Instancia del modelo.
+        atributo (str): Nombre del atributo.
+    Returns:
+        list: Los valores no nulos del atributo.
+    """
+    historial = inspect(obj).attrs[atributo].history
+    valores = [*historial.added, *historial.unchanged, *historial.deleted]
+    if not valores:
+        # Atributo expirado desde el último commit: se carga para conocer el valor actual
+        valores = [getattr(obj, atributo)]
+    return [v for v in valores if v is not None]
+
+def _antes_flush(session: Session, flush_context, instancias):
+    """
+    Registra en la sesión las versiones a incrementar por las instancias que se van a escribir.
+    Las facturaciones y retenciones también versionan el mes de vencimiento de su pago, que es el que
+    usa el reporte mensual.
+    """
+    claves = session.info.setdefault("versiones_datos", set())
+    pago_ids, facturacion_ids = set(), set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        tabla = getattr(obj, "__tablename__", None)
+        if tabla not in COLUMNA_MES and tabla not in TABLAS_MAESTRAS:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if tabla in TABLAS_MAESTRAS:
+            claves.add((tabla, *TODA_LA_TABLA))
+            continue
+        claves.update((tabla, fecha.year, fecha.month) for fecha in _valores(obj, COLUMNA_MES[tabla]))
+        if tabla == "facturacion":
+            pago_ids.update(_valores(obj, "pago_id"))
+        elif tabla == "retencion":
+            facturacion_ids.update(_valores(obj, "facturacion_id"))
+    if not pago_ids and not facturacion_ids:
+        return
+    with session.no_autoflush:
+        if pago_ids:
+            vencimientos = session.execute(select(Pago.vencimiento).where(Pago.id.in_(pago_ids))).scalars()
+            claves.update(("facturacion", v.year, v.month) for v in vencimientos)
+        if facturacion_ids:
+            vencimientos = session.execute(
+                select(Pago.vencimiento).join(Facturacion, Facturacion.pago_id == Pago.id).where(Facturacion.id.in_(facturacion_ids))
+            ).scalars()
+            claves.update(("retencion", v.year, v.month) for v in vencimientos)
+
+def _despues_flush(session: Session, flush_context):
+    """
+    Incrementa, dentro de la misma transacción, las versiones registradas antes del flush.
+    """
+    claves = session.info.pop("versiones_datos", None)
+    if claves:
+        incrementar(session.connection(), claves)
+
+def _al_ejecutar(estado):
+    """
+    Versiona toda la tabla ante escrituras masivas (insert, update o delete ejecutados con
+    Session.execute), que no pasan por el flush y no permiten saber qué meses afectan.
+    """
+    if not (estado.is_insert or estado.is_update or estado.is_delete):
+        return
+    tabla = getattr(getattr(estado.statement, "table", None), "name", None)
+    if tabla in COLUMNA_MES or tabla in TABLAS_MAESTRAS:
+        incrementar(estado.session.connection(), {(tabla, *TODA_LA_TABLA)})
+
+def incrementar(conn, claves: set[tuple[str, int, int]]):
+    """
+    Incrementa las versiones indicadas, creando las filas que no existan.
+    Args:
+        conn (Connection): Conexión de la transacción en curso.
+        claves (set[tuple[str, int, int]]): Conjunto de (tabla, año, mes).
+    """
+    ahora = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    filas = [{"tabla": t, "anio": a, "mes": m, "version": 1, "modificada": ahora} for t, a, m in sorted(claves)]
+    tabla = VersionDatos.__table__
+    if conn.dialect.name == "mysql":
+        sentencia = mysql_insert(tabla).values(filas)
+        conn.execute(sentencia.on_duplicate_key_update(version=tabla.c.version + 1, modificada=ahora))
+    elif conn.dialect.name == "sqlite":
+        sentencia = sqlite_insert(tabla).values(filas)
+        conn.execute(sentencia.on_conflict_do_update(index_elements=["tabla", "anio", "mes"], set_={"version": tabla.c.version + 1, "modificada": ahora}))
+    else:
+        for fila in filas:
+            resultado = conn.execute(
+                update(tabla)
+                .where(tabla.c.tabla == fila["tabla"], tabla.c.anio == fila["anio"], tabla.c.mes == fila["mes"])
+                .values(version=tabla.c.version + 1, modificada=ahora)
+            )
+            if resultado.rowcount == 0:
+                conn.execute(tabla.insert().values(**fila))
+
+def versiones_tablas(db: Session, tablas: tuple[str, ...]) -> tuple[list[int], datetime | None]:
+    """
+    Obtiene la versión de toda la tabla de cada una de las tablas indicadas, con una lectura por clave primaria.
+    Args:
+        db (Session): La sesión de la base de datos.
+        tablas (tuple[str, ...]): Nombres de las tablas.
+    Returns:
+        tuple[list[int], datetime | None]: Las versiones, en el orden de las tablas (0 si nunca se escribió),
+            y el momento UTC de la última escritura registrada, o None si no hay ninguna.
+    """
+    filas = db.execute(
+        select(VersionDatos.tabla, VersionDatos.version, VersionDatos.modificada)
+        .where(VersionDatos.tabla.in_(tablas), VersionDatos.anio == TODA_LA_TABLA[0], VersionDatos.mes == TODA_LA_TABLA[1])
+    ).all()
+    versiones = {f.tabla: f.version for f in filas}
+    modificadas = [f.modificada for f in filas if f.modificada is not None]
+    return [versiones.get(t, 0) for t in tablas], max(modificadas, default=None)
+
+def huella(db: Session, meses_por_tabla: dict[str, list[tuple[int, int]]]) -> str:
+    """
+    Calcula la huella de versión de los datos de un reporte.
+    Incluye las versiones de los meses indicados de cada tabla, la versión de toda la tabla
+    (escrituras masivas) y la de las tablas maestras.
+    Args:
+        db (Session): La sesión de la base de datos.
+        meses_por_tabla (dict[str, list[tuple[int, int]]]): Los (año, mes) de los que depende el reporte, por tabla.
+    Returns:
+        str: El hash SHA-256 de las versiones.
+    """
+    condiciones = [VersionDatos.tabla.in_(TABLAS_MAESTRAS)]
+    for tabla, meses in meses_por_tabla.items():
+        for anio, mes in [TODA_LA_TABLA, *meses]:
+            condiciones.append(and_(VersionDatos.tabla == tabla, VersionDatos.anio == anio, VersionDatos.mes == mes))
+    versiones = db.execute(
+        select(VersionDatos.tabla, VersionDatos.anio, VersionDatos.mes, VersionDatos.version)
+        .where(or_(*condiciones))
+        .order_by(VersionDatos.tabla, VersionDatos.anio, VersionDatos.mes)
+    ).all()
+    return hashlib.sha256(repr([tuple(v) for v in versiones]).encode()).hexdigest()
+
+event.listen(Session, "before_flush", _antes_flush)
+event.listen(Session, "after_flush", _despues_flush)
+event.listen(Session, "do_orm_execute", _al_ejecutar)